@@ -0,0 +1,8 @@
+# pip install Flask
+
+from flask import Flask
+
+app = Flask(__name__)
+
+# Registered after app exists; both import it from this package
+from app import routes, middleware
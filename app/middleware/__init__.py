@@ -0,0 +1,6 @@
+# Registered first so its after_request runs last and the latency covers the others
+from . import recording
+from . import metrics
+from . import authentication
+from . import compression
+from . import profiling
@@ -0,0 +1,34 @@
+from flask import request, g
+from app import app
+from app.routes.auth_routes import validate_session
+from app.services.data_service import get_record
+from app.services.session_store import get_cached_principal, cache_principal
+from app.services.metrics import record_cache
+
+
+@app.before_request
+def authenticate_request():
+    # Resolve X-Session-ID once per request and expose the principal as g.session / g.user.
+    # Requests without the header, or with one that does not resolve, proceed anonymously;
+    # routes decide whether that is allowed. g.session_error keeps the (message, status)
+    # of a rejected session for the routes that need a principal to report.
+    g.session = None
+    g.user = None
+    g.session_error = None
+
+    session_id = request.headers.get('X-Session-ID')
+    if not session_id or request.path == '/api/sessions':
+        return None
+
+    principal = get_cached_principal(session_id)
+    record_cache('principal', principal is not None)
+    if principal is None:
+        session, error = validate_session(session_id)
+        if error:
+            g.session_error = error
+            return None
+        principal = (session, get_record('users', 'userId', session['userId']))
+        cache_principal(*principal)
+
+    g.session, g.user = principal
+    return None
@@ -0,0 +1,75 @@
+from flask import request
+from app import app
+from app.services.metrics import record_cache
+from collections import OrderedDict
+import hashlib
+import threading
+import zlib
+
+# Bodies smaller than this are sent as-is; gzip overhead outweighs the savings
+COMPRESS_MIN_SIZE = 1024
+COMPRESS_LEVEL = 6
+# Number of compressed bodies kept so repeated pages are only gzipped once
+COMPRESS_CACHE_SIZE = 256
+
+COMPRESSIBLE_MIMETYPES = ['application/json', 'application/x-ndjson', 'text/html', 'text/plain', 'text/csv']
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def gzip_bytes(body):
+    # wbits=31 produces a gzip container rather than a raw zlib stream
+    compressor = zlib.compressobj(COMPRESS_LEVEL, zlib.DEFLATED, 31)
+    return compressor.compress(body) + compressor.flush()
+
+
+def cached_gzip(body):
+    key = hashlib.blake2b(body, digest_size=16).digest()
+    with _cache_lock:
+        compressed = _cache.get(key)
+        if compressed is not None:
+            _cache.move_to_end(key)
+    record_cache('compression', compressed is not None)
+    if compressed is not None:
+        return compressed
+
+    compressed = gzip_bytes(body)
+    with _cache_lock:
+        _cache[key] = compressed
+        if len(_cache) > COMPRESS_CACHE_SIZE:
+            _cache.popitem(last=False)
+    return compressed
+
+
+def gzip_stream(chunks):
+    # Sync-flush after every chunk so clients can decode the stream as it arrives
+    compressor = zlib.compressobj(COMPRESS_LEVEL, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        if chunk:
+            yield compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+    yield compressor.flush()
+
+
+@app.after_request
+def compress_response(response):
+    if response.mimetype not in COMPRESSIBLE_MIMETYPES:
+        return response
+    response.vary.add('Accept-Encoding')
+
+    if (response.status_code < 200 or response.status_code in (204, 304) or
+            response.direct_passthrough or 'Content-Encoding' in response.headers or
+            request.accept_encodings['gzip'] <= 0):
+        return response
+
+    if response.is_streamed:
+        response.response = gzip_stream(response.iter_encoded())
+        response.headers.pop('Content-Length', None)
+    else:
+        body = response.get_data()
+        if len(body) < COMPRESS_MIN_SIZE:
+            return response
+        response.set_data(cached_gzip(body))
+
+    response.headers['Content-Encoding'] = 'gzip'
+    return response
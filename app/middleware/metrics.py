@@ -0,0 +1,31 @@
+from flask import request
+from flask.json.provider import DefaultJSONProvider
+from app import app
+from app.services.metrics import METRICS_ENABLED, begin_request, end_request, timed_phase
+
+
+class TimedJSONProvider(DefaultJSONProvider):
+    # Attributes jsonify() time to the serialization phase
+    def dumps(self, obj, **kwargs):
+        with timed_phase('serialization'):
+            return super().dumps(obj, **kwargs)
+
+
+if METRICS_ENABLED:
+    app.json = TimedJSONProvider(app)
+
+
+@app.before_request
+def start_request_metrics():
+    if not METRICS_ENABLED:
+        return None
+    # Label by route template so /api/users/1 and /api/users/2 share a series
+    route = request.url_rule.rule if request.url_rule else 'unmatched'
+    begin_request(request.method, route)
+    return None
+
+
+@app.teardown_request
+def finish_request_metrics(exc):
+    if METRICS_ENABLED:
+        end_request()
@@ -0,0 +1,169 @@
+from flask import request, jsonify, g, Response
+from app import app
+from collections import Counter
+import cProfile
+import io
+import os
+import pstats
+import sys
+import tempfile
+import threading
+import time
+import uuid
+
+# Where .prof files and aggregated .collapsed stacks are written
+PROFILE_DIR = os.environ.get('PROFILE_DIR', 'profiles')
+# Profile 1 in N requests per route with the sampler; 0 disables sampling
+PROFILE_SAMPLE_RATE = int(os.environ.get('PROFILE_SAMPLE_RATE', '0'))
+# Comma-separated route templates to sample; empty samples every route
+PROFILE_SAMPLE_ROUTES = [route for route in os.environ.get('PROFILE_SAMPLE_ROUTES', '').split(',') if route]
+SAMPLE_INTERVAL_SECONDS = 0.001
+# Number of functions listed when stats are returned inline
+STATS_LIMIT = 40
+
+_lock = threading.Lock()
+# Serializes writes of the .collapsed files, so an older snapshot never replaces a newer one
+_write_lock = threading.Lock()
+# Notified when a request starts being sampled; the sampler sleeps on it otherwise
+_sampling = threading.Condition(_lock)
+# Requests per route seen so far, for 1-in-N selection
+_route_counts = Counter()
+# thread id -> Counter of collapsed stacks for the request being sampled on it
+_targets = {}
+# route -> Counter of collapsed stacks aggregated across sampled requests
+_aggregates = {}
+_sampler = None
+
+
+def _frame_label(frame):
+    code = frame.f_code
+    return f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})'.replace(';', ':')
+
+
+def _collapse(frame):
+    # Root-first, semicolon separated, as expected by flamegraph.pl and speedscope
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    return ';'.join(reversed(labels))
+
+
+def _sample_loop():
+    while True:
+        # No wakeups at all while nothing is being sampled
+        with _sampling:
+            _sampling.wait_for(lambda: _targets)
+        time.sleep(SAMPLE_INTERVAL_SECONDS)
+        with _lock:
+            frames = sys._current_frames()
+            for thread_id, stacks in _targets.items():
+                frame = frames.get(thread_id)
+                if frame is not None:
+                    stacks[_collapse(frame)] += 1
+
+
+def _ensure_sampler():
+    global _sampler
+    with _lock:
+        if _sampler is None or not _sampler.is_alive():
+            _sampler = threading.Thread(target=_sample_loop, name='request-sampler', daemon=True)
+            _sampler.start()
+
+
+def _route_slug(route):
+    return route.strip('/').replace('/', '_').replace('<', '').replace('>', '') or 'root'
+
+
+def _write_collapsed(route):
+    # One file per process: serve.py workers each aggregate only their own requests,
+    # so they must not overwrite each other's. Concatenating the files of a route
+    # gives the stacks of all workers.
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    path = os.path.join(PROFILE_DIR, f'{_route_slug(route)}.{os.getpid()}.collapsed')
+    with _write_lock:
+        with _lock:
+            stacks = Counter(_aggregates.get(route, ()))
+        # Write a private temp file then rename, so readers never see a partial file
+        descriptor, tmp_path = tempfile.mkstemp(dir=PROFILE_DIR, suffix='.tmp')
+        try:
+            with os.fdopen(descriptor, 'w') as file:
+                for stack, count in stacks.most_common():
+                    file.write(f'{stack} {count}\n')
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+
+def _should_sample(route):
+    if not PROFILE_SAMPLE_RATE or (PROFILE_SAMPLE_ROUTES and route not in PROFILE_SAMPLE_ROUTES):
+        return False
+    with _lock:
+        _route_counts[route] += 1
+        return _route_counts[route] % PROFILE_SAMPLE_RATE == 0
+
+
+@app.before_request
+def start_profiling():
+    g.profiler = None
+    g.profile_sampled = False
+
+    mode = request.headers.get('X-Profile') or request.args.get('__profile')
+    if mode:
+        # Runs after authentication, so g.user is already resolved
+        if g.get('session_error'):
+            message, status = g.session_error
+            return jsonify({'error': message}), status
+        if not g.get('user') or g.user['role'] != 'ADMIN':
+            return jsonify({'error': 'Profiling requires an admin session'}), 403
+        g.profile_mode = mode
+        g.profiler = cProfile.Profile()
+        g.profiler.enable()
+        return None
+
+    route = request.url_rule.rule if request.url_rule else None
+    if route and _should_sample(route):
+        _ensure_sampler()
+        with _sampling:
+            _targets[threading.get_ident()] = Counter()
+            _sampling.notify()
+        g.profile_sampled = True
+    return None
+
+
+@app.after_request
+def finish_profiling(response):
+    if g.get('profiler') is not None:
+        g.profiler.disable()
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        profile_id = uuid.uuid4().hex[:12]
+        path = os.path.join(PROFILE_DIR, f'{profile_id}.prof')
+        g.profiler.dump_stats(path)
+
+        if g.profile_mode == 'return':
+            # Replace the body with the top functions by cumulative time
+            output = io.StringIO()
+            pstats.Stats(g.profiler, stream=output).sort_stats('cumulative').print_stats(STATS_LIMIT)
+            response = Response(output.getvalue(), mimetype='text/plain')
+        response.headers['X-Profile-Id'] = profile_id
+        g.profiler = None
+
+    if g.get('profile_sampled'):
+        with _lock:
+            stacks = _targets.pop(threading.get_ident(), Counter())
+            _aggregates.setdefault(request.url_rule.rule, Counter()).update(stacks)
+        _write_collapsed(request.url_rule.rule)
+        g.profile_sampled = False
+    return response
+
+
+@app.teardown_request
+def stop_profiling(exc):
+    # after_request is skipped when a request fails; never leave a profiler running
+    if g.get('profiler') is not None:
+        g.profiler.disable()
+        g.profiler = None
+    if g.get('profile_sampled'):
+        with _lock:
+            _targets.pop(threading.get_ident(), None)
@@ -0,0 +1,35 @@
+from flask import request, g
+from app import app
+from app.services.request_log import RECORD_ENABLED, RECORD_BODIES, record
+import hashlib
+import time
+
+
+@app.before_request
+def start_recording():
+    if RECORD_ENABLED:
+        g.record_started = time.perf_counter()
+    return None
+
+
+@app.after_request
+def record_request(response):
+    if not RECORD_ENABLED or 'record_started' not in g:
+        return response
+    body = request.get_data(cache=True)
+    entry = {
+        'timestamp': time.time(),
+        'method': request.method,
+        'path': request.path,
+        'query': request.query_string.decode('latin-1'),
+        'status': response.status_code,
+        'latencyMs': round((time.perf_counter() - g.record_started) * 1000, 3),
+    }
+    if body:
+        entry['contentType'] = request.content_type
+        if RECORD_BODIES == 'full':
+            entry['body'] = body.decode('utf-8', errors='replace')
+        else:
+            entry['bodySha256'] = hashlib.sha256(body).hexdigest()
+    record(entry)
+    return response
@@ -1,5 +1,9 @@
+from . import auth_routes
 from . import user_routes
 from . import property_routes
 from . import post_routes
 from . import application_routes
 from . import activity_routes 
+from . import export_routes
+from . import metrics_routes
+from . import event_routes
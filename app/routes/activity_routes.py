@@ -0,0 +1,162 @@
+from flask import request, jsonify
+from app import app
+from app.services.data_service import get_many, get_record, find_page
+from app.services.scoring_service import get_property_scores, get_roommate_scores, ScoringBusy
+from app.services.ledger_service import validate_activity_data, record_activity, record_activities
+from app.utils.batch import get_bulk_items, bulk_summary
+from concurrent.futures import TimeoutError
+
+@app.route('/api/activities', methods=['GET'])
+def get_activities():
+    activity_type = request.args.get('type', '').upper()
+    user_id = request.args.get('userId')
+    begin = int(request.args.get('begin', 1))
+    count = int(request.args.get('count', 10))
+
+    activities_page, total_count = find_page('tokenActivities', {'activityType': activity_type, 'userId': user_id},
+                                             begin, count)
+
+    return jsonify({
+        'activities': activities_page,
+        'totalCount': total_count,
+        'currentPage': begin,
+        'pageSize': count
+    })
+
+@app.route('/api/activities/<activity_id>', methods=['GET'])
+def get_activity(activity_id):
+    activity = get_record('tokenActivities', 'activityId', activity_id)
+    if not activity:
+        return jsonify({'error': 'Activity not found'}), 404
+        
+    return jsonify(activity)
+
+def get_user_activities(user_id):
+    activity_type = request.args.get('type', '').upper()
+    begin = int(request.args.get('begin', 1))
+    count = int(request.args.get('count', 10))
+
+    activities_page, total_count = find_page('tokenActivities', {'userId': user_id, 'activityType': activity_type},
+                                             begin, count)
+
+    return jsonify({
+        'activities': activities_page,
+        'totalCount': total_count,
+        'currentPage': begin,
+        'pageSize': count
+    })
+
+@app.route('/api/users/<user_id>/activities', methods=['POST', 'GET'])
+def handle_user_activities(user_id):
+    if request.method == 'GET':
+        return get_user_activities(user_id)
+        
+    activity_data = request.get_json()
+    
+    # Validate user exists and is active
+    user = get_record('users', 'userId', user_id)
+    if not user:
+        return jsonify({'error': 'User not found'}), 404
+    if user['status'] != 'ACTIVE':
+        return jsonify({'error': 'User account is not active'}), 403
+    
+    error = validate_activity_data(activity_data)
+    if error:
+        return jsonify({'error': error}), 400
+    
+    new_activity, error = record_activity(user, activity_data)
+    if error:
+        return jsonify({'error': error}), 400
+    return jsonify(new_activity), 201
+
+@app.route('/api/activities/bulk', methods=['POST'])
+def create_activities_bulk():
+    items, error = get_bulk_items(request.get_json())
+    if error:
+        return jsonify({'error': error}), 400
+    
+    # Validate every item up front so only well-formed items reach the lock
+    user_ids = [item['userId'] for item in items if isinstance(item, dict) and 'userId' in item]
+    users = {user['userId']: user for user in get_many('users', 'userId', user_ids)[0]}
+    results = [None] * len(items)
+    pending = []
+    for index, item in enumerate(items):
+        if not isinstance(item, dict) or 'userId' not in item:
+            results[index] = {'index': index, 'status': 400, 'error': 'Missing required field: userId'}
+            continue
+        user = users.get(item['userId'])
+        if not user:
+            results[index] = {'index': index, 'status': 404, 'error': 'User not found'}
+            continue
+        if user['status'] != 'ACTIVE':
+            results[index] = {'index': index, 'status': 403, 'error': 'User account is not active'}
+            continue
+        error = validate_activity_data(item)
+        if error:
+            results[index] = {'index': index, 'status': 400, 'error': error}
+            continue
+        pending.append((index, user, item))
+    
+    # Apply in request order so balances see earlier items of the same batch
+    applied = record_activities([(user, item) for _, user, item in pending])
+    for (index, _, _), (new_activity, error) in zip(pending, applied):
+        if error:
+            results[index] = {'index': index, 'status': 400, 'error': error}
+        else:
+            results[index] = {'index': index, 'status': 201, 'activity': new_activity}
+    
+    return jsonify(bulk_summary(results))
+
+@app.route('/api/students/<student_id>/property-match-scores', methods=['GET'])
+def get_property_match_scores(student_id):
+    # Validate student exists and is active
+    student = get_record('users', 'userId', student_id)
+    if not student or student['role'] != 'STUDENT':
+        return jsonify({'error': 'Student not found'}), 404
+    if student['status'] != 'ACTIVE':
+        return jsonify({'error': 'Student account is not active'}), 403
+    
+    # Get student preferences from profile
+    profile = get_record('profiles', 'userId', student_id)
+    if not profile:
+        return jsonify({'error': 'Student profile not found'}), 404
+    
+    # Calculate match scores for available properties in the scoring pool
+    try:
+        property_scores = get_property_scores(profile)
+    except TimeoutError:
+        return jsonify({'error': 'Match scoring timed out'}), 503
+    except ScoringBusy:
+        return jsonify({'error': 'Match scoring is busy'}), 503
+    
+    return jsonify({
+        'studentId': student_id,
+        'propertyScores': property_scores
+    })
+
+@app.route('/api/students/<student_id>/roommate-compatibility', methods=['GET'])
+def get_roommate_compatibility(student_id):
+    # Validate student exists and is active
+    student = get_record('users', 'userId', student_id)
+    if not student or student['role'] != 'STUDENT':
+        return jsonify({'error': 'Student not found'}), 404
+    if student['status'] != 'ACTIVE':
+        return jsonify({'error': 'Student account is not active'}), 403
+    
+    # Get student preferences from profile
+    profile = get_record('profiles', 'userId', student_id)
+    if not profile:
+        return jsonify({'error': 'Student profile not found'}), 404
+    
+    # Calculate compatibility with other students in the scoring pool
+    try:
+        compatibility_scores = get_roommate_scores(student_id, profile)
+    except TimeoutError:
+        return jsonify({'error': 'Compatibility scoring timed out'}), 503
+    except ScoringBusy:
+        return jsonify({'error': 'Compatibility scoring is busy'}), 503
+    
+    return jsonify({
+        'studentId': student_id,
+        'compatibilityScores': compatibility_scores
+    })
\ No newline at end of file
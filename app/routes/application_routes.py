@@ -1,12 +1,11 @@
 from flask import request, jsonify
 from app import app
-from app.services.data_service import load_data
-from app.utils.pagination import paginate_data
+from app.services.data_service import get_record, find_page, insert_record, replace_record
+from app.services.id_allocator import allocate_id
 from datetime import datetime
 
 @app.route('/api/applications', methods=['POST'])
 def create_application():
-    data = load_data()
     application_data = request.get_json()
     
     # Validate required fields
@@ -16,26 +15,23 @@ def create_application():
             return jsonify({'error': f'Missing required field: {field}'}), 400
     
     # Validate that user exists and is active
-    user = next((user for user in data['users'] if user['userId'] == application_data['userId']), None)
+    user = get_record('users', 'userId', application_data['userId'])
     if not user:
         return jsonify({'error': 'User not found'}), 404
     if user['status'] != 'ACTIVE':
         return jsonify({'error': 'User account is not active'}), 403
     
     # Validate that property and listing exist
-    property_item = next((prop for prop in data['properties'] 
-                         if prop['propertyId'] == application_data['propertyId']), None)
+    property_item = get_record('properties', 'propertyId', application_data['propertyId'])
     if not property_item:
         return jsonify({'error': 'Property not found'}), 404
         
-    listing = next((listing for listing in data.get('property_listings', [])
-                   if listing['listingId'] == application_data['listingId'] and 
-                   listing['propertyId'] == application_data['propertyId']), None)
-    if not listing:
+    listing = get_record('property_listings', 'listingId', application_data['listingId'])
+    if not listing or listing['propertyId'] != application_data['propertyId']:
         return jsonify({'error': 'Listing not found'}), 404
     
     new_application = {
-        'applicationId': str(len(data['applications']) + 1),
+        'applicationId': allocate_id('applications'),
         'userId': application_data['userId'],
         'propertyId': application_data['propertyId'],
         'listingId': application_data['listingId'],
@@ -47,24 +43,20 @@ def create_application():
         'updatedAt': datetime.now().isoformat()
     }
     
-    data['applications'].append(new_application)
+    insert_record('applications', new_application)
     return jsonify(new_application), 201
 
 @app.route('/api/applications', methods=['GET'])
 def get_applications():
-    data = load_data()
     status = request.args.get('status', '').upper()
     user_id = request.args.get('userId')
     property_id = request.args.get('propertyId')
     begin = int(request.args.get('begin', 1))
     count = int(request.args.get('count', 10))
 
-    filtered_applications = [app for app in data['applications']
-                           if (not status or app['status'] == status) and
-                           (not user_id or app['userId'] == user_id) and
-                           (not property_id or app['propertyId'] == property_id)]
-
-    applications_page, total_count = paginate_data(filtered_applications, begin, count)
+    applications_page, total_count = find_page('applications',
+                                               {'status': status, 'userId': user_id, 'propertyId': property_id},
+                                               begin, count)
 
     return jsonify({
         'applications': applications_page,
@@ -75,10 +67,7 @@ def get_applications():
 
 @app.route('/api/applications/<application_id>', methods=['GET'])
 def get_application(application_id):
-    data = load_data()
-    
-    application = next((app for app in data['applications'] 
-                       if app['applicationId'] == application_id), None)
+    application = get_record('applications', 'applicationId', application_id)
     if not application:
         return jsonify({'error': 'Application not found'}), 404
         
@@ -86,11 +75,9 @@ def get_application(application_id):
 
 @app.route('/api/applications/<application_id>', methods=['PATCH'])
 def update_application(application_id):
-    data = load_data()
     update_data = request.get_json()
     
-    application = next((app for app in data['applications'] 
-                       if app['applicationId'] == application_id), None)
+    application = get_record('applications', 'applicationId', application_id)
     if not application:
         return jsonify({'error': 'Application not found'}), 404
     
@@ -108,25 +95,20 @@ def update_application(application_id):
         update_data['status'] = update_data['status'].upper()
     
     # Update allowed fields
-    for key, value in update_data.items():
-        if key in application:
-            application[key] = value
-    
-    application['updatedAt'] = datetime.now().isoformat()
+    changes = {key: value for key, value in update_data.items() if key in application}
+    changes['updatedAt'] = datetime.now().isoformat()
+    application = replace_record('applications', 'applicationId', application_id, changes)
     return jsonify(application)
 
 @app.route('/api/applications/<application_id>', methods=['DELETE'])
 def delete_application(application_id):
-    data = load_data()
-    
-    application = next((app for app in data['applications'] 
-                       if app['applicationId'] == application_id), None)
+    application = get_record('applications', 'applicationId', application_id)
     if not application:
         return jsonify({'error': 'Application not found'}), 404
     
     # Soft delete - update status to withdrawn
-    application['status'] = 'WITHDRAWN'
-    application['updatedAt'] = datetime.now().isoformat()
+    replace_record('applications', 'applicationId', application_id,
+                   {'status': 'WITHDRAWN', 'updatedAt': datetime.now().isoformat()})
     
     return jsonify({'message': 'Application withdrawn successfully'})
 
@@ -143,16 +125,12 @@ def handle_application_documents(application_id):
 
 @app.route('/api/applications/<application_id>/documents', methods=['GET'])
 def get_application_documents(application_id):
-    data = load_data()
     doc_type = request.args.get('type', '').upper()
     begin = int(request.args.get('begin', 1))
     count = int(request.args.get('count', 10))
 
-    filtered_documents = [doc for doc in data['documents']
-                          if doc['applicationId'] == application_id and
-                          (not doc_type or doc['documentType'] == doc_type)]
-
-    documents_page, total_count = paginate_data(filtered_documents, begin, count)
+    documents_page, total_count = find_page('documents', {'applicationId': application_id, 'documentType': doc_type},
+                                            begin, count)
 
     return jsonify({
         'documents': documents_page,
@@ -162,7 +140,6 @@ def get_application_documents(application_id):
     })
 
 def create_application_document(application_id):
-    data = load_data()
     document_data = request.get_json()
     
     # Validate required fields
@@ -177,7 +154,7 @@ def create_application_document(application_id):
         return jsonify({'error': 'Invalid document type'}), 400
         
     new_document = {
-        'documentId': str(len(data.get('documents', [])) + 1),
+        'documentId': allocate_id('documents'),
         'applicationId': application_id,
         'documentType': document_data['documentType'].upper(),
         'documentUrl': document_data['documentUrl'],
@@ -187,25 +164,19 @@ def create_application_document(application_id):
         'updatedAt': datetime.now().isoformat()
     }
     
-    if 'documents' not in data:
-        data['documents'] = []
-    data['documents'].append(new_document)
+    insert_record('documents', new_document)
     
     return jsonify(new_document), 201
 
 def update_application_document(application_id):
-    data = load_data()
     document_id = request.args.get('documentId')
     update_data = request.get_json()
     
     if not document_id:
         return jsonify({'error': 'Document ID is required'}), 400
         
-    document = next((doc for doc in data.get('documents', [])
-                    if doc['documentId'] == document_id and 
-                    doc['applicationId'] == application_id), None)
-                    
-    if not document:
+    document = get_record('documents', 'documentId', document_id)
+    if not document or document['applicationId'] != application_id:
         return jsonify({'error': 'Document not found'}), 404
         
     # Prevent updates to critical fields
@@ -215,29 +186,23 @@ def update_application_document(application_id):
         return jsonify({'error': f'Cannot update protected fields: {invalid_updates}'}), 400
         
     # Update allowed fields
-    for key, value in update_data.items():
-        if key in document:
-            document[key] = value
-            
-    document['updatedAt'] = datetime.now().isoformat()
+    changes = {key: value for key, value in update_data.items() if key in document}
+    changes['updatedAt'] = datetime.now().isoformat()
+    document = replace_record('documents', 'documentId', document_id, changes)
     return jsonify(document)
 
 def delete_application_document(application_id):
-    data = load_data()
     document_id = request.args.get('documentId')
     
     if not document_id:
         return jsonify({'error': 'Document ID is required'}), 400
         
-    document = next((doc for doc in data.get('documents', [])
-                    if doc['documentId'] == document_id and 
-                    doc['applicationId'] == application_id), None)
-                    
-    if not document:
+    document = get_record('documents', 'documentId', document_id)
+    if not document or document['applicationId'] != application_id:
         return jsonify({'error': 'Document not found'}), 404
         
     # Soft delete
-    document['status'] = 'DELETED'
-    document['updatedAt'] = datetime.now().isoformat()
+    replace_record('documents', 'documentId', document_id,
+                   {'status': 'DELETED', 'updatedAt': datetime.now().isoformat()})
     
     return jsonify({'message': 'Document deleted successfully'})
\ No newline at end of file
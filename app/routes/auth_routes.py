@@ -1,12 +1,12 @@
 from flask import request, jsonify
 from app import app
-from app.services.data_service import load_data
-from datetime import datetime, timedelta
-import uuid
+from app.services.data_service import get_record
+from app.services.session_store import create_session as store_session, get_session, end_session, find_user_by_username
+from app.utils.timestamps import parse_timestamp
+from datetime import datetime
 
 @app.route('/api/sessions', methods=['POST'])
 def create_session():
-    data = load_data()
     credentials = request.get_json()
     
     # Validate required fields
@@ -16,8 +16,7 @@ def create_session():
             return jsonify({'error': f'Missing required field: {field}'}), 400
     
     # Find user by username
-    user = next((user for user in data['users'] 
-                 if user['username'] == credentials['username']), None)
+    user = find_user_by_username(credentials['username'])
     
     if not user:
         return jsonify({'error': 'Invalid credentials'}), 401
@@ -31,18 +30,7 @@ def create_session():
         return jsonify({'error': 'Account is not active'}), 403
     
     # Create new session
-    new_session = {
-        'sessionId': str(uuid.uuid4()),
-        'userId': user['userId'],
-        'createdAt': datetime.now().isoformat(),
-        'expiresAt': (datetime.now() + timedelta(hours=24)).isoformat(),
-        'status': 'ACTIVE'
-    }
-    
-    # Add session to data
-    if 'sessions' not in data:
-        data['sessions'] = []
-    data['sessions'].append(new_session)
+    new_session = store_session(user['userId'])
     
     # Create response with user info and session
     response = {
@@ -64,23 +52,16 @@ def create_session():
 
 @app.route('/api/sessions', methods=['DELETE'])
 def delete_session():
-    data = load_data()
     session_id = request.headers.get('X-Session-ID')
     
     if not session_id:
         return jsonify({'error': 'Session ID is required'}), 400
     
-    # Find session
-    session = next((session for session in data.get('sessions', [])
-                   if session['sessionId'] == session_id), None)
-    
+    # Mark session inactive
+    session = end_session(session_id)
     if not session:
         return jsonify({'error': 'Session not found'}), 404
     
-    # Update session status
-    session['status'] = 'INACTIVE'
-    session['updatedAt'] = datetime.now().isoformat()
-    
     return jsonify({'message': 'Session terminated successfully'})
 
 # Helper function to validate session (can be used by other routes)
@@ -88,9 +69,7 @@ def validate_session(session_id):
     if not session_id:
         return None, ('Session ID is required', 400)
         
-    data = load_data()
-    session = next((session for session in data.get('sessions', [])
-                   if session['sessionId'] == session_id), None)
+    session = get_session(session_id)
     
     if not session:
         return None, ('Session not found', 404)
@@ -98,12 +77,14 @@ def validate_session(session_id):
     if session['status'] != 'ACTIVE':
         return None, ('Session is not active', 401)
         
-    if datetime.fromisoformat(session['expiresAt']) < datetime.now():
+    # Sessions without an expiry never expire
+    expires_at = parse_timestamp(session.get('expiresAt'))
+    if expires_at is not None and expires_at < datetime.now():
         session['status'] = 'EXPIRED'
         return None, ('Session has expired', 401)
         
     # Get associated user
-    user = next((user for user in data['users'] if user['userId'] == session['userId']), None)
+    user = get_record('users', 'userId', session['userId'])
     if not user:
         return None, ('Associated user not found', 404)
         
@@ -0,0 +1,72 @@
+from flask import request, jsonify, Response, stream_with_context
+from app import app
+from app.services import event_bus
+import json
+import os
+import time
+
+# Set in the WSGI environ by asgi.py, where an open stream holds a thread of its own
+# pool. serve.py workers handle one request at a time and would be pinned by a
+# client for as long as it listens, so everywhere else the stream is refused.
+STREAMING_ENVIRON_KEY = 'app.event_streams'
+# A stream ends after this long and the browser reconnects with Last-Event-ID, so
+# its thread is not tied up for good
+EVENT_STREAM_SECONDS = float(os.environ.get('EVENT_STREAM_SECONDS', '25'))
+# Comment lines keep proxies from closing an idle stream
+EVENT_HEARTBEAT_SECONDS = 10
+EVENT_RETRY_MILLISECONDS = 1000
+
+
+def format_event(event_id, event_type, data):
+    return f'id: {event_id}\nevent: {event_type}\ndata: {json.dumps(data)}\n\n'
+
+
+def generate_events(collections, parent_id, last_event_id):
+    yield f'retry: {EVENT_RETRY_MILLISECONDS}\n\n'
+    cursor = last_event_id
+    if cursor is None or not event_bus.can_resume(cursor):
+        if cursor is not None:
+            # Missed events are gone; the client should refetch before following again
+            yield format_event(event_bus.latest_id(), 'reset', {})
+        cursor = event_bus.latest_id()
+
+    deadline = time.monotonic() + EVENT_STREAM_SECONDS
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return
+        events = event_bus.wait_for_events(cursor, min(EVENT_HEARTBEAT_SECONDS, remaining))
+        if events is None:
+            cursor = event_bus.latest_id()
+            yield format_event(cursor, 'reset', {})
+            continue
+        chunk = [format_event(event_id, event_type,
+                              {'collection': collection, 'parentId': parent, 'record': record})
+                 for event_id, event_type, collection, parent, record in events
+                 if collection in collections and (parent_id is None or parent == parent_id)]
+        if events:
+            cursor = events[-1][0]
+        yield ''.join(chunk) if chunk else ': keep-alive\n\n'
+
+
+@app.route('/api/events', methods=['GET'])
+def stream_events():
+    if not request.environ.get(STREAMING_ENVIRON_KEY):
+        return jsonify({'error': 'Event streams are only served by asgi.py'}), 503
+
+    collections = set(filter(None, request.args.get('collections', '').split(','))) or set(event_bus.PARENT_FIELDS)
+    unknown = collections - set(event_bus.PARENT_FIELDS)
+    if unknown:
+        return jsonify({'error': f'Unknown collection: {sorted(unknown)[0]}'}), 400
+
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('lastEventId')
+    if last_event_id is not None:
+        if not last_event_id.isdigit():
+            return jsonify({'error': 'Last-Event-ID must be an event id'}), 400
+        last_event_id = int(last_event_id)
+
+    response = Response(stream_with_context(generate_events(collections, request.args.get('parentId'), last_event_id)),
+                        mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
@@ -0,0 +1,61 @@
+from flask import request, jsonify, Response, stream_with_context
+from app import app
+from app.services.data_service import iter_records
+from app.utils.timestamps import parse_timestamp
+import json
+
+EXPORTABLE_COLLECTIONS = [
+    'users', 'properties', 'mediaAssets', 'posts', 'comments', 'reactions',
+    'applications', 'documents', 'tokenActivities', 'profiles'
+]
+
+# Records are buffered into chunks of roughly this many bytes before being flushed
+EXPORT_CHUNK_SIZE = 64 * 1024
+
+
+# Seed records predate the createdAt convention, so fall back to the older field names
+TIMESTAMP_FIELDS = ['createdAt', 'creationDate', 'submissionDate', 'uploadDate', 'date']
+
+
+def record_timestamp(record):
+    for field in TIMESTAMP_FIELDS:
+        if record.get(field):
+            return parse_timestamp(record[field])
+    return None
+
+
+def generate_ndjson(records, since=None):
+    # records is an iterator; only one chunk of lines is held at a time
+    chunk = []
+    chunk_size = 0
+    for record in records:
+        if since:
+            created_at = record_timestamp(record)
+            if created_at is None or created_at < since:
+                continue
+        line = json.dumps(record) + '\n'
+        chunk.append(line)
+        chunk_size += len(line)
+        if chunk_size >= EXPORT_CHUNK_SIZE:
+            yield ''.join(chunk)
+            chunk = []
+            chunk_size = 0
+    if chunk:
+        yield ''.join(chunk)
+
+
+@app.route('/api/export/<collection>', methods=['GET'])
+def export_collection(collection):
+    if collection not in EXPORTABLE_COLLECTIONS:
+        return jsonify({'error': f'Unknown collection: {collection}'}), 404
+
+    since = None
+    if request.args.get('since'):
+        since = parse_timestamp(request.args.get('since'))
+        if since is None:
+            return jsonify({'error': 'since must be an ISO 8601 timestamp'}), 400
+
+    # Read as the response streams: a snapshot of the list in memory, batches from
+    # the store with sqlite or shards, so the export never loads the whole collection
+    return Response(stream_with_context(generate_ndjson(iter_records(collection), since)),
+                    mimetype='application/x-ndjson')
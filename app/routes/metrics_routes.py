@@ -0,0 +1,8 @@
+from flask import Response
+from app import app
+from app.services.metrics import render_prometheus
+
+
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    return Response(render_prometheus(), mimetype='text/plain; version=0.0.4')
@@ -1,12 +1,15 @@
 from flask import request, jsonify
 from app import app
-from app.services.data_service import load_data
+from app.services.data_service import get_many, get_record, find_page, insert_record, replace_record, record_locks, data_lock, journal_batch
+from app.services.id_allocator import allocate_id
+from app.services.view_counter import record_view, live_view_count
+from app.services.reaction_index import REACTION_TYPES, get_reaction, get_post_reactions, get_reaction_summary, add_reaction, remove_reaction
 from app.utils.pagination import paginate_data
+from app.utils.batch import parse_ids, get_bulk_items, bulk_summary, MAX_BATCH_SIZE
 from datetime import datetime
 
 @app.route('/api/posts', methods=['POST'])
 def create_post():
-    data = load_data()
     post_data = request.get_json()
     
     # Validate required fields
@@ -21,7 +24,7 @@ def create_post():
         return jsonify({'error': 'Invalid post type'}), 400
     
     # Validate that user exists
-    user = next((user for user in data['users'] if user['userId'] == post_data['userId']), None)
+    user = get_record('users', 'userId', post_data['userId'])
     if not user:
         return jsonify({'error': 'User not found'}), 404
         
@@ -30,7 +33,7 @@ def create_post():
         return jsonify({'error': 'User account is not active'}), 403
     
     new_post = {
-        'postId': str(len(data['posts']) + 1),
+        'postId': allocate_id('posts'),
         'userId': post_data['userId'],
         'title': post_data['title'],
         'content': post_data['content'],
@@ -44,32 +47,27 @@ def create_post():
         'reactionCount': 0
     }
     
-    data['posts'].append(new_post)
+    insert_record('posts', new_post)
     # In a real application, you would save to database here
     
     return jsonify(new_post), 201
 
 @app.route('/api/posts/<post_id>', methods=['GET'])
 def get_post(post_id):
-    data = load_data()
-    
-    post = next((post for post in data['posts'] 
-                 if post['postId'] == post_id), None)
+    post = get_record('posts', 'postId', post_id)
     if not post:
         return jsonify({'error': 'Post not found'}), 404
     
-    # Increment view count
-    post['viewCount'] += 1
+    # Buffer the view; it is folded into the stored post by the background flusher
+    record_view(post_id)
         
-    return jsonify(post)
+    return jsonify({**post, 'viewCount': live_view_count(post)})
 
 @app.route('/api/posts/<post_id>', methods=['PATCH'])
 def update_post(post_id):
-    data = load_data()
     update_data = request.get_json()
     
-    post = next((post for post in data['posts'] 
-                 if post['postId'] == post_id), None)
+    post = get_record('posts', 'postId', post_id)
     if not post:
         return jsonify({'error': 'Post not found'}), 404
     
@@ -87,21 +85,16 @@ def update_post(post_id):
         update_data['postType'] = update_data['postType'].upper()
     
     # Update allowed fields
-    for key, value in update_data.items():
-        if key in post:
-            post[key] = value
-    
-    post['updatedAt'] = datetime.now().isoformat()
+    changes = {key: value for key, value in update_data.items() if key in post}
+    changes['updatedAt'] = datetime.now().isoformat()
+    post = replace_record('posts', 'postId', post_id, changes)
     # In a real application, you would save to database here
     
     return jsonify(post)
 
 @app.route('/api/posts/<post_id>', methods=['DELETE'])
 def delete_post(post_id):
-    data = load_data()
-    
-    post = next((post for post in data['posts'] 
-                 if post['postId'] == post_id), None)
+    post = get_record('posts', 'postId', post_id)
     if not post:
         return jsonify({'error': 'Post not found'}), 404
     
@@ -110,19 +103,16 @@ def delete_post(post_id):
         return jsonify({'error': 'Post is already deleted'}), 400
     
     # Soft delete - update status to deleted
-    post['status'] = 'DELETED'
-    post['updatedAt'] = datetime.now().isoformat()
+    replace_record('posts', 'postId', post_id,
+                   {'status': 'DELETED', 'updatedAt': datetime.now().isoformat()})
     # In a real application, you would save to database here
     
     return jsonify({'message': 'Post deleted successfully'})
 
 @app.route('/api/posts/<post_id>/comments', methods=['POST', 'GET', 'PATCH', 'DELETE'])
 def handle_post_comments(post_id):
-    data = load_data()
-    
     # Check if post exists
-    post = next((post for post in data['posts'] 
-                 if post['postId'] == post_id), None)
+    post = get_record('posts', 'postId', post_id)
     if not post:
         return jsonify({'error': 'Post not found'}), 404
         
@@ -134,10 +124,7 @@ def handle_post_comments(post_id):
         begin = int(request.args.get('begin', 1))
         count = int(request.args.get('count', 10))
 
-        filtered_comments = [comment for comment in data['comments']
-                           if comment['postId'] == post_id and comment['status'] == 'ACTIVE']
-
-        comments_page, total_count = paginate_data(filtered_comments, begin, count)
+        comments_page, total_count = find_page('comments', {'postId': post_id, 'status': 'ACTIVE'}, begin, count)
 
         return jsonify({
             'comments': comments_page,
@@ -156,14 +143,14 @@ def handle_post_comments(post_id):
                 return jsonify({'error': f'Missing required field: {field}'}), 400
                 
         # Validate that user exists and is active
-        user = next((user for user in data['users'] if user['userId'] == comment_data['userId']), None)
+        user = get_record('users', 'userId', comment_data['userId'])
         if not user:
             return jsonify({'error': 'User not found'}), 404
         if user['status'] != 'ACTIVE':
             return jsonify({'error': 'User account is not active'}), 403
         
         new_comment = {
-            'commentId': str(len(data['comments']) + 1),
+            'commentId': allocate_id('comments'),
             'postId': post_id,
             'userId': comment_data['userId'],
             'content': comment_data['content'],
@@ -172,19 +159,69 @@ def handle_post_comments(post_id):
             'updatedAt': datetime.now().isoformat()
         }
         
-        data['comments'].append(new_comment)
-        post['commentCount'] += 1
+        insert_record('comments', new_comment)
+        replace_record('posts', 'postId', post_id,
+                       lambda current: {'commentCount': current['commentCount'] + 1})
         # In a real application, you would save to database here
         
         return jsonify(new_comment), 201
 
+@app.route('/api/posts/<post_id>/comments/bulk', methods=['POST'])
+def create_post_comments_bulk(post_id):
+    post = get_record('posts', 'postId', post_id)
+    if not post:
+        return jsonify({'error': 'Post not found'}), 404
+    if post['status'] == 'DELETED':
+        return jsonify({'error': 'Cannot interact with deleted post'}), 400
+    
+    items, error = get_bulk_items(request.get_json())
+    if error:
+        return jsonify({'error': error}), 400
+    
+    # Validate every item up front so only well-formed items reach the lock
+    user_ids = [item['userId'] for item in items if isinstance(item, dict) and 'userId' in item]
+    users = {user['userId']: user for user in get_many('users', 'userId', user_ids)[0]}
+    results = [None] * len(items)
+    pending = []
+    for index, item in enumerate(items):
+        missing = [field for field in ['userId', 'content'] if not isinstance(item, dict) or field not in item]
+        if missing:
+            results[index] = {'index': index, 'status': 400, 'error': f'Missing required field: {missing[0]}'}
+            continue
+        user = users.get(item['userId'])
+        if not user:
+            results[index] = {'index': index, 'status': 404, 'error': 'User not found'}
+            continue
+        if user['status'] != 'ACTIVE':
+            results[index] = {'index': index, 'status': 403, 'error': 'User account is not active'}
+            continue
+        pending.append((index, item))
+    
+    with record_locks('posts', [post_id]), data_lock, journal_batch():
+        added = 0
+        for index, item in pending:
+            new_comment = {
+                'commentId': allocate_id('comments'),
+                'postId': post_id,
+                'userId': item['userId'],
+                'content': item['content'],
+                'status': 'ACTIVE',
+                'createdAt': datetime.now().isoformat(),
+                'updatedAt': datetime.now().isoformat()
+            }
+            insert_record('comments', new_comment)
+            added += 1
+            results[index] = {'index': index, 'status': 201, 'comment': new_comment}
+        if added:
+            replace_record('posts', 'postId', post_id,
+                           lambda current: {'commentCount': current['commentCount'] + added})
+    
+    return jsonify(bulk_summary(results))
+
 @app.route('/api/posts/<post_id>/reactions', methods=['POST', 'GET', 'DELETE'])
 def handle_post_reactions(post_id):
-    data = load_data()
-    
     # Check if post exists
-    post = next((post for post in data['posts'] 
-                 if post['postId'] == post_id), None)
+    post = get_record('posts', 'postId', post_id)
     if not post:
         return jsonify({'error': 'Post not found'}), 404
         
@@ -193,13 +230,19 @@ def handle_post_reactions(post_id):
         return jsonify({'error': 'Cannot interact with deleted post'}), 400
 
     if request.method == 'GET':
+        if request.args.get('summary', '').lower() == 'true':
+            return jsonify({
+                'postId': post_id,
+                'reactionCount': post['reactionCount'],
+                'reactionSummary': get_reaction_summary(post_id)
+            })
+
         reaction_type = request.args.get('type', '').upper()
         begin = int(request.args.get('begin', 1))
         count = int(request.args.get('count', 10))
 
-        filtered_reactions = [reaction for reaction in data['reactions']
-                            if reaction['postId'] == post_id and
-                            (not reaction_type or reaction['reactionType'] == reaction_type)]
+        filtered_reactions = [reaction for reaction in get_post_reactions(post_id)
+                            if not reaction_type or reaction['reactionType'] == reaction_type]
 
         reactions_page, total_count = paginate_data(filtered_reactions, begin, count)
 
@@ -220,34 +263,31 @@ def handle_post_reactions(post_id):
                 return jsonify({'error': f'Missing required field: {field}'}), 400
         
         # Validate reaction type
-        valid_types = ['LIKE', 'LOVE', 'HELPFUL', 'INSIGHTFUL']
-        if reaction_data['reactionType'].upper() not in valid_types:
+        if reaction_data['reactionType'].upper() not in REACTION_TYPES:
             return jsonify({'error': 'Invalid reaction type'}), 400
             
         # Validate that user exists and is active
-        user = next((user for user in data['users'] if user['userId'] == reaction_data['userId']), None)
+        user = get_record('users', 'userId', reaction_data['userId'])
         if not user:
             return jsonify({'error': 'User not found'}), 404
         if user['status'] != 'ACTIVE':
             return jsonify({'error': 'User account is not active'}), 403
         
         # Check for existing reaction from same user
-        existing_reaction = next((reaction for reaction in data['reactions']
-                                if reaction['postId'] == post_id and
-                                reaction['userId'] == reaction_data['userId']), None)
-        if existing_reaction:
+        if get_reaction(post_id, reaction_data['userId']):
             return jsonify({'error': 'User has already reacted to this post'}), 400
         
         new_reaction = {
-            'reactionId': str(len(data['reactions']) + 1),
+            'reactionId': allocate_id('reactions'),
             'postId': post_id,
             'userId': reaction_data['userId'],
             'reactionType': reaction_data['reactionType'].upper(),
             'createdAt': datetime.now().isoformat()
         }
         
-        data['reactions'].append(new_reaction)
-        post['reactionCount'] += 1
+        # Re-checked under the index lock in case a concurrent request got there first
+        if not add_reaction(post, new_reaction):
+            return jsonify({'error': 'User has already reacted to this post'}), 400
         # In a real application, you would save to database here
         
         return jsonify(new_reaction), 201
@@ -258,38 +298,36 @@ def handle_post_reactions(post_id):
             return jsonify({'error': 'userId is required'}), 400
             
         # Validate that user exists and is active
-        user = next((user for user in data['users'] if user['userId'] == user_id), None)
+        user = get_record('users', 'userId', user_id)
         if not user:
             return jsonify({'error': 'User not found'}), 404
         if user['status'] != 'ACTIVE':
             return jsonify({'error': 'User account is not active'}), 403
         
-        reaction = next((reaction for reaction in data['reactions']
-                        if reaction['postId'] == post_id and
-                        reaction['userId'] == user_id), None)
-        if not reaction:
-            return jsonify({'error': 'Reaction not found'}), 404
-        
         # Remove reaction
-        data['reactions'].remove(reaction)
-        post['reactionCount'] -= 1
+        if not remove_reaction(post, user_id):
+            return jsonify({'error': 'Reaction not found'}), 404
         # In a real application, you would save to database here
         
         return jsonify({'message': 'Reaction removed successfully'})
 
 @app.route('/api/posts', methods=['GET'])
 def get_posts():
-    data = load_data()
+    if 'ids' in request.args:
+        ids = parse_ids(request.args.get('ids'))
+        if ids is None:
+            return jsonify({'error': f'Cannot request more than {MAX_BATCH_SIZE} ids'}), 400
+        if not ids:
+            return jsonify({'error': 'ids must contain at least one id'}), 400
+        posts, missing = get_many('posts', 'postId', ids)
+        return jsonify({'posts': posts, 'notFound': missing})
+
     status = request.args.get('status', '').upper()
     post_type = request.args.get('postType', '').upper()
     begin = int(request.args.get('begin', 1))
     count = int(request.args.get('count', 10))
 
-    filtered_posts = [post for post in data['posts']
-                     if (not status or post['status'] == status) and
-                     (not post_type or post['postType'] == post_type)]
-
-    posts_page, total_count = paginate_data(filtered_posts, begin, count)
+    posts_page, total_count = find_page('posts', {'status': status, 'postType': post_type}, begin, count)
 
     return jsonify({
         'posts': posts_page,
@@ -1,12 +1,12 @@
 from flask import request, jsonify
 from app import app
-from app.services.data_service import load_data
-from app.utils.pagination import paginate_data
+from app.services.data_service import get_many, get_record, find_page, find_records, insert_record, delete_record, replace_record, data_lock, journal_batch
+from app.services.id_allocator import allocate_id
+from app.utils.batch import parse_ids, get_bulk_items, bulk_summary, MAX_BATCH_SIZE
 from datetime import datetime
 
 @app.route('/api/properties', methods=['POST'])
 def create_property():
-    data = load_data()
     property_data = request.get_json()
     
     # Validate required fields
@@ -26,7 +26,7 @@ def create_property():
         return jsonify({'error': 'Invalid property type'}), 400
     
     new_property = {
-        'propertyId': str(len(data['properties']) + 1),
+        'propertyId': allocate_id('properties'),
         'landlordId': property_data['landlordId'],
         'propertyName': property_data['propertyName'],
         'address': property_data['address'],
@@ -38,24 +38,29 @@ def create_property():
         'updatedAt': datetime.now().isoformat()
     }
     
-    data['properties'].append(new_property)
+    insert_record('properties', new_property)
     # In a real application, you would save to database here
     
     return jsonify(new_property), 201
 
 @app.route('/api/properties', methods=['GET'])
 def get_properties():
-    data = load_data()
+    if 'ids' in request.args:
+        ids = parse_ids(request.args.get('ids'))
+        if ids is None:
+            return jsonify({'error': f'Cannot request more than {MAX_BATCH_SIZE} ids'}), 400
+        if not ids:
+            return jsonify({'error': 'ids must contain at least one id'}), 400
+        properties, missing = get_many('properties', 'propertyId', ids)
+        return jsonify({'properties': properties, 'notFound': missing})
+
     status = request.args.get('status', '').upper()
     property_type = request.args.get('propertyType', '').upper()
     begin = int(request.args.get('begin', 1))
     count = int(request.args.get('count', 10))
 
-    filtered_properties = [prop for prop in data['properties']
-                         if (not status or prop['status'] == status) and
-                         (not property_type or prop['propertyType'] == property_type)]
-
-    properties_page, total_count = paginate_data(filtered_properties, begin, count)
+    properties_page, total_count = find_page('properties', {'status': status, 'propertyType': property_type},
+                                             begin, count)
 
     return jsonify({
         'properties': properties_page,
@@ -66,10 +71,7 @@ def get_properties():
 
 @app.route('/api/properties/<property_id>', methods=['GET'])
 def get_property(property_id):
-    data = load_data()
-    
-    property_item = next((prop for prop in data['properties'] 
-                         if prop['propertyId'] == property_id), None)
+    property_item = get_record('properties', 'propertyId', property_id)
     if not property_item:
         return jsonify({'error': 'Property not found'}), 404
         
@@ -77,11 +79,9 @@ def get_property(property_id):
 
 @app.route('/api/properties/<property_id>', methods=['PATCH'])
 def update_property(property_id):
-    data = load_data()
     update_data = request.get_json()
     
-    property_item = next((prop for prop in data['properties'] 
-                         if prop['propertyId'] == property_id), None)
+    property_item = get_record('properties', 'propertyId', property_id)
     if not property_item:
         return jsonify({'error': 'Property not found'}), 404
     
@@ -92,44 +92,35 @@ def update_property(property_id):
         return jsonify({'error': f'Cannot update protected fields: {invalid_updates}'}), 400
     
     # Update allowed fields
-    for key, value in update_data.items():
-        if key in property_item:
-            property_item[key] = value
-    
-    property_item['updatedAt'] = datetime.now().isoformat()
+    changes = {key: value for key, value in update_data.items() if key in property_item}
+    changes['updatedAt'] = datetime.now().isoformat()
+    property_item = replace_record('properties', 'propertyId', property_id, changes)
     # In a real application, you would save to database here
     
     return jsonify(property_item)
 
 @app.route('/api/properties/<property_id>', methods=['DELETE'])
 def delete_property(property_id):
-    data = load_data()
-    
-    property_item = next((prop for prop in data['properties'] 
-                         if prop['propertyId'] == property_id), None)
+    property_item = get_record('properties', 'propertyId', property_id)
     if not property_item:
         return jsonify({'error': 'Property not found'}), 404
     
     # Soft delete - update status to unavailable
-    property_item['status'] = 'UNAVAILABLE'
-    property_item['updatedAt'] = datetime.now().isoformat()
+    replace_record('properties', 'propertyId', property_id,
+                   {'status': 'UNAVAILABLE', 'updatedAt': datetime.now().isoformat()})
     # In a real application, you would save to database here
     
     return jsonify({'message': 'Property marked as unavailable'})
 
 @app.route('/api/properties/<property_id>/details', methods=['POST', 'GET', 'PATCH'])
 def handle_property_details(property_id):
-    data = load_data()
-    
     # Check if property exists
-    property_item = next((prop for prop in data['properties'] 
-                         if prop['propertyId'] == property_id), None)
+    property_item = get_record('properties', 'propertyId', property_id)
     if not property_item:
         return jsonify({'error': 'Property not found'}), 404
 
     if request.method == 'GET':
-        details = next((detail for detail in data.get('property_details', [])
-                       if detail['propertyId'] == property_id), None)
+        details = get_record('property_details', 'propertyId', property_id)
         if not details:
             return jsonify({'error': 'Property details not found'}), 404
         return jsonify(details)
@@ -138,11 +129,11 @@ def handle_property_details(property_id):
         details_data = request.get_json()
         
         # Check if details already exist
-        if any(detail['propertyId'] == property_id for detail in data.get('property_details', [])):
+        if get_record('property_details', 'propertyId', property_id) is not None:
             return jsonify({'error': 'Property details already exist'}), 400
             
         new_details = {
-            'detailsId': str(len(data.get('property_details', [])) + 1),
+            'detailsId': allocate_id('property_details'),
             'propertyId': property_id,
             'amenities': details_data.get('amenities', []),
             'rules': details_data.get('rules', []),
@@ -152,46 +143,38 @@ def handle_property_details(property_id):
             'updatedAt': datetime.now().isoformat()
         }
         
-        if 'property_details' not in data:
-            data['property_details'] = []
-        data['property_details'].append(new_details)
+        insert_record('property_details', new_details)
         return jsonify(new_details), 201
 
     elif request.method == 'PATCH':
         update_data = request.get_json()
-        details = next((detail for detail in data.get('property_details', [])
-                       if detail['propertyId'] == property_id), None)
+        details = get_record('property_details', 'propertyId', property_id)
         if not details:
             return jsonify({'error': 'Property details not found'}), 404
             
         # Update allowed fields
-        for key, value in update_data.items():
-            if key not in ['detailsId', 'propertyId', 'createdAt']:
-                details[key] = value
-                
-        details['updatedAt'] = datetime.now().isoformat()
+        changes = {key: value for key, value in update_data.items()
+                   if key not in ['detailsId', 'propertyId', 'createdAt']}
+        changes['updatedAt'] = datetime.now().isoformat()
+        details = replace_record('property_details', 'detailsId', details['detailsId'], changes)
         return jsonify(details)
 
 @app.route('/api/properties/<property_id>/media', methods=['POST', 'GET', 'DELETE'])
 def handle_property_media(property_id):
-    data = load_data()
-    
     # Check if property exists
-    property_item = next((prop for prop in data['properties'] 
-                         if prop['propertyId'] == property_id), None)
+    property_item = get_record('properties', 'propertyId', property_id)
     if not property_item:
         return jsonify({'error': 'Property not found'}), 404
 
     if request.method == 'GET':
-        media_items = [media for media in data.get('property_media', [])
-                      if media['propertyId'] == property_id]
+        media_items = find_records('property_media', {'propertyId': property_id})
         return jsonify({'media': media_items})
 
     elif request.method == 'POST':
         media_data = request.get_json()
         
         new_media = {
-            'mediaId': str(len(data.get('property_media', [])) + 1),
+            'mediaId': allocate_id('property_media'),
             'propertyId': property_id,
             'type': media_data.get('type', 'IMAGE'),
             'url': media_data['url'],
@@ -200,9 +183,7 @@ def handle_property_media(property_id):
             'createdAt': datetime.now().isoformat()
         }
         
-        if 'property_media' not in data:
-            data['property_media'] = []
-        data['property_media'].append(new_media)
+        insert_record('property_media', new_media)
         return jsonify(new_media), 201
 
     elif request.method == 'DELETE':
@@ -210,35 +191,62 @@ def handle_property_media(property_id):
         if not media_id:
             return jsonify({'error': 'Media ID is required'}), 400
             
-        media_list = data.get('property_media', [])
-        media_item = next((media for media in media_list 
-                          if media['mediaId'] == media_id and media['propertyId'] == property_id), None)
-        if not media_item:
+        media_item = get_record('property_media', 'mediaId', media_id)
+        if not media_item or media_item['propertyId'] != property_id:
             return jsonify({'error': 'Media not found'}), 404
             
-        media_list.remove(media_item)
+        delete_record('property_media', 'mediaId', media_id)
         return jsonify({'message': 'Media deleted successfully'})
 
+@app.route('/api/properties/<property_id>/media/bulk', methods=['POST'])
+def create_property_media_bulk(property_id):
+    if get_record('properties', 'propertyId', property_id) is None:
+        return jsonify({'error': 'Property not found'}), 404
+    
+    items, error = get_bulk_items(request.get_json())
+    if error:
+        return jsonify({'error': error}), 400
+    
+    results = [None] * len(items)
+    pending = []
+    for index, item in enumerate(items):
+        if not isinstance(item, dict) or 'url' not in item:
+            results[index] = {'index': index, 'status': 400, 'error': 'Missing required field: url'}
+            continue
+        pending.append((index, item))
+    
+    with data_lock, journal_batch():
+        for index, item in pending:
+            new_media = {
+                'mediaId': allocate_id('property_media'),
+                'propertyId': property_id,
+                'type': item.get('type', 'IMAGE'),
+                'url': item['url'],
+                'caption': item.get('caption', ''),
+                'isPrimary': item.get('isPrimary', False),
+                'createdAt': datetime.now().isoformat()
+            }
+            insert_record('property_media', new_media)
+            results[index] = {'index': index, 'status': 201, 'media': new_media}
+    
+    return jsonify(bulk_summary(results))
+
 @app.route('/api/properties/<property_id>/listings', methods=['POST', 'GET', 'PATCH', 'DELETE'])
 def handle_property_listings(property_id):
-    data = load_data()
-    
     # Check if property exists
-    property_item = next((prop for prop in data['properties'] 
-                         if prop['propertyId'] == property_id), None)
+    property_item = get_record('properties', 'propertyId', property_id)
     if not property_item:
         return jsonify({'error': 'Property not found'}), 404
 
     if request.method == 'GET':
-        listings = [listing for listing in data.get('property_listings', [])
-                   if listing['propertyId'] == property_id]
+        listings = find_records('property_listings', {'propertyId': property_id})
         return jsonify({'listings': listings})
 
     elif request.method == 'POST':
         listing_data = request.get_json()
         
         new_listing = {
-            'listingId': str(len(data.get('property_listings', [])) + 1),
+            'listingId': allocate_id('property_listings'),
             'propertyId': property_id,
             'title': listing_data['title'],
             'description': listing_data['description'],
@@ -250,9 +258,7 @@ def handle_property_listings(property_id):
             'updatedAt': datetime.now().isoformat()
         }
         
-        if 'property_listings' not in data:
-            data['property_listings'] = []
-        data['property_listings'].append(new_listing)
+        insert_record('property_listings', new_listing)
         return jsonify(new_listing), 201
 
     elif request.method == 'PATCH':
@@ -261,17 +267,15 @@ def handle_property_listings(property_id):
             return jsonify({'error': 'Listing ID is required'}), 400
             
         update_data = request.get_json()
-        listing = next((listing for listing in data.get('property_listings', [])
-                       if listing['listingId'] == listing_id and listing['propertyId'] == property_id), None)
-        if not listing:
+        listing = get_record('property_listings', 'listingId', listing_id)
+        if not listing or listing['propertyId'] != property_id:
             return jsonify({'error': 'Listing not found'}), 404
             
         # Update allowed fields
-        for key, value in update_data.items():
-            if key not in ['listingId', 'propertyId', 'createdAt']:
-                listing[key] = value
-                
-        listing['updatedAt'] = datetime.now().isoformat()
+        changes = {key: value for key, value in update_data.items()
+                   if key not in ['listingId', 'propertyId', 'createdAt']}
+        changes['updatedAt'] = datetime.now().isoformat()
+        listing = replace_record('property_listings', 'listingId', listing_id, changes)
         return jsonify(listing)
 
     elif request.method == 'DELETE':
@@ -279,23 +283,19 @@ def handle_property_listings(property_id):
         if not listing_id:
             return jsonify({'error': 'Listing ID is required'}), 400
             
-        listing = next((listing for listing in data.get('property_listings', [])
-                       if listing['listingId'] == listing_id and listing['propertyId'] == property_id), None)
-        if not listing:
+        listing = get_record('property_listings', 'listingId', listing_id)
+        if not listing or listing['propertyId'] != property_id:
             return jsonify({'error': 'Listing not found'}), 404
             
-        listing['status'] = 'INACTIVE'
-        listing['updatedAt'] = datetime.now().isoformat()
+        replace_record('property_listings', 'listingId', listing_id,
+                       {'status': 'INACTIVE', 'updatedAt': datetime.now().isoformat()})
         return jsonify({'message': 'Listing deactivated successfully'})
 
 @app.route('/api/users/<user_id>/properties', methods=['GET'])
 def get_landlord_properties(user_id):
-    data = load_data()
-    
     # Verify user exists and is a landlord
-    user = next((user for user in data['users'] 
-                 if user['userId'] == user_id and user['role'] == 'LANDLORD'), None)
-    if not user:
+    user = get_record('users', 'userId', user_id)
+    if not user or user['role'] != 'LANDLORD':
         return jsonify({'error': 'Landlord not found'}), 404
         
     # Get status filter from query params
@@ -303,13 +303,8 @@ def get_landlord_properties(user_id):
     begin = int(request.args.get('begin', 1))
     count = int(request.args.get('count', 10))
 
-    # Filter properties by landlord and status if provided
-    filtered_properties = [prop for prop in data['properties']
-                         if prop['landlordId'] == user_id and
-                         (not status or prop['status'] == status)]
-
-    # Paginate results
-    properties_page, total_count = paginate_data(filtered_properties, begin, count)
+    # Filter properties by landlord and status if provided, then paginate
+    properties_page, total_count = find_page('properties', {'landlordId': user_id, 'status': status}, begin, count)
 
     return jsonify({
         'properties': properties_page,
@@ -320,17 +315,13 @@ def get_landlord_properties(user_id):
 
 @app.route('/api/properties/<property_id>/reviews', methods=['POST', 'GET'])
 def handle_property_reviews(property_id):
-    data = load_data()
-    
     # Check if property exists
-    property_item = next((prop for prop in data['properties'] 
-                         if prop['propertyId'] == property_id), None)
+    property_item = get_record('properties', 'propertyId', property_id)
     if not property_item:
         return jsonify({'error': 'Property not found'}), 404
 
     if request.method == 'GET':
-        reviews = [review for review in data.get('property_reviews', [])
-                  if review['propertyId'] == property_id]
+        reviews = find_records('property_reviews', {'propertyId': property_id})
         return jsonify({'reviews': reviews})
 
     elif request.method == 'POST':
@@ -341,7 +332,7 @@ def handle_property_reviews(property_id):
             return jsonify({'error': 'Missing required fields'}), 400
             
         new_review = {
-            'reviewId': str(len(data.get('property_reviews', [])) + 1),
+            'reviewId': allocate_id('property_reviews'),
             'propertyId': property_id,
             'userId': review_data['userId'],
             'rating': review_data['rating'],
@@ -350,24 +341,18 @@ def handle_property_reviews(property_id):
             'status': 'ACTIVE'
         }
         
-        if 'property_reviews' not in data:
-            data['property_reviews'] = []
-        data['property_reviews'].append(new_review)
+        insert_record('property_reviews', new_review)
         return jsonify(new_review), 201
 
 @app.route('/api/properties/<property_id>/amenities', methods=['GET', 'POST', 'PATCH'])
 def handle_property_amenities(property_id):
-    data = load_data()
-    
     # Check if property exists
-    property_item = next((prop for prop in data['properties'] 
-                         if prop['propertyId'] == property_id), None)
+    property_item = get_record('properties', 'propertyId', property_id)
     if not property_item:
         return jsonify({'error': 'Property not found'}), 404
 
     if request.method == 'GET':
-        amenities = next((amenity for amenity in data.get('property_amenities', [])
-                         if amenity['propertyId'] == property_id), None)
+        amenities = get_record('property_amenities', 'propertyId', property_id)
         if not amenities:
             return jsonify({'error': 'Amenities not found'}), 404
         return jsonify(amenities)
@@ -376,7 +361,7 @@ def handle_property_amenities(property_id):
         amenities_data = request.get_json()
         
         new_amenities = {
-            'amenityId': str(len(data.get('property_amenities', [])) + 1),
+            'amenityId': allocate_id('property_amenities'),
             'propertyId': property_id,
             'features': amenities_data.get('features', []),
             'utilities': amenities_data.get('utilities', []),
@@ -385,21 +370,17 @@ def handle_property_amenities(property_id):
             'updatedAt': datetime.now().isoformat()
         }
         
-        if 'property_amenities' not in data:
-            data['property_amenities'] = []
-        data['property_amenities'].append(new_amenities)
+        insert_record('property_amenities', new_amenities)
         return jsonify(new_amenities), 201
 
     elif request.method == 'PATCH':
         update_data = request.get_json()
-        amenities = next((amenity for amenity in data.get('property_amenities', [])
-                         if amenity['propertyId'] == property_id), None)
+        amenities = get_record('property_amenities', 'propertyId', property_id)
         if not amenities:
             return jsonify({'error': 'Amenities not found'}), 404
             
-        for key, value in update_data.items():
-            if key not in ['amenityId', 'propertyId', 'createdAt']:
-                amenities[key] = value
-                
-        amenities['updatedAt'] = datetime.now().isoformat()
+        changes = {key: value for key, value in update_data.items()
+                   if key not in ['amenityId', 'propertyId', 'createdAt']}
+        changes['updatedAt'] = datetime.now().isoformat()
+        amenities = replace_record('property_amenities', 'amenityId', amenities['amenityId'], changes)
         return jsonify(amenities)
\ No newline at end of file
@@ -0,0 +1,229 @@
+from flask import request, jsonify
+from app import app
+from app.services.data_service import get_many, get_record, find_page, insert_record, replace_record
+from app.services.id_allocator import allocate_id
+from app.services.feed_service import get_feed_page
+from app.utils.timestamps import parse_timestamp
+from app.utils.batch import parse_ids, MAX_BATCH_SIZE
+from datetime import datetime
+import json
+
+@app.route('/api/users', methods=['GET'])
+def get_users():
+    if 'ids' in request.args:
+        ids = parse_ids(request.args.get('ids'))
+        if ids is None:
+            return jsonify({'error': f'Cannot request more than {MAX_BATCH_SIZE} ids'}), 400
+        if not ids:
+            return jsonify({'error': 'ids must contain at least one id'}), 400
+        users, missing = get_many('users', 'userId', ids)
+        return jsonify({'users': users, 'notFound': missing})
+
+    role = request.args.get('role', '').upper()
+    begin = int(request.args.get('begin', 1))
+    count = int(request.args.get('count', 10))
+
+    users_page, total_count = find_page('users', {'role': role}, begin, count)
+
+    return jsonify({
+        'users': users_page,
+        'totalCount': total_count,
+        'currentPage': begin,
+        'pageSize': count
+    })
+
+@app.route('/api/users', methods=['POST'])
+def create_user():
+    user_data = request.get_json()
+    
+    # Validate required fields
+    required_fields = ['username', 'password', 'role', 'firstName', 'lastName', 'email', 'phoneNumber']
+    for field in required_fields:
+        if field not in user_data:
+            return jsonify({'error': f'Missing required field: {field}'}), 400
+    
+    # Set default values for new user
+    new_user = {
+        'userId': allocate_id('users'),
+        'username': user_data['username'],
+        'password': user_data['password'],  # Note: Should be hashed in production
+        'role': user_data['role'].upper(),
+        'isVerified': False,
+        'firstName': user_data['firstName'],
+        'lastName': user_data['lastName'],
+        'email': user_data['email'],
+        'phoneNumber': user_data['phoneNumber'],
+        'campusAffiliation': user_data.get('campusAffiliation'),
+        'profilePictureUrl': user_data.get('profilePictureUrl'),
+        'createdAt': datetime.now().isoformat(),
+        'lastLogin': None,
+        'status': 'ACTIVE',
+        'tokenBalance': 0
+    }
+    
+    # Validate role
+    valid_roles = ['STUDENT', 'ALUMNI', 'LANDLORD', 'ADMIN']
+    if new_user['role'] not in valid_roles:
+        return jsonify({'error': 'Invalid role specified'}), 400
+    
+    insert_record('users', new_user)
+    # In a real application, you would save to database here
+    
+    return jsonify(new_user), 201
+
+@app.route('/api/users/<user_id>', methods=['GET'])
+def get_user(user_id):
+    user = get_record('users', 'userId', user_id)
+    if not user:
+        return jsonify({'error': 'User not found'}), 404
+        
+    return jsonify(user)
+
+@app.route('/api/users/<user_id>', methods=['PATCH'])
+def update_user(user_id):
+    try:
+        update_data = request.get_json()
+        
+        user = get_record('users', 'userId', user_id)
+        if not user:
+            return jsonify({'error': 'User not found'}), 404
+        
+        # Prevent updates to critical fields
+        protected_fields = ['userId', 'createdAt', 'role']
+        invalid_updates = [field for field in update_data if field in protected_fields]
+        if invalid_updates:
+            return jsonify({'error': f'Cannot update protected fields: {invalid_updates}'}), 400
+        
+        # Update allowed fields and add last modified timestamp
+        changes = {key: value for key, value in update_data.items() if key in user}
+        changes['updatedAt'] = datetime.now().isoformat()
+        user = replace_record('users', 'userId', user_id, changes)
+        
+        return jsonify(user)
+    except json.JSONDecodeError:
+        return jsonify({'error': 'Invalid JSON format in request body'}), 400
+
+@app.route('/api/users/<user_id>', methods=['DELETE'])
+def delete_user(user_id):
+    user = get_record('users', 'userId', user_id)
+    if not user:
+        return jsonify({'error': 'User not found'}), 404
+    
+    # Soft delete - update status to inactive
+    replace_record('users', 'userId', user_id, {'status': 'INACTIVE'})
+    # In a real application, you would save to database here
+    
+    return jsonify({'message': 'User deactivated successfully'})
+
+@app.route('/api/users/<user_id>/follows', methods=['PUT'])
+def set_user_follows(user_id):
+    follow_data = request.get_json()
+
+    user = get_record('users', 'userId', user_id)
+    if not user:
+        return jsonify({'error': 'User not found'}), 404
+
+    tags = follow_data.get('tags', [])
+    landlords = follow_data.get('landlords', [])
+    for field, values in (('tags', tags), ('landlords', landlords)):
+        if not isinstance(values, list) or not all(isinstance(value, str) for value in values):
+            return jsonify({'error': f'{field} must be a list of strings'}), 400
+
+    # Only landlords can be followed by id
+    found, missing = get_many('users', 'userId', list(dict.fromkeys(landlords)))
+    if missing:
+        return jsonify({'error': f'Landlord not found: {missing[0]}'}), 404
+    not_landlords = [landlord['userId'] for landlord in found if landlord['role'] != 'LANDLORD']
+    if not_landlords:
+        return jsonify({'error': f'User is not a landlord: {not_landlords[0]}'}), 400
+
+    # The feed service rebuilds this user's feed when the record changes
+    user = replace_record('users', 'userId', user_id, {
+        'followedTags': sorted(set(tags)),
+        'followedLandlords': sorted(set(landlords)),
+        'updatedAt': datetime.now().isoformat()
+    })
+
+    return jsonify({
+        'userId': user_id,
+        'followedTags': user['followedTags'],
+        'followedLandlords': user['followedLandlords']
+    })
+
+@app.route('/api/users/<user_id>/feed', methods=['GET'])
+def get_user_feed(user_id):
+    user = get_record('users', 'userId', user_id)
+    if not user:
+        return jsonify({'error': 'User not found'}), 404
+
+    count = int(request.args.get('count', 10))
+    if not 0 < count <= MAX_BATCH_SIZE:
+        return jsonify({'error': f'count must be between 1 and {MAX_BATCH_SIZE}'}), 400
+
+    # The cursor is the creation time and id of the last post of the previous page
+    before = None
+    if request.args.get('cursor'):
+        created, _, post_id = request.args.get('cursor').partition('|')
+        before = (parse_timestamp(created), post_id)
+        if before[0] is None or not post_id:
+            return jsonify({'error': 'Invalid cursor'}), 400
+
+    post_ids, next_before = get_feed_page(user_id, before, count)
+    posts, _ = get_many('posts', 'postId', post_ids)
+
+    return jsonify({
+        'posts': posts,
+        'nextCursor': f'{next_before[0].isoformat()}|{next_before[1]}' if next_before else None,
+        'pageSize': count
+    })
+
+# Additional user-related routes for profile and activities
+@app.route('/api/users/<user_id>/profile', methods=['POST', 'GET', 'PATCH'])
+def handle_user_profile(user_id):
+    if request.method == 'GET':
+        profile = get_record('profiles', 'userId', user_id)
+        if not profile:
+            return jsonify({'error': 'Profile not found'}), 404
+        return jsonify(profile)
+    
+    elif request.method == 'POST':
+        profile_data = request.get_json()
+        
+        # Check if profile already exists
+        existing_profile = get_record('profiles', 'userId', user_id)
+        if existing_profile:
+            return jsonify({'error': 'Profile already exists'}), 400
+        
+        # Validate required profile fields
+        required_fields = ['bio', 'preferences']
+        for field in required_fields:
+            if field not in profile_data:
+                return jsonify({'error': f'Missing required field: {field}'}), 400
+        
+        new_profile = {
+            'profileId': allocate_id('profiles'),
+            'userId': user_id,
+            **profile_data,
+            'createdAt': datetime.now().isoformat(),
+            'updatedAt': datetime.now().isoformat()
+        }
+        
+        insert_record('profiles', new_profile)
+        # In a real application, you would save to database here
+        
+        return jsonify(new_profile), 201
+    
+    elif request.method == 'PATCH':
+        update_data = request.get_json()
+        
+        profile = get_record('profiles', 'userId', user_id)
+        if not profile:
+            return jsonify({'error': 'Profile not found'}), 404
+        
+        changes = {key: value for key, value in update_data.items()
+                   if key in profile and key not in ['profileId', 'userId', 'createdAt']}
+        changes['updatedAt'] = datetime.now().isoformat()
+        profile = replace_record('profiles', 'profileId', profile['profileId'], changes)
+        # In a real application, you would save to database here
+        
+        return jsonify(profile)
\ No newline at end of file
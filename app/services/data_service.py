@@ -0,0 +1,536 @@
+import json
+import os
+import sys
+import threading
+import zlib
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+from operator import itemgetter
+from app.services import sqlite_store, shard_router
+from app.services.metrics import timed_phase, record_cache, record_scan, record_returned
+from app.utils.pagination import paginate_data
+
+DATA_FILE = 'sample_data.json'
+JOURNAL_FILE = 'data_journal.jsonl'
+# Records per store read when streaming a whole collection
+SCAN_BATCH_SIZE = 1000
+# 'memory' parses DATA_FILE and serves everything from RAM; 'sqlite' reads and writes
+# sqlite_store.SQLITE_FILE (populate it with migrate_sqlite.py); 'sharded' parses
+# DATA_FILE and moves shard_router.SHARDED_COLLECTIONS into local shard processes
+STORAGE_BACKEND = os.environ.get('STORAGE_BACKEND', 'memory')
+
+# Guards every mutation of the shared dataset; held only for in-memory work
+data_lock = threading.RLock()
+# Writers of one record are serialized on its stripe, taken before data_lock, so
+# store round-trips and journal writes for different records do not wait on each other
+WRITE_LOCK_STRIPES = 64
+_write_locks = [threading.RLock() for _ in range(WRITE_LOCK_STRIPES)]
+# Journal lines queued under data_lock, so in the order the changes were applied, and
+# written out by _flush_journal once data_lock is released
+_journal_queue = deque()
+_journal_lock = threading.Lock()
+# Journal entries held back by journal_batch on this thread
+_journal_local = threading.local()
+
+_data = None
+_indexes = {}
+# (collection, key value) -> last known list position, verified before use
+_positions = {}
+# Incremented on every copy-on-write update
+data_version = 0
+# Called as fn(collection, added, changed, removed) after merge_collection swaps a
+# collection or apply_change replays one, still under data_lock; changed holds
+# (old, new) pairs
+_reload_listeners = []
+# Called as fn(op, collection, key, record) after every create, update and delete,
+# with op named as in journal entries; key is None for creates. Updates made by
+# fold_counts, which only change counters, come as op 'count' instead of 'update'.
+_change_listeners = []
+
+
+def load_data():
+    # Parse the data file once and share the dataset across requests
+    global _data
+    if _data is None:
+        with data_lock:
+            if _data is None:
+                if STORAGE_BACKEND == 'sqlite':
+                    _data = sqlite_store.SqliteCollections()
+                elif STORAGE_BACKEND == 'sharded':
+                    shard_router.start_shards()
+                    with timed_phase('data_access'), open(DATA_FILE, 'r') as file:
+                        _data = shard_router.distribute(json.load(file))
+                else:
+                    with timed_phase('data_access'), open(DATA_FILE, 'r') as file:
+                        _data = json.load(file)
+    return _data
+
+
+def _backing_store(collection):
+    # The module holding a collection outside this process, or None if it is only in memory
+    if STORAGE_BACKEND == 'sqlite':
+        return sqlite_store
+    if STORAGE_BACKEND == 'sharded' and collection in shard_router.SHARDED_COLLECTIONS:
+        # Loading is what starts the shards
+        load_data()
+        return shard_router
+    return None
+
+
+def is_shared(collection):
+    # True when every process reads the collection from the same store
+    return _backing_store(collection) is not None
+
+
+def get_index(collection, key):
+    # Map key -> record for a collection, rebuilt when the collection grows or shrinks
+    records = load_data().get(collection, [])
+    cached = _indexes.get((collection, key))
+    if cached is not None and cached[0] == len(records):
+        record_cache('index', True)
+        return cached[1]
+
+    record_cache('index', False)
+    # Rebuild under the write lock so a concurrent replace_record is not lost
+    with timed_phase('data_access'), data_lock:
+        cached = _indexes.get((collection, key))
+        if cached is None or cached[0] != len(records):
+            cached = (len(records), {record[key]: record for record in records if key in record})
+            _indexes[(collection, key)] = cached
+            _positions.update(((collection, record[key]), position)
+                              for position, record in enumerate(records) if key in record)
+    return cached[1]
+
+
+def invalidate_index(collection):
+    for index_key in [k for k in _indexes if k[0] == collection]:
+        del _indexes[index_key]
+
+
+def get_record(collection, key, record_id):
+    # Single record by key; an index hit in memory, one indexed query with sqlite, one
+    # shard when key is the shard key
+    store = _backing_store(collection)
+    if store is not None:
+        with timed_phase('data_access'):
+            return store.get_by(collection, key, record_id)
+    return get_index(collection, key).get(record_id)
+
+
+def find_page(collection, filters, begin, count):
+    # Records whose fields equal every non-empty filter value, paginated like
+    # paginate_data. With sqlite the count and the page are computed in SQL; sharded
+    # collections are filtered in the shards and their pages merged.
+    filters = {field: value for field, value in filters.items() if value}
+    store = _backing_store(collection)
+    if store is not None:
+        with timed_phase('data_access'):
+            page, total = store.find_page(collection, filters, begin, count)
+        record_returned(len(page))
+        return page, total
+
+    records = load_data().get(collection, [])
+    if not filters:
+        return paginate_data(records, begin, count)
+    fields, values = itemgetter(*filters), tuple(filters.values())
+    if len(values) == 1:
+        values = values[0]
+    with timed_phase('filtering'):
+        filtered = [record for record in records if fields(record) == values]
+    record_scan(len(records))
+    return paginate_data(filtered, begin, count)
+
+
+def find_records(collection, filters):
+    # Every record matching the filters, in list order: find_page without the paging,
+    # for the short per-parent lists (a property's media, listings, reviews...)
+    return find_page(collection, filters, 1, sys.maxsize)[0]
+
+
+def iter_records(collection):
+    # Every record of a collection in list order. In memory this walks a copy of the
+    # list taken under data_lock (references only), so concurrent inserts and swap
+    # removals cannot shift it; stores are read in SCAN_BATCH_SIZE batches by seq.
+    store = _backing_store(collection)
+    if store is None:
+        with data_lock:
+            records = list(load_data().get(collection, []))
+        yield from records
+        return
+    after = 0
+    while True:
+        with timed_phase('data_access'):
+            batch = store.scan(collection, after, SCAN_BATCH_SIZE)
+        for _, record in batch:
+            yield record
+        if len(batch) < SCAN_BATCH_SIZE:
+            return
+        after = batch[-1][0]
+
+
+def insert_record(collection, record):
+    store = _backing_store(collection)
+    if store is not None:
+        store.insert(collection, record)
+    with data_lock:
+        _publish_insert(collection, record, store)
+    _flush_journal()
+    return record
+
+
+def _publish_insert(collection, record, store):
+    # Keep the working copy in step if this process has already loaded it
+    if store is None or collection in load_data():
+        records = load_data().setdefault(collection, [])
+        records.append(record)
+        _patch_indexes(collection, [], [record], len(records))
+    _journal('create', collection, record)
+    notify_change('create', collection, None, record)
+
+
+def delete_record(collection, key, record_id):
+    # Returns the removed record, or None if there was none
+    store = _backing_store(collection)
+    with record_locks(collection, [record_id]):
+        record = get_record(collection, key, record_id)
+        if record is None:
+            return None
+        if store is not None and not store.delete(collection, record[key]):
+            # Another process deleted it between the read and the delete
+            return None
+        with data_lock:
+            if collection in load_data():
+                loaded = get_index(collection, key).get(record_id)
+                if loaded is not None:
+                    records = load_data()[collection]
+                    records.pop(next(i for i, current in enumerate(records) if current is loaded))
+                    invalidate_index(collection)
+            _journal('delete', collection, record)
+            notify_change('delete', collection, key, record)
+    _flush_journal()
+    return record
+
+
+def delete_stored(collection, key, record):
+    # For callers that manage the in-memory list themselves (the reaction index
+    # swap-removes); drops the row from the durable backend, if there is one
+    store = _backing_store(collection)
+    if store is not None:
+        store.delete(collection, record[key])
+    with data_lock:
+        _journal('delete', collection, record)
+        notify_change('delete', collection, key, record)
+    _flush_journal()
+
+
+def replace_record(collection, key, record_id, changes):
+    # Copy-on-write update: published records are never mutated. A new record is
+    # built and swapped into its list slot and every index in one step, so lock-free
+    # readers see either the old or the new record, never a partial update.
+    # changes may be a dict or a function of the current record returning a dict; if
+    # the function raises, nothing is written.
+    return _replace(collection, key, record_id, changes, 'update')
+
+
+def fold_counts(collection, key, record_id, counts):
+    # Add {field: increment} into a record's counters. Written and journaled like
+    # replace_record, but the listeners hear op 'count', so those that only care
+    # about content (feeds, event streams) can skip counter traffic.
+    def changes(current):
+        return {field: current.get(field, 0) + amount for field, amount in counts.items()}
+    return _replace(collection, key, record_id, changes, 'count')
+
+
+def _replace(collection, key, record_id, changes, op):
+    apply = _applier(changes)
+    store = _backing_store(collection)
+    with record_locks(collection, [record_id]):
+        if store is not None:
+            # The stored copy is authoritative; changes are computed from it, in the
+            # store's own transaction rather than under data_lock
+            updated = store.update(collection, key, record_id, apply)
+            if updated is None:
+                return None
+            with data_lock:
+                _publish_update(collection, key, record_id, updated, op)
+        else:
+            with data_lock:
+                current = get_index(collection, key).get(record_id)
+                updated = apply(current) if current is not None else None
+                if updated is None:
+                    return None
+                _publish_update(collection, key, record_id, updated, op)
+    _flush_journal()
+    return updated
+
+
+def replace_and_insert(collection, key, record_id, changes, insert_collection, record):
+    # replace_record and insert_record as one unit, for an update that must not land
+    # without its companion record (a balance change and its ledger entry). A store
+    # writes both in one transaction; if changes raises, neither is written. Returns
+    # the updated record, or None if record_id does not exist.
+    apply = _applier(changes)
+    store = _backing_store(collection)
+    if _backing_store(insert_collection) is not store:
+        raise ValueError(f'{collection} and {insert_collection} are not kept in the same store')
+    with record_locks(collection, [record_id]):
+        if store is not None:
+            updated = store.update_and_insert(collection, key, record_id, apply, insert_collection, record)
+            if updated is None:
+                return None
+            with data_lock:
+                _publish_update(collection, key, record_id, updated)
+                _publish_insert(insert_collection, record, store)
+        else:
+            with data_lock:
+                current = get_index(collection, key).get(record_id)
+                updated = apply(current) if current is not None else None
+                if updated is None:
+                    return None
+                _publish_update(collection, key, record_id, updated)
+                _publish_insert(insert_collection, record, store)
+    _flush_journal()
+    return updated
+
+
+@contextmanager
+def record_locks(collection, record_ids):
+    # Hold the write stripes of the given records: writers of these records wait, other
+    # writers do not. Stripes are taken in index order so callers locking overlapping
+    # sets cannot deadlock, and always before data_lock; they are reentrant, so writes
+    # made inside the block take them again freely.
+    stripes = sorted({zlib.crc32(f'{collection}/{record_id}'.encode()) % WRITE_LOCK_STRIPES
+                      for record_id in record_ids})
+    for stripe in stripes:
+        _write_locks[stripe].acquire()
+    try:
+        yield
+    finally:
+        for stripe in reversed(stripes):
+            _write_locks[stripe].release()
+
+
+def _applier(changes):
+    def apply(current):
+        return {**current, **(changes(current) if callable(changes) else changes)}
+    return apply
+
+
+def _publish_update(collection, key, record_id, updated, op='update'):
+    # Swap a written record into the working copy, if this process has loaded the
+    # collection, then journal it and tell the listeners
+    global data_version
+    current = get_index(collection, key).get(record_id) if collection in load_data() else None
+    if current is not None:
+        records = load_data()[collection]
+        position = _position(collection, record_id, current)
+        records[position] = updated
+        _positions[(collection, record_id)] = position
+        _patch_indexes(collection, [current], [updated], len(records))
+    data_version += 1
+    _journal('update', collection, updated)
+    notify_change(op, collection, key, updated)
+
+
+def _position(collection, record_id, record):
+    # List position of a loaded record, trying the remembered one first
+    records = load_data()[collection]
+    position = _positions.get((collection, record_id))
+    if position is None or position >= len(records) or records[position] is not record:
+        position = next(i for i, current in enumerate(records) if current is record)
+    return position
+
+
+def _patch_indexes(collection, stale, fresh, length):
+    # Drop stale records from and add fresh ones to every index on the collection, and
+    # mark each index as matching a collection of the given length
+    for (indexed_collection, indexed_key), (_, index) in list(_indexes.items()):
+        if indexed_collection != collection:
+            continue
+        for record in stale:
+            if index.get(record.get(indexed_key)) is record:
+                del index[record[indexed_key]]
+        for record in fresh:
+            if indexed_key in record:
+                index[record[indexed_key]] = record
+        _indexes[(indexed_collection, indexed_key)] = (length, index)
+
+
+def add_change_listener(listener):
+    _change_listeners.append(listener)
+
+
+def notify_change(op, collection, key, record):
+    for listener in _change_listeners:
+        listener(op, collection, key, record)
+
+
+def add_reload_listener(listener):
+    _reload_listeners.append(listener)
+
+
+def merge_collection(collection, key, records):
+    # Swap in a freshly parsed copy of a collection. Records equal to the loaded ones
+    # keep their existing objects, so index entries, positions and anything cached per
+    # record stay valid; only added, changed and removed records touch the indexes.
+    # Without a key the collection is replaced whole. Returns (added, changed, removed).
+    global data_version
+    with data_lock:
+        data = load_data()
+        current = data.get(collection, [])
+        if key is None:
+            if current == records:
+                return 0, 0, 0
+            data[collection] = records
+            invalidate_index(collection)
+            data_version += 1
+            return len(records), 0, len(current)
+
+        loaded = get_index(collection, key)
+        merged, added, changed = [], [], []
+        for record in records:
+            existing = loaded.get(record.get(key))
+            if existing is None:
+                added.append(record)
+                merged.append(record)
+            elif existing == record:
+                merged.append(existing)
+            else:
+                changed.append((existing, record))
+                merged.append(record)
+        kept = {record.get(key) for record in records}
+        removed = [record for record in current if record.get(key) not in kept]
+        if not added and not changed and not removed:
+            return 0, 0, 0
+
+        _patch_indexes(collection, removed + [old for old, _ in changed],
+                       added + [new for _, new in changed], len(merged))
+        for record in removed:
+            _positions.pop((collection, record.get(key)), None)
+        # The export may reorder records; refreshing positions is a cheap pass of ints
+        _positions.update(((collection, record[key]), position)
+                          for position, record in enumerate(merged) if key in record)
+        data[collection] = merged
+        data_version += 1
+        for listener in _reload_listeners:
+            listener(collection, added, changed, removed)
+        for record in added:
+            notify_change('create', collection, key, record)
+        for _, record in changed:
+            notify_change('update', collection, key, record)
+        for record in removed:
+            notify_change('delete', collection, key, record)
+    return len(added), len(changed), len(removed)
+
+
+def apply_change(op, collection, key, record):
+    # Replay a change made by another process (a replication primary) on this copy.
+    # Indexes are patched in place and the reload listeners told, as for a reload.
+    global data_version
+    with data_lock:
+        if is_shared(collection) and collection not in load_data():
+            # Already in the shared store; only the listeners need to hear of it
+            data_version += 1
+            notify_change(op, collection, key, record)
+            return
+        records = load_data().setdefault(collection, [])
+        current = get_index(collection, key).get(record[key]) if key is not None else None
+        added, changed, removed = [], [], []
+        if current is None:
+            if op == 'delete':
+                return
+            records.append(record)
+            _patch_indexes(collection, [], [record], len(records))
+            added.append(record)
+        elif op == 'delete':
+            records.pop(_position(collection, record[key], current))
+            _positions.pop((collection, record[key]), None)
+            _patch_indexes(collection, [current], [], len(records))
+            removed.append(current)
+        else:
+            position = _position(collection, record[key], current)
+            records[position] = record
+            _positions[(collection, record[key])] = position
+            _patch_indexes(collection, [current], [record], len(records))
+            changed.append((current, record))
+        data_version += 1
+        for listener in _reload_listeners:
+            listener(collection, added, changed, removed)
+        notify_change(op, collection, key, record)
+
+
+def allocate_stored_ids(collection, count, time_based):
+    # Ids drawn from the sequence the shared store keeps for the collection
+    with timed_phase('data_access'):
+        return _backing_store(collection).allocate_ids(collection, count, time_based)
+
+
+def get_many(collection, key, ids):
+    # Point lookups for a batch of ids, preserving request order
+    store = _backing_store(collection)
+    if store is not None:
+        with timed_phase('data_access'):
+            index = store.get_many(collection, key, ids)
+    else:
+        index = get_index(collection, key)
+    with timed_phase('data_access'):
+        found = [index[item_id] for item_id in ids if item_id in index]
+        missing = [item_id for item_id in ids if item_id not in index]
+    return found, missing
+
+
+def journal_entry(op, collection, record):
+    return {
+        'op': op,
+        'collection': collection,
+        'record': record,
+        'timestamp': datetime.now().isoformat()
+    }
+
+
+def append_journal(entries):
+    # Single write per call so a bulk request is journaled as one unit
+    if entries:
+        _journal_queue.append(''.join(json.dumps(entry) + '\n' for entry in entries))
+    _flush_journal()
+
+
+def _flush_journal():
+    # Write every queued line in queue order. A caller that finds another thread
+    # writing waits for it, so its own lines are on disk when this returns.
+    with _journal_lock:
+        if not _journal_queue:
+            return
+        lines = []
+        while _journal_queue:
+            lines.append(_journal_queue.popleft())
+        with open(JOURNAL_FILE, 'a') as file:
+            file.write(''.join(lines))
+
+
+def _journal(op, collection, record):
+    # Every create, update and delete made through this module is journaled, so the
+    # journal replayed over DATA_FILE reproduces the dataset
+    entry = journal_entry(op, collection, record)
+    pending = getattr(_journal_local, 'pending', None)
+    if pending is not None:
+        pending.append(entry)
+    else:
+        # Queued here, under data_lock, and written after the writer releases it
+        _journal_queue.append(json.dumps(entry) + '\n')
+
+
+@contextmanager
+def journal_batch():
+    # Hold back the journal entries of the mutations made on this thread inside the
+    # block and write them in one append, so a bulk request is journaled as one unit
+    if getattr(_journal_local, 'pending', None) is not None:
+        yield
+        return
+    _journal_local.pending = []
+    try:
+        yield
+    finally:
+        entries, _journal_local.pending = _journal_local.pending, None
+        append_journal(entries)
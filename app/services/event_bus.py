@@ -0,0 +1,77 @@
+import os
+import threading
+import time
+from collections import deque
+from app.services.data_service import add_change_listener
+
+# Change events for the collections clients used to poll, kept for GET /api/events.
+# Each event names the parent it belongs to, so a client can follow one post's
+# comments or one user's applications; a post is its own parent.
+PARENT_FIELDS = {
+    'posts': 'postId',
+    'comments': 'postId',
+    'applications': 'userId',
+}
+# Counter folds ('count', i.e. flushed view counts) are not events: every viewed post
+# would otherwise be re-sent to every subscriber on every flush interval
+EVENT_TYPES = {'create': 'created', 'update': 'updated', 'delete': 'deleted'}
+# Events kept for clients resuming with Last-Event-ID; an older id gets a reset
+EVENT_BUFFER_SIZE = int(os.environ.get('EVENT_BUFFER_SIZE', '10000'))
+
+# (id, type, collection, parent id, record), oldest first
+_events = deque(maxlen=EVENT_BUFFER_SIZE)
+_changed = threading.Condition()
+_last_id = 0
+# Clients that saw an event up to this id can resume here. Events before this
+# process started were never buffered, so that is where it begins.
+_resumable_from = time.time_ns() // 1000
+
+
+def _next_id():
+    # Time-based, like shard seqs, so ids keep increasing across restarts
+    global _last_id
+    _last_id = max(time.time_ns() // 1000, _last_id + 1)
+    return _last_id
+
+
+def _on_change(op, collection, key, record):
+    global _resumable_from
+    if collection not in PARENT_FIELDS or op not in EVENT_TYPES:
+        return
+    event = (_next_id(), EVENT_TYPES[op], collection,
+             record.get(PARENT_FIELDS[collection]), record)
+    with _changed:
+        if len(_events) == _events.maxlen:
+            _resumable_from = _events[0][0]
+        _events.append(event)
+        _changed.notify_all()
+
+
+def latest_id():
+    with _changed:
+        return _events[-1][0] if _events else _resumable_from
+
+
+def can_resume(event_id):
+    return event_id >= _resumable_from
+
+
+def wait_for_events(event_id, timeout):
+    # Events newer than event_id, waiting up to timeout for the first one. Returns
+    # None once events after event_id have been dropped from the buffer.
+    with _changed:
+        if not _events or _events[-1][0] <= event_id:
+            _changed.wait(timeout)
+        if not can_resume(event_id):
+            return None
+        # Newest first from the right end; a caught-up client only touches what is new
+        newer = []
+        for event in reversed(_events):
+            if event[0] <= event_id:
+                break
+            newer.append(event)
+    newer.reverse()
+    return newer
+
+
+add_change_listener(_on_change)
@@ -0,0 +1,184 @@
+import bisect
+import heapq
+import os
+import threading
+from datetime import datetime
+from app.services.data_service import iter_records, data_lock, add_change_listener
+from app.utils.timestamps import parse_timestamp
+
+# Home feeds are materialized on write. Every list below holds (created, postId)
+# entries of ACTIVE posts, oldest first, capped at FEED_MAX_LENGTH newest; a page
+# is a bisect and a slice however many posts exist. Deleting a post does not pull
+# an older one back into a full list, so lists can run short until new posts arrive.
+FEED_MAX_LENGTH = int(os.environ.get('FEED_MAX_LENGTH', '1000'))
+
+# Seed posts use creationDate; posts created through the API use createdAt
+_TIMESTAMP_FIELDS = ['createdAt', 'creationDate']
+
+# Every ACTIVE post; the feed of users who follow nothing
+_timeline = []
+_by_tag = {}
+_by_author = {}
+# userId -> feed, only for users following at least one tag or landlord
+_feeds = {}
+# userId -> (followed tags, followed landlord ids)
+_follows = {}
+_tag_followers = {}
+_landlord_followers = {}
+# postId -> (entry, author, tags) for every post currently in the lists
+_placed = {}
+# Always taken after data_lock, the order change listeners are called in
+_lock = threading.Lock()
+_loaded = False
+
+
+def _entry(post):
+    for field in _TIMESTAMP_FIELDS:
+        created = parse_timestamp(post.get(field))
+        if created is not None:
+            return created, post['postId']
+    return datetime.min, post['postId']
+
+
+def _insert(entries, entry):
+    bisect.insort(entries, entry)
+    if len(entries) > FEED_MAX_LENGTH:
+        del entries[0]
+
+
+def _remove(entries, entry):
+    position = bisect.bisect_left(entries, entry)
+    if position < len(entries) and entries[position] == entry:
+        del entries[position]
+
+
+def _audience(author, tags):
+    # Users whose feed a post by author with these tags belongs in
+    audience = set(_landlord_followers.get(author, ()))
+    for tag in tags:
+        audience.update(_tag_followers.get(tag, ()))
+    return audience
+
+
+def _place(post_id, placement):
+    # Move a post from wherever it is listed to placement, (entry, author, tags) or None
+    current = _placed.get(post_id)
+    if current == placement:
+        return
+    if current is not None:
+        entry, author, tags = current
+        _remove(_timeline, entry)
+        _remove(_by_author.get(author, []), entry)
+        for tag in tags:
+            _remove(_by_tag.get(tag, []), entry)
+        for user_id in _audience(author, tags):
+            _remove(_feeds[user_id], entry)
+        del _placed[post_id]
+    if placement is not None:
+        entry, author, tags = placement
+        _insert(_timeline, entry)
+        _insert(_by_author.setdefault(author, []), entry)
+        for tag in tags:
+            _insert(_by_tag.setdefault(tag, []), entry)
+        for user_id in _audience(author, tags):
+            _insert(_feeds[user_id], entry)
+        _placed[post_id] = placement
+
+
+def _placement(post):
+    if post.get('status') != 'ACTIVE':
+        return None
+    return _entry(post), post.get('userId'), frozenset(post.get('tags') or ())
+
+
+def _build_feed(tags, landlords):
+    # Newest FEED_MAX_LENGTH of the union of the followed tag and author lists
+    sources = [_by_tag.get(tag, []) for tag in tags] + [_by_author.get(landlord, []) for landlord in landlords]
+    feed = []
+    for entry in heapq.merge(*(reversed(source) for source in sources), reverse=True):
+        if feed and feed[-1] == entry:
+            continue
+        feed.append(entry)
+        if len(feed) == FEED_MAX_LENGTH:
+            break
+    feed.reverse()
+    return feed
+
+
+def _set_follows(user_id, follows):
+    current = _follows.get(user_id, (frozenset(), frozenset()))
+    if current == follows:
+        return
+    for tag in current[0]:
+        _tag_followers[tag].discard(user_id)
+    for landlord in current[1]:
+        _landlord_followers[landlord].discard(user_id)
+    _follows.pop(user_id, None)
+    _feeds.pop(user_id, None)
+
+    tags, landlords = follows
+    if not tags and not landlords:
+        return
+    for tag in tags:
+        _tag_followers.setdefault(tag, set()).add(user_id)
+    for landlord in landlords:
+        _landlord_followers.setdefault(landlord, set()).add(user_id)
+    _follows[user_id] = follows
+    _feeds[user_id] = _build_feed(tags, landlords)
+
+
+def _user_follows(user):
+    return frozenset(user.get('followedTags') or ()), frozenset(user.get('followedLandlords') or ())
+
+
+def _ensure_loaded():
+    global _loaded
+    if _loaded:
+        return
+    with data_lock, _lock:
+        if _loaded:
+            return
+        # Build the shared lists in one sort each, then the per-user feeds from them
+        placements = [(post['postId'], _placement(post)) for post in iter_records('posts')]
+        placements = sorted((placement for placement in placements if placement[1] is not None),
+                            key=lambda placement: placement[1][0])
+        for post_id, (entry, author, tags) in placements:
+            _timeline.append(entry)
+            _by_author.setdefault(author, []).append(entry)
+            for tag in tags:
+                _by_tag.setdefault(tag, []).append(entry)
+            _placed[post_id] = (entry, author, tags)
+        for entries in [_timeline, *_by_author.values(), *_by_tag.values()]:
+            del entries[:-FEED_MAX_LENGTH]
+        for user in iter_records('users'):
+            _set_follows(user['userId'], _user_follows(user))
+        _loaded = True
+
+
+def _on_change(op, collection, key, record):
+    # Fan out every post write (and replayed or reloaded ones) into the lists it belongs in
+    # Counter folds ('count') change nothing a feed is built from
+    if collection not in ('posts', 'users') or op == 'count':
+        return
+    with _lock:
+        if not _loaded:
+            return
+        if collection == 'posts':
+            _place(record['postId'], _placement(record) if op != 'delete' else None)
+        else:
+            _set_follows(record['userId'], _user_follows(record) if op != 'delete' else (frozenset(), frozenset()))
+
+
+def get_feed_page(user_id, before, count):
+    # Up to count post ids older than the before entry (newest first when before is
+    # None), and the entry to pass as before for the next page, or None at the end
+    _ensure_loaded()
+    with _lock:
+        entries = _feeds.get(user_id, _timeline)
+        end = len(entries) if before is None else bisect.bisect_left(entries, before)
+        page = entries[max(end - count, 0):end][::-1]
+    next_before = page[-1] if page and end > count else None
+    return [post_id for _, post_id in page], next_before
+
+
+add_change_listener(_on_change)
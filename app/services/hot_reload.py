@@ -0,0 +1,90 @@
+import json
+import os
+import threading
+from app.services import data_service
+from app.services.id_allocator import ID_FIELDS
+
+# Off by default; HOT_RELOAD=1 picks up a replaced DATA_FILE without a restart.
+# Only the memory backend reads DATA_FILE, so sqlite mode never watches it.
+HOT_RELOAD_ENABLED = os.environ.get('HOT_RELOAD', '0') == '1'
+HOT_RELOAD_INTERVAL_SECONDS = float(os.environ.get('HOT_RELOAD_INTERVAL', '2'))
+# Records are matched across reloads by these fields; other collections are compared whole
+RELOAD_KEYS = {**ID_FIELDS, 'sessions': 'sessionId'}
+
+# (inode, size, mtime) of DATA_FILE as of the last load; a replaced file changes the inode
+_file_state = None
+_watcher = None
+_watcher_lock = threading.Lock()
+_stop_watcher = threading.Event()
+
+
+def _stat_data_file():
+    stat = os.stat(data_service.DATA_FILE)
+    return stat.st_ino, stat.st_size, stat.st_mtime_ns
+
+
+def _enabled():
+    return HOT_RELOAD_ENABLED and data_service.STORAGE_BACKEND == 'memory'
+
+
+def record_file_state():
+    # Call right after the initial load so the watcher compares against that version
+    global _file_state
+    if _enabled():
+        _file_state = _stat_data_file()
+
+
+def reload_data_file():
+    # Parse DATA_FILE and merge it collection by collection. Collections missing from
+    # the file are left alone. Returns {collection: (added, changed, removed)}.
+    with open(data_service.DATA_FILE, 'r') as file:
+        parsed = json.load(file)
+    summary = {}
+    for collection, records in parsed.items():
+        counts = data_service.merge_collection(collection, RELOAD_KEYS.get(collection), records)
+        if any(counts):
+            summary[collection] = counts
+    return summary
+
+
+def check_for_changes():
+    # Returns the reload summary, or None if the file is unchanged or not readable yet
+    global _file_state
+    try:
+        state = _stat_data_file()
+    except OSError:
+        return None
+    if state == _file_state:
+        return None
+    try:
+        summary = reload_data_file()
+    except (OSError, ValueError):
+        # Most likely caught mid-write; the next poll tries again
+        return None
+    _file_state = state
+    return summary
+
+
+def _watch_loop():
+    while not _stop_watcher.wait(HOT_RELOAD_INTERVAL_SECONDS):
+        check_for_changes()
+
+
+def start_watcher():
+    global _watcher
+    if not _enabled():
+        return
+    if _watcher is not None and _watcher.is_alive():
+        return
+    with _watcher_lock:
+        if _watcher is not None and _watcher.is_alive():
+            return
+        if _file_state is None:
+            record_file_state()
+        _stop_watcher.clear()
+        _watcher = threading.Thread(target=_watch_loop, name='data-file-watcher', daemon=True)
+        _watcher.start()
+
+
+def stop_watcher():
+    _stop_watcher.set()
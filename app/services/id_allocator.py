@@ -0,0 +1,89 @@
+import threading
+from app.services.data_service import load_data, add_reload_listener, allocate_stored_ids, is_shared
+from app.utils.ids import highest_id, format_ids, next_time_start, format_time_ids
+
+ID_FIELDS = {
+    'users': 'userId',
+    'properties': 'propertyId',
+    'mediaAssets': 'assetId',
+    'posts': 'postId',
+    'comments': 'commentId',
+    'reactions': 'reactionId',
+    'applications': 'applicationId',
+    'documents': 'documentId',
+    'tokenActivities': 'activityId',
+    'profiles': 'profileId',
+    'property_details': 'detailsId',
+    'property_media': 'mediaId',
+    'property_listings': 'listingId',
+    'property_reviews': 'reviewId',
+    'property_amenities': 'amenityId'
+}
+
+# 'sequential' continues the collection's highest id with its prefix (post1600, post1601...);
+# 'time' hands out fixed-width millisecond-based IDs that sort in creation order both
+# numerically and as strings
+ID_MODE = 'sequential'
+
+# collection -> [prefix, last number handed out]
+_counters = {}
+_lock = threading.Lock()
+_last_time_id = 0
+
+
+def _highest(collection, records):
+    id_field = ID_FIELDS[collection]
+    return highest_id(record.get(id_field, '') for record in records)
+
+
+def _recover_counter(collection):
+    # Start above the largest numeric suffix already in use ('prop789' -> 'prop', 789)
+    return list(_highest(collection, load_data().get(collection, [])))
+
+
+def _on_reload(collection, added, changed, removed):
+    # Records added by a data file reload may carry ids past a recovered counter
+    if collection not in ID_FIELDS or not added:
+        return
+    with _lock:
+        counter = _counters.get(collection)
+        if counter is not None:
+            prefix, highest = _highest(collection, added)
+            if highest > counter[1]:
+                counter[:] = [prefix, highest]
+
+
+def _next_sequential(collection, count):
+    with _lock:
+        if collection not in _counters:
+            _counters[collection] = _recover_counter(collection)
+        prefix, last = _counters[collection]
+        _counters[collection][1] = last + count
+    return format_ids(prefix, last + 1, count)
+
+
+def _next_time_based(count):
+    global _last_time_id
+    with _lock:
+        start = next_time_start(_last_time_id)
+        _last_time_id = start + count - 1
+    return format_time_ids(start, count)
+
+
+def allocate_ids(collection, count):
+    if collection not in ID_FIELDS:
+        raise KeyError(f'No ID field registered for collection: {collection}')
+    if is_shared(collection):
+        # Every process writing to the store draws from the sequence kept there;
+        # counters in this process would collide with another worker's
+        return allocate_stored_ids(collection, count, ID_MODE == 'time')
+    if ID_MODE == 'time':
+        return _next_time_based(count)
+    return _next_sequential(collection, count)
+
+
+def allocate_id(collection):
+    return allocate_ids(collection, 1)[0]
+
+
+add_reload_listener(_on_reload)
@@ -0,0 +1,102 @@
+from datetime import datetime
+from app.services.data_service import replace_and_insert, journal_batch, record_locks
+from app.services.id_allocator import allocate_ids
+
+
+def validate_activity_data(activity_data):
+    # Returns an error message, or None when the payload is well formed
+    if not isinstance(activity_data, dict):
+        return 'Activity must be a JSON object'
+    required_fields = ['activityType', 'tokenAmount', 'description']
+    for field in required_fields:
+        if field not in activity_data:
+            return f'Missing required field: {field}'
+
+    valid_types = ['EARN', 'SPEND', 'REFUND']
+    activity_type = activity_data['activityType']
+    if not isinstance(activity_type, str) or activity_type.upper() not in valid_types:
+        return 'Invalid activity type'
+    # Whole tokens only; the type gives the direction. bool is an int subclass.
+    amount = activity_data['tokenAmount']
+    if not isinstance(amount, int) or isinstance(amount, bool) or amount <= 0:
+        return 'tokenAmount must be a positive integer'
+    if not isinstance(activity_data['description'], str):
+        return 'description must be a string'
+    return None
+
+
+class _InsufficientBalance(Exception):
+    pass
+
+
+def _new_activity(user_id, activity_data, activity_id):
+    return {
+        'activityId': activity_id,
+        'userId': user_id,
+        'activityType': activity_data['activityType'].upper(),
+        'tokenAmount': activity_data['tokenAmount'],
+        'description': activity_data['description'],
+        'createdAt': datetime.now().isoformat(),
+        'status': 'COMPLETED'
+    }
+
+
+def _balance_change(activity):
+    # The user update for an activity, computed from the stored user inside the
+    # store's write so the balance check and the new balance cannot interleave with
+    # another process's; raises _InsufficientBalance if a SPEND would overdraw
+    def change(user):
+        balance = user['tokenBalance']
+        if activity['activityType'] == 'SPEND':
+            if balance < activity['tokenAmount']:
+                raise _InsufficientBalance
+            return {'tokenBalance': balance - activity['tokenAmount']}
+        return {'tokenBalance': balance + activity['tokenAmount']}
+    return change
+
+
+def _apply(activity):
+    # Apply the balance change and append the activity as one write; returns an error
+    # message, or None. Must be called with the user's record lock held.
+    try:
+        user = replace_and_insert('users', 'userId', activity['userId'], _balance_change(activity),
+                                  'tokenActivities', activity)
+    except _InsufficientBalance:
+        return 'Insufficient token balance'
+    return None if user is not None else 'User not found'
+
+
+def record_activity(user, activity_data):
+    # Atomically check and apply the balance change together with the activity.
+    # Returns (activity, error).
+    error = validate_activity_data(activity_data)
+    if error:
+        return None, error
+    activity = _new_activity(user['userId'], activity_data, allocate_ids('tokenActivities', 1)[0])
+    # Balance updates are serialized per user only; the user's lock is held until the
+    # journal lines are queued, so they land in the order the updates were applied
+    with record_locks('users', [user['userId']]), journal_batch():
+        error = _apply(activity)
+    if error:
+        return None, error
+    return activity, None
+
+
+def record_activities(pending):
+    # Batch form of record_activity for a list of (user, activity_data) pairs.
+    # Items apply in order, so later SPENDs see earlier EARNs of the same batch. Every
+    # item is validated before anything is written, and each item's balance change and
+    # activity land together, so no item can fail halfway through.
+    errors = [validate_activity_data(activity_data) for _, activity_data in pending]
+    valid = [item for item, error in zip(pending, errors) if error is None]
+    results = []
+    with record_locks('users', [user['userId'] for user, _ in valid]):
+        # Ids of rejected items are simply skipped
+        activity_ids = iter(allocate_ids('tokenActivities', len(valid))) if valid else None
+        with journal_batch():
+            for (user, activity_data), error in zip(pending, errors):
+                if error is None:
+                    activity = _new_activity(user['userId'], activity_data, next(activity_ids))
+                    error = _apply(activity)
+                results.append((None, error) if error else (activity, None))
+    return results
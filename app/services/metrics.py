@@ -0,0 +1,166 @@
+import os
+import threading
+import time
+from bisect import bisect_left
+
+# Off by default; when disabled every hook below is a single flag check
+METRICS_ENABLED = os.environ.get('METRICS_ENABLED', '0') == '1'
+
+# Upper bounds in seconds, Prometheus style; the +Inf bucket is implicit
+LATENCY_BUCKETS = [0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+                   0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0]
+
+_lock = threading.Lock()
+# (method, route) -> [bucket counts..., +Inf count, sum]
+_request_histograms = {}
+# (method, route, phase) -> same layout
+_phase_histograms = {}
+# (method, route) -> [scanned, returned]
+_record_counts = {}
+# (cache, 'hit' | 'miss') -> count
+_cache_counts = {}
+
+# Route label of the request the current thread is serving
+_current = threading.local()
+
+
+class _NullPhase:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_PHASE = _NullPhase()
+
+
+class _Phase:
+    __slots__ = ('name', 'started')
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        route = getattr(_current, 'route', None)
+        if route is not None:
+            _observe(_phase_histograms, route + (self.name,), time.perf_counter() - self.started)
+        return False
+
+
+def _observe(histograms, key, seconds):
+    with _lock:
+        histogram = histograms.get(key)
+        if histogram is None:
+            histogram = histograms[key] = [0] * (len(LATENCY_BUCKETS) + 2)
+        histogram[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        histogram[-1] += seconds
+
+
+def begin_request(method, route):
+    _current.route = (method, route)
+    _current.started = time.perf_counter()
+
+
+def end_request():
+    route = getattr(_current, 'route', None)
+    if route is None:
+        return
+    _observe(_request_histograms, route, time.perf_counter() - _current.started)
+    _current.route = None
+
+
+def timed_phase(name):
+    # with timed_phase('filtering'): ...
+    if not METRICS_ENABLED or getattr(_current, 'route', None) is None:
+        return _NULL_PHASE
+    return _Phase(name)
+
+
+def record_scan(scanned):
+    # Count records examined by a filter; compare with record_returned
+    if not METRICS_ENABLED:
+        return
+    route = getattr(_current, 'route', None)
+    if route is None:
+        return
+    with _lock:
+        _record_counts.setdefault(route, [0, 0])[0] += scanned
+
+
+def record_returned(returned):
+    if not METRICS_ENABLED:
+        return
+    route = getattr(_current, 'route', None)
+    if route is None:
+        return
+    with _lock:
+        _record_counts.setdefault(route, [0, 0])[1] += returned
+
+
+def record_cache(cache, hit):
+    if not METRICS_ENABLED:
+        return
+    key = (cache, 'hit' if hit else 'miss')
+    with _lock:
+        _cache_counts[key] = _cache_counts.get(key, 0) + 1
+
+
+def _labels(**labels):
+    return ','.join(f'{name}="{value}"' for name, value in labels.items())
+
+
+def _render_histogram(lines, name, histograms, label_names):
+    for key, histogram in sorted(histograms.items()):
+        labels = _labels(**dict(zip(label_names, key)))
+        cumulative = 0
+        for bound, count in zip(LATENCY_BUCKETS + ['+Inf'], histogram[:-1]):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+        lines.append(f'{name}_sum{{{labels}}} {histogram[-1]}')
+        lines.append(f'{name}_count{{{labels}}} {cumulative}')
+
+
+def render_prometheus():
+    with _lock:
+        request_histograms = {key: list(value) for key, value in _request_histograms.items()}
+        phase_histograms = {key: list(value) for key, value in _phase_histograms.items()}
+        record_counts = {key: list(value) for key, value in _record_counts.items()}
+        cache_counts = dict(_cache_counts)
+
+    lines = [
+        '# HELP api_request_duration_seconds Request latency per route.',
+        '# TYPE api_request_duration_seconds histogram',
+    ]
+    _render_histogram(lines, 'api_request_duration_seconds', request_histograms, ['method', 'route'])
+
+    lines += [
+        '# HELP api_phase_duration_seconds Time spent per request phase.',
+        '# TYPE api_phase_duration_seconds histogram',
+    ]
+    _render_histogram(lines, 'api_phase_duration_seconds', phase_histograms, ['method', 'route', 'phase'])
+
+    lines += [
+        '# HELP api_records_scanned_total Records examined while filtering.',
+        '# TYPE api_records_scanned_total counter',
+    ]
+    for (method, route), (scanned, _) in sorted(record_counts.items()):
+        lines.append(f'api_records_scanned_total{{{_labels(method=method, route=route)}}} {scanned}')
+    lines += [
+        '# HELP api_records_returned_total Records included in responses.',
+        '# TYPE api_records_returned_total counter',
+    ]
+    for (method, route), (_, returned) in sorted(record_counts.items()):
+        lines.append(f'api_records_returned_total{{{_labels(method=method, route=route)}}} {returned}')
+
+    lines += [
+        '# HELP api_cache_requests_total Cache lookups by result.',
+        '# TYPE api_cache_requests_total counter',
+    ]
+    for (cache, result), count in sorted(cache_counts.items()):
+        lines.append(f'api_cache_requests_total{{{_labels(cache=cache, result=result)}}} {count}')
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,152 @@
+import threading
+from app.services.data_service import load_data, find_page, find_records, insert_record, delete_record, delete_stored, replace_record, record_locks, data_lock, is_shared, add_reload_listener
+from app.utils.ids import DuplicateIdError
+
+REACTION_TYPES = ['LIKE', 'LOVE', 'HELPFUL', 'INSIGHTFUL']
+
+# postId -> {userId: reaction}, in insertion order
+_by_post = {}
+# postId -> {reactionType: count}
+_counts = {}
+# reactionId -> position in data['reactions'], so removal can swap with the tail
+_positions = {}
+# Set when a reload or replayed change may have moved reactions; rebuilt before removal
+_positions_stale = False
+# Always taken after data_lock, the order the reload listener is called in; writers
+# take the post's record lock before both, as replace_record does
+_lock = threading.Lock()
+_loaded = False
+# With a shared store (sqlite) none of the above is used: reactions are queried where
+# every process sees the same rows, and the store's unique (postId, userId) index
+# rejects a second reaction from the same user
+
+
+def _ensure_loaded():
+    global _loaded
+    if _loaded:
+        return
+    with data_lock, _lock:
+        if _loaded:
+            return
+        for position, reaction in enumerate(load_data().setdefault('reactions', [])):
+            _index(reaction, position)
+        _loaded = True
+
+
+def _index(reaction, position):
+    _by_post.setdefault(reaction['postId'], {})[reaction['userId']] = reaction
+    counts = _counts.setdefault(reaction['postId'], {})
+    counts[reaction['reactionType']] = counts.get(reaction['reactionType'], 0) + 1
+    _positions[reaction['reactionId']] = position
+
+
+def _unindex(reaction):
+    by_user = _by_post.get(reaction['postId'], {})
+    if by_user.get(reaction['userId']) is reaction:
+        del by_user[reaction['userId']]
+        _counts[reaction['postId']][reaction['reactionType']] -= 1
+    _positions.pop(reaction['reactionId'], None)
+
+
+def _on_reload(collection, added, changed, removed):
+    # Apply a data file reload or a replayed change to the index instead of rebuilding it
+    global _positions_stale
+    if collection != 'reactions':
+        return
+    with _lock:
+        if not _loaded:
+            return
+        for reaction in removed + [old for old, _ in changed]:
+            _unindex(reaction)
+        for reaction in added + [new for _, new in changed]:
+            _index(reaction, None)
+        _positions_stale = True
+
+
+def get_reaction(post_id, user_id):
+    if is_shared('reactions'):
+        page, _ = find_page('reactions', {'postId': post_id, 'userId': user_id}, 1, 1)
+        return page[0] if page else None
+    _ensure_loaded()
+    return _by_post.get(post_id, {}).get(user_id)
+
+
+def get_post_reactions(post_id):
+    if is_shared('reactions'):
+        return find_records('reactions', {'postId': post_id})
+    _ensure_loaded()
+    return list(_by_post.get(post_id, {}).values())
+
+
+def get_reaction_summary(post_id):
+    if is_shared('reactions'):
+        counts = {}
+        for reaction in get_post_reactions(post_id):
+            counts[reaction['reactionType']] = counts.get(reaction['reactionType'], 0) + 1
+    else:
+        _ensure_loaded()
+        counts = _counts.get(post_id, {})
+    return {reaction_type: counts.get(reaction_type, 0) for reaction_type in REACTION_TYPES}
+
+
+def add_reaction(post, reaction):
+    # Returns False if the user already reacted to the post
+    if is_shared('reactions'):
+        with record_locks('posts', [post['postId']]):
+            try:
+                insert_record('reactions', reaction)
+            except DuplicateIdError:
+                return False
+            replace_record('posts', 'postId', post['postId'],
+                           lambda current: {'reactionCount': current['reactionCount'] + 1})
+        return True
+    _ensure_loaded()
+    with record_locks('posts', [post['postId']]), data_lock, _lock:
+        reactions = load_data()['reactions']
+        if reaction['userId'] in _by_post.get(reaction['postId'], {}):
+            return False
+        insert_record('reactions', reaction)
+        _index(reaction, len(reactions) - 1)
+        replace_record('posts', 'postId', post['postId'],
+                       lambda current: {'reactionCount': current['reactionCount'] + 1})
+    return True
+
+
+def remove_reaction(post, user_id):
+    # Returns the removed reaction, or None if the user had not reacted
+    if is_shared('reactions'):
+        with record_locks('posts', [post['postId']]):
+            reaction = get_reaction(post['postId'], user_id)
+            # delete_record finds nothing if another process removed it first
+            if reaction is None or delete_record('reactions', 'reactionId', reaction['reactionId']) is None:
+                return None
+            replace_record('posts', 'postId', post['postId'],
+                           lambda current: {'reactionCount': current['reactionCount'] - 1})
+        return reaction
+    _ensure_loaded()
+    global _positions_stale
+    with record_locks('posts', [post['postId']]), data_lock, _lock:
+        reactions = load_data()['reactions']
+        if _positions_stale:
+            _positions.clear()
+            _positions.update((current['reactionId'], position) for position, current in enumerate(reactions))
+            _positions_stale = False
+        reaction = _by_post.get(post['postId'], {}).pop(user_id, None)
+        if reaction is None:
+            return None
+        counts = _counts[post['postId']]
+        counts[reaction['reactionType']] -= 1
+
+        # Move the last reaction into the freed slot instead of shifting the list
+        position = _positions.pop(reaction['reactionId'])
+        last = reactions.pop()
+        if last is not reaction:
+            reactions[position] = last
+            _positions[last['reactionId']] = position
+        delete_stored('reactions', 'reactionId', reaction)
+        replace_record('posts', 'postId', post['postId'],
+                       lambda current: {'reactionCount': current['reactionCount'] - 1})
+    return reaction
+
+
+add_reload_listener(_on_reload)
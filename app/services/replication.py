@@ -0,0 +1,338 @@
+import heapq
+import http.client
+import itertools
+import json
+import os
+import socket
+import threading
+import time
+import uuid
+from collections import deque
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Listener, Client
+from urllib.parse import quote
+from app.services import data_service, session_store, view_counter
+from app.services.hot_reload import RELOAD_KEYS
+
+# serve.py with several workers: one primary process applies every write and streams the
+# resulting changes to the worker processes, which serve reads from their own copy
+REPLICATION_SOCKET = os.environ.get('REPLICATION_SOCKET', 'replication.sock')
+# The primary's HTTP server; replicas forward writes here
+PRIMARY_SOCKET = os.environ.get('PRIMARY_SOCKET', 'primary.sock')
+# A replica that has not heard from the primary for this long forwards reads instead
+REPLICA_MAX_STALENESS_SECONDS = float(os.environ.get('REPLICA_MAX_STALENESS', '1.0'))
+# How long a read may wait for a replica to reach the version its client has seen
+REPLICA_READ_WAIT_SECONDS = 0.5
+HEARTBEAT_INTERVAL_SECONDS = 0.1
+# Changes kept for replicas that fall behind or reconnect; a larger gap gets a snapshot
+REPLICATION_BACKLOG = 100000
+PRIMARY_TIMEOUT_SECONDS = 30
+
+READ_METHODS = {'GET', 'HEAD', 'OPTIONS'}
+# Sent with every primary response; clients may echo it as X-Min-Version to read their writes
+VERSION_HEADER = 'X-Data-Version'
+HOP_BY_HOP_HEADERS = {'connection', 'keep-alive', 'transfer-encoding'}
+
+# Set in the serving process before workers are forked, so every process shares it
+_authkey = None
+# Identifies a run of the primary; changes are only resumed within the same run
+_epoch = None
+# Last version published (primary) or applied (replica)
+version = 0
+# (version, message) for the last REPLICATION_BACKLOG changes
+_backlog = deque(maxlen=REPLICATION_BACKLOG)
+_changed = threading.Condition()
+# sessionId -> version of that session's last write, while this replica is behind it
+_session_versions = {}
+# Min-heap of (version, sessionId) for the entries above; each is dropped once the
+# replica reaches its version, so only sessions with writes in flight are kept
+_pins = []
+_last_heard = 0.0
+_follower = None
+_stop_follower = threading.Event()
+_local = threading.local()
+
+
+def configure():
+    # Call in the parent before forking the primary and the replicas
+    global _authkey
+    _authkey = os.urandom(16)
+
+
+def begin_epoch():
+    # Call in the parent before forking each primary. Replicas forked afterwards start
+    # from the same data as that primary and need no snapshot; older ones resync.
+    global _epoch, version
+    _epoch = uuid.uuid4().hex
+    # Time-based so versions, and the event ids taken from them, keep increasing
+    # when a primary is replaced
+    version = time.time_ns() // 1000
+    remove_sockets()
+
+
+def remove_sockets():
+    for path in (REPLICATION_SOCKET, PRIMARY_SOCKET):
+        if os.path.exists(path):
+            os.unlink(path)
+
+
+def _publish(message):
+    global version
+    with _changed:
+        version += 1
+        _backlog.append((version, message))
+        _changed.notify_all()
+        return version
+
+
+def _on_change(op, collection, key, record):
+    # Runs under data_lock for data changes, so versions follow the order of application
+    _publish(('change', op, collection, key or RELOAD_KEYS.get(collection), record))
+
+
+def _snapshot():
+    # Taken under data_lock so no change lands between the copy and its version
+    with data_service.data_lock, _changed:
+        # Collections in sqlite or the shards are read from there by the replicas too
+        collections = {collection: list(records) for collection, records in data_service.load_data().items()
+                       if not data_service.is_shared(collection)}
+        return version, collections, session_store.sessions_snapshot()
+
+
+def _stream_to_replica(connection):
+    with connection:
+        try:
+            request = connection.recv()
+            if request[0] == 'views':
+                for post_id, views in request[1].items():
+                    view_counter.record_view(post_id, views)
+                return
+            _, epoch, applied = request
+            while True:
+                with _changed:
+                    if epoch == _epoch and applied == version:
+                        _changed.wait(HEARTBEAT_INTERVAL_SECONDS)
+                    oldest = _backlog[0][0] if _backlog else version + 1
+                    # A replica of another primary run, or one past the backlog, starts over
+                    resync = epoch != _epoch or applied > version or applied < oldest - 1
+                    pending = [] if resync else list(itertools.islice(_backlog, applied - oldest + 1, None))
+                if resync:
+                    snapshot_version, collections, sessions = _snapshot()
+                    connection.send(('snapshot', _epoch, snapshot_version, collections, sessions))
+                    epoch, applied = _epoch, snapshot_version
+                elif pending:
+                    connection.send(('changes', pending))
+                    applied = pending[-1][0]
+                else:
+                    connection.send(('heartbeat', applied))
+        except (OSError, EOFError):
+            return
+
+
+def _serve_replicas(listener):
+    while True:
+        try:
+            connection = listener.accept()
+        except (OSError, AuthenticationError):
+            continue
+        threading.Thread(target=_stream_to_replica, args=(connection,), daemon=True).start()
+
+
+def start_primary():
+    data_service.add_change_listener(_on_change)
+    listener = Listener(REPLICATION_SOCKET, family='AF_UNIX', authkey=_authkey)
+    threading.Thread(target=_serve_replicas, args=(listener,), name='replication-server', daemon=True).start()
+
+
+def primary_app(app):
+    # Stamps responses with the data version and pins the caller's session to it after
+    # a write, so replicas hold that session's reads until they have caught up
+    def application(environ, start_response):
+        def start(status, headers, exc_info=None):
+            headers.append((VERSION_HEADER, str(version)))
+            return start_response(status, headers, exc_info)
+
+        result = app(environ, start)
+        session_id = environ.get('HTTP_X_SESSION_ID')
+        if session_id and environ['REQUEST_METHOD'] not in READ_METHODS:
+            _publish(('pin', session_id, version))
+        return result
+    return application
+
+
+def _apply(message):
+    global version, _epoch
+    kind = message[0]
+    if kind == 'snapshot':
+        _, epoch, snapshot_version, collections, sessions = message
+        for collection, records in collections.items():
+            data_service.merge_collection(collection, RELOAD_KEYS.get(collection), records)
+        for session in sessions:
+            session_store.apply_session(session)
+        with _changed:
+            _epoch, version = epoch, snapshot_version
+            _unpin_reached()
+            _changed.notify_all()
+    elif kind == 'changes':
+        for change_version, change in message[1]:
+            if change[0] == 'pin':
+                _, session_id, pinned = change
+                with _changed:
+                    _pin(session_id, pinned)
+            else:
+                _, op, collection, key, record = change
+                if collection == 'sessions':
+                    session_store.apply_session(record)
+                else:
+                    data_service.apply_change(op, collection, key, record)
+            with _changed:
+                version = change_version
+                _unpin_reached()
+                _changed.notify_all()
+
+
+def _pin(session_id, pinned):
+    # Hold the session's reads until version reaches pinned. Call with _changed held.
+    if pinned <= version or pinned <= _session_versions.get(session_id, 0):
+        return
+    _session_versions[session_id] = pinned
+    heapq.heappush(_pins, (pinned, session_id))
+
+
+def _unpin_reached():
+    # Call with _changed held, after version moves
+    while _pins and _pins[0][0] <= version:
+        pinned, session_id = heapq.heappop(_pins)
+        # A later write may have pinned the session higher; that entry stays
+        if _session_versions.get(session_id) == pinned:
+            del _session_versions[session_id]
+
+
+def _follow():
+    # Stay connected to the primary, resuming from the last applied version
+    global _last_heard
+    while not _stop_follower.is_set():
+        try:
+            connection = Client(REPLICATION_SOCKET, family='AF_UNIX', authkey=_authkey)
+        except OSError:
+            _stop_follower.wait(HEARTBEAT_INTERVAL_SECONDS)
+            continue
+        with connection:
+            try:
+                connection.send(('follow', _epoch, version))
+                while not _stop_follower.is_set():
+                    _apply(connection.recv())
+                    _last_heard = time.monotonic()
+            except (OSError, EOFError):
+                pass
+
+
+def _forward_views(counts):
+    try:
+        with Client(REPLICATION_SOCKET, family='AF_UNIX', authkey=_authkey) as connection:
+            connection.send(('views', counts))
+    except OSError:
+        # Views are best-effort; losing one flush interval is acceptable
+        pass
+
+
+def start_replica():
+    global _follower
+    view_counter.forward_views = _forward_views
+    _stop_follower.clear()
+    _follower = threading.Thread(target=_follow, name='replication-follower', daemon=True)
+    _follower.start()
+
+
+def stop_replica():
+    _stop_follower.set()
+
+
+def _required_version(environ):
+    required = 0
+    header = environ.get('HTTP_X_MIN_VERSION', '')
+    if header.isdigit():
+        required = int(header)
+    session_id = environ.get('HTTP_X_SESSION_ID')
+    if session_id:
+        required = max(required, _session_versions.get(session_id, 0))
+    return required
+
+
+def _can_serve(environ):
+    if environ['REQUEST_METHOD'] not in READ_METHODS:
+        return False
+    if time.monotonic() - _last_heard > REPLICA_MAX_STALENESS_SECONDS:
+        return False
+    # A session created moments ago on the primary may not have arrived yet
+    session_id = environ.get('HTTP_X_SESSION_ID')
+    if session_id and session_store.get_session(session_id) is None:
+        return False
+    required = _required_version(environ)
+    if version >= required:
+        return True
+    with _changed:
+        return _changed.wait_for(lambda: version >= required, REPLICA_READ_WAIT_SECONDS)
+
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, path, timeout):
+        super().__init__('localhost', timeout=timeout)
+        self.path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.path)
+
+
+def _primary_connection():
+    # One keep-alive connection to the primary per thread
+    connection = getattr(_local, 'connection', None)
+    if connection is None:
+        connection = _UnixHTTPConnection(PRIMARY_SOCKET, PRIMARY_TIMEOUT_SECONDS)
+        _local.connection = connection
+    return connection
+
+
+def _forward(environ, start_response):
+    length = int(environ.get('CONTENT_LENGTH') or 0)
+    body = environ['wsgi.input'].read(length) if length else None
+    path = quote(environ.get('PATH_INFO', ''))
+    if environ.get('QUERY_STRING'):
+        path += '?' + environ['QUERY_STRING']
+    headers = {key[5:].replace('_', '-').title(): value
+               for key, value in environ.items() if key.startswith('HTTP_')}
+    if environ.get('CONTENT_TYPE'):
+        headers['Content-Type'] = environ['CONTENT_TYPE']
+
+    connection = _primary_connection()
+    try:
+        connection.request(environ['REQUEST_METHOD'], path, body=body, headers=headers)
+        response = connection.getresponse()
+        payload = response.read()
+    except (OSError, http.client.HTTPException):
+        connection.close()
+        _local.connection = None
+        start_response('503 Service Unavailable', [('Content-Type', 'application/json')])
+        return [json.dumps({'error': 'Primary is unavailable'}).encode()]
+
+    # Pin the session here too, so this replica does not wait for the stream to say so
+    written = response.getheader(VERSION_HEADER, '')
+    session_id = environ.get('HTTP_X_SESSION_ID')
+    if session_id and written.isdigit() and environ['REQUEST_METHOD'] not in READ_METHODS:
+        with _changed:
+            _pin(session_id, int(written))
+    start_response(f'{response.status} {response.reason}',
+                   [(name, value) for name, value in response.getheaders()
+                    if name.lower() not in HOP_BY_HOP_HEADERS])
+    return [payload]
+
+
+def replica_app(app):
+    # Serves reads locally while fresh enough for the caller; everything else goes to the primary
+    def application(environ, start_response):
+        if _can_serve(environ):
+            return app(environ, start_response)
+        return _forward(environ, start_response)
+    return application
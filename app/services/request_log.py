@@ -0,0 +1,88 @@
+import fcntl
+import json
+import os
+import queue
+import threading
+
+# Off by default; RECORD_REQUESTS=1 captures traffic for replay.py
+RECORD_ENABLED = os.environ.get('RECORD_REQUESTS', '0') == '1'
+RECORD_FILE = os.environ.get('RECORD_FILE', 'requests.jsonl')
+# 'hash' stores a sha256 of each request body, 'full' the body itself
+RECORD_BODIES = os.environ.get('RECORD_BODIES', 'hash')
+# Rotate to RECORD_FILE.1 .. RECORD_FILE.<RECORD_BACKUPS> past this size
+RECORD_MAX_BYTES = int(os.environ.get('RECORD_MAX_BYTES', str(100 * 1024 * 1024)))
+RECORD_BACKUPS = 5
+# Entries waiting for the writer; when full, new entries are dropped rather than
+# making requests wait on disk
+RECORD_QUEUE_SIZE = 10000
+RECORD_FLUSH_INTERVAL_SECONDS = 1.0
+
+_queue = queue.Queue(maxsize=RECORD_QUEUE_SIZE)
+_writer = None
+_writer_lock = threading.Lock()
+_stop_writer = threading.Event()
+dropped = 0
+
+
+def record(entry):
+    global dropped
+    try:
+        _queue.put_nowait(entry)
+    except queue.Full:
+        dropped += 1
+        return
+    start_writer()
+
+
+def _rotate():
+    for index in range(RECORD_BACKUPS - 1, 0, -1):
+        if os.path.exists(f'{RECORD_FILE}.{index}'):
+            os.replace(f'{RECORD_FILE}.{index}', f'{RECORD_FILE}.{index + 1}')
+    os.replace(RECORD_FILE, f'{RECORD_FILE}.1')
+
+
+def flush_entries():
+    entries = []
+    while True:
+        try:
+            entries.append(_queue.get_nowait())
+        except queue.Empty:
+            break
+    if not entries:
+        return 0
+    lines = ''.join(json.dumps(entry) + '\n' for entry in entries)
+    # serve.py workers share RECORD_FILE. Holding an exclusive lock on a sidecar file
+    # makes append, size check and rotation one step across processes, so two
+    # workers never both rotate, and nobody appends to a file being renamed.
+    with open(RECORD_FILE + '.lock', 'a') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        # One append per batch keeps the writer cheap and lines from interleaving
+        with open(RECORD_FILE, 'a') as file:
+            file.write(lines)
+            size = file.tell()
+        if size > RECORD_MAX_BYTES:
+            _rotate()
+    return len(entries)
+
+
+def _write_loop():
+    while not _stop_writer.wait(RECORD_FLUSH_INTERVAL_SECONDS):
+        flush_entries()
+
+
+def start_writer():
+    global _writer
+    if _writer is not None and _writer.is_alive():
+        return
+    with _writer_lock:
+        if _writer is not None and _writer.is_alive():
+            return
+        _stop_writer.clear()
+        _writer = threading.Thread(target=_write_loop, name='request-log-writer', daemon=True)
+        _writer.start()
+
+
+def stop_writer():
+    # Write out whatever is still queued
+    _stop_writer.set()
+    flush_entries()
@@ -0,0 +1,265 @@
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor, TimeoutError
+from app.services import data_service
+
+# Processes used for match scoring; 0 scores inline in the calling thread
+SCORING_WORKERS = int(os.environ.get('SCORING_WORKERS', str(os.cpu_count() or 1)))
+# Per-call limit before the request gives up on a result
+SCORING_TIMEOUT_SECONDS = 5.0
+# Calls queued or running on the pool at most; past it callers get ScoringBusy
+# instead of queueing behind work that would time out anyway
+SCORING_MAX_PENDING = int(os.environ.get('SCORING_MAX_PENDING', str(max(SCORING_WORKERS, 1) * 8)))
+# Quiet time after a feature write before the pool is rebuilt, so a burst of writes
+# costs one rebuild; scores use the previous features until the new pool is in
+SCORING_REBUILD_DELAY_SECONDS = float(os.environ.get('SCORING_REBUILD_DELAY', '2.0'))
+
+_pool = None
+_pool_lock = threading.Lock()
+_pending = threading.BoundedSemaphore(max(SCORING_MAX_PENDING, 1))
+
+# Set by _on_change for every write the features are built from, so writes to other
+# collections (posts, reactions, ledger entries...) leave the pool alone
+_features_stale = threading.Event()
+_rebuilder = None
+_stop_rebuilder = threading.Event()
+# userIds that were students when the features were last built
+_feature_students = frozenset()
+
+# Feature data preloaded into each pool process by _init_worker
+_worker_features = None
+
+
+def _on_change(op, collection, key, record):
+    # Features use only the ids of students, so a user write matters only when it makes
+    # or unmakes a student (balance updates and the like do not). Runs under
+    # data_lock, so it only flags the rebuild.
+    if collection == 'users':
+        is_student = op != 'delete' and record.get('role') == 'STUDENT'
+        if is_student != (record['userId'] in _feature_students):
+            _features_stale.set()
+    elif collection in ('properties', 'profiles'):
+        _features_stale.set()
+
+
+def _build_features():
+    # Streamed with iter_records so sharded users are read from the shards, not
+    # gathered into this process
+    global _feature_students
+    available_properties = [prop for prop in data_service.iter_records('properties') if prop['status'] == 'AVAILABLE']
+    students = {user['userId'] for user in data_service.iter_records('users') if user['role'] == 'STUDENT'}
+    _feature_students = frozenset(students)
+    # One pass over profiles instead of a profile scan per candidate
+    student_profiles = [(profile['userId'], profile) for profile in data_service.iter_records('profiles')
+                        if profile['userId'] in students]
+    return {'properties': available_properties, 'studentProfiles': student_profiles}
+
+
+def _init_worker(features):
+    global _worker_features
+    _worker_features = features
+
+
+def score_properties(profile, properties):
+    property_scores = []
+    for prop in properties:
+        # Calculate property match score based on student preferences
+        match_score = 0
+        match_factors = []
+
+        # Location matching
+        if profile.get('preferredLocation') == prop.get('location'):
+            match_score += 30
+            match_factors.append('location')
+
+        # Price matching - within budget
+        if profile.get('maxBudget', 0) >= prop.get('monthlyRent', 0):
+            match_score += 25
+            match_factors.append('price')
+
+        # Amenities matching
+        student_amenities = set(profile.get('desiredAmenities', []))
+        property_amenities = set(prop.get('amenities', []))
+        matching_amenities = student_amenities.intersection(property_amenities)
+        if matching_amenities:
+            match_score += min(len(matching_amenities) * 5, 20)
+            match_factors.append('amenities')
+
+        # Room type matching
+        if profile.get('preferredRoomType') == prop.get('roomType'):
+            match_score += 25
+            match_factors.append('room type')
+
+        property_scores.append({
+            'propertyId': prop['propertyId'],
+            'matchScore': match_score,
+            'matchFactors': match_factors
+        })
+
+    # Sort by match score descending
+    property_scores.sort(key=lambda x: x['matchScore'], reverse=True)
+    return property_scores
+
+
+def score_roommates(student_id, profile, student_profiles):
+    compatibility_scores = []
+    for other_id, other_profile in student_profiles:
+        if other_id == student_id:
+            continue
+
+        # Calculate compatibility score based on profile matching
+        compatibility_score = 0
+        compatibility_factors = []
+
+        # Lifestyle matching
+        if profile.get('lifestyle') == other_profile.get('lifestyle'):
+            compatibility_score += 25
+            compatibility_factors.append('lifestyle')
+
+        # Study habits matching
+        if profile.get('studyHabits') == other_profile.get('studyHabits'):
+            compatibility_score += 20
+            compatibility_factors.append('study habits')
+
+        # Sleep schedule matching
+        if profile.get('sleepSchedule') == other_profile.get('sleepSchedule'):
+            compatibility_score += 15
+            compatibility_factors.append('sleep schedule')
+
+        # Interests matching
+        student_interests = set(profile.get('interests', []))
+        other_interests = set(other_profile.get('interests', []))
+        matching_interests = student_interests.intersection(other_interests)
+        if matching_interests:
+            compatibility_score += min(len(matching_interests) * 5, 20)
+            compatibility_factors.append('interests')
+
+        # Cleanliness matching
+        if profile.get('cleanlinessLevel') == other_profile.get('cleanlinessLevel'):
+            compatibility_score += 20
+            compatibility_factors.append('cleanliness')
+
+        compatibility_scores.append({
+            'studentId': other_id,
+            'compatibilityScore': compatibility_score,
+            'compatibilityFactors': compatibility_factors
+        })
+
+    # Sort by compatibility score descending
+    compatibility_scores.sort(key=lambda x: x['compatibilityScore'], reverse=True)
+    return compatibility_scores
+
+
+def _pooled_property_scores(profile):
+    return score_properties(profile, _worker_features['properties'])
+
+
+def _pooled_roommate_scores(student_id, profile):
+    return score_roommates(student_id, profile, _worker_features['studentProfiles'])
+
+
+class ScoringBusy(Exception):
+    pass
+
+
+def _new_pool():
+    return ProcessPoolExecutor(max_workers=SCORING_WORKERS, initializer=_init_worker,
+                               initargs=(_build_features(),))
+
+
+def _rebuild_loop():
+    # Rebuild off the request path: wait for a feature write, let the burst settle,
+    # fork a pool with fresh features and swap it in. Calls already on the old pool
+    # finish there.
+    global _pool
+    while True:
+        _features_stale.wait()
+        if _stop_rebuilder.wait(SCORING_REBUILD_DELAY_SECONDS):
+            return
+        # Writes landing during the build flag another rebuild
+        _features_stale.clear()
+        pool = _new_pool()
+        with _pool_lock:
+            if _stop_rebuilder.is_set():
+                pool.shutdown(wait=False)
+                return
+            old, _pool = _pool, pool
+        if old is not None:
+            old.shutdown(wait=False)
+
+
+def _get_pool():
+    # The first call builds the pool; after that it is only ever replaced by the rebuilder
+    global _pool, _rebuilder
+    with _pool_lock:
+        if _pool is None:
+            _features_stale.clear()
+            _stop_rebuilder.clear()
+            _pool = _new_pool()
+        if _rebuilder is None or not _rebuilder.is_alive():
+            # Also restarts one that died on a failed build
+            _rebuilder = threading.Thread(target=_rebuild_loop, name='scoring-rebuilder', daemon=True)
+            _rebuilder.start()
+        return _pool
+
+
+def shutdown_pool(wait=False):
+    # Pass wait=True before the process exits so pool workers are not orphaned
+    global _pool
+    _stop_rebuilder.set()
+    _features_stale.set()
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=wait, cancel_futures=True)
+            _pool = None
+
+
+def _submit(function, *args):
+    # Raises ScoringBusy when SCORING_MAX_PENDING calls are already queued or running
+    if not _pending.acquire(blocking=False):
+        raise ScoringBusy
+    try:
+        future = _get_pool().submit(function, *args)
+    except BaseException:
+        _pending.release()
+        raise
+    future.add_done_callback(lambda _: _pending.release())
+    return future
+
+
+def _result(future):
+    # Raises concurrent.futures.TimeoutError if the pool does not answer in time; a
+    # call that has not started by then is dropped from the queue
+    try:
+        return future.result(timeout=SCORING_TIMEOUT_SECONDS)
+    except TimeoutError:
+        future.cancel()
+        raise
+
+
+def submit_property_scores(profile):
+    # Returns a Future so callers can wait, poll or wrap it for asyncio
+    if not SCORING_WORKERS:
+        future = Future()
+        future.set_result(score_properties(profile, _build_features()['properties']))
+        return future
+    return _submit(_pooled_property_scores, profile)
+
+
+def submit_roommate_scores(student_id, profile):
+    if not SCORING_WORKERS:
+        future = Future()
+        future.set_result(score_roommates(student_id, profile, _build_features()['studentProfiles']))
+        return future
+    return _submit(_pooled_roommate_scores, student_id, profile)
+
+
+def get_property_scores(profile):
+    return _result(submit_property_scores(profile))
+
+
+def get_roommate_scores(student_id, profile):
+    return _result(submit_roommate_scores(student_id, profile))
+
+
+data_service.add_change_listener(_on_change)
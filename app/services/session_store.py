@@ -0,0 +1,169 @@
+import heapq
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from app.services.data_service import iter_records, get_record, notify_change, add_change_listener
+from app.utils.timestamps import parse_timestamp
+
+SESSION_TTL = timedelta(hours=24)
+# How often the background sweeper drops expired sessions
+SWEEP_INTERVAL_SECONDS = 60
+# Resolved (session, user) pairs are reused for this long before revalidating
+PRINCIPAL_TTL_SECONDS = 5
+
+_sessions = {}
+# Min-heap of (expiresAt, sessionId); entries are only ever removed by the sweeper.
+# A session without an expiresAt never expires and is not on it.
+_expiry_heap = []
+# sessionId -> (monotonic deadline, session, user)
+_principals = {}
+_lock = threading.Lock()
+_loaded = False
+_sweeper = None
+_stop_sweeper = threading.Event()
+
+
+def _ensure_loaded():
+    # Seed from the data file on first use and start the sweeper
+    global _loaded
+    if _loaded:
+        return
+    # Loaded before taking _lock: change listeners take _lock under data_lock
+    seed = list(iter_records('sessions'))
+    with _lock:
+        if _loaded:
+            return
+        for session in seed:
+            expires_at = parse_timestamp(session.get('expiresAt'))
+            if expires_at is not None and expires_at <= datetime.now():
+                continue
+            _sessions[session['sessionId']] = dict(session)
+            if expires_at is not None:
+                heapq.heappush(_expiry_heap, (expires_at, session['sessionId']))
+        _loaded = True
+    start_sweeper()
+
+
+def find_user_by_username(username):
+    # A miss is an answer, never a reason to rebuild: every user write, replayed change
+    # and reload patches the username index along with the others, so a username
+    # PATCH is found under the new name and not under the old one
+    return get_record('users', 'username', username)
+
+
+def create_session(user_id):
+    _ensure_loaded()
+    now = datetime.now()
+    expires_at = now + SESSION_TTL
+    session = {
+        'sessionId': str(uuid.uuid4()),
+        'userId': user_id,
+        'createdAt': now.isoformat(),
+        'expiresAt': expires_at.isoformat(),
+        'status': 'ACTIVE'
+    }
+    with _lock:
+        _sessions[session['sessionId']] = session
+        heapq.heappush(_expiry_heap, (expires_at, session['sessionId']))
+    notify_change('create', 'sessions', 'sessionId', session)
+    return session
+
+
+def get_session(session_id):
+    _ensure_loaded()
+    return _sessions.get(session_id)
+
+
+def end_session(session_id):
+    # Ended sessions stay visible as INACTIVE until the sweeper reaches their expiry
+    _ensure_loaded()
+    with _lock:
+        session = _sessions.get(session_id)
+        if session:
+            session['status'] = 'INACTIVE'
+            session['updatedAt'] = datetime.now().isoformat()
+        _principals.pop(session_id, None)
+    if session:
+        notify_change('update', 'sessions', 'sessionId', dict(session))
+    return session
+
+
+def apply_session(session):
+    # Store a session created or changed in another process (a replication primary)
+    _ensure_loaded()
+    expires_at = parse_timestamp(session.get('expiresAt'))
+    with _lock:
+        if session['sessionId'] not in _sessions and expires_at is not None:
+            heapq.heappush(_expiry_heap, (expires_at, session['sessionId']))
+        _sessions[session['sessionId']] = dict(session)
+        _principals.pop(session['sessionId'], None)
+
+
+def sessions_snapshot():
+    _ensure_loaded()
+    with _lock:
+        return [dict(session) for session in _sessions.values()]
+
+
+def get_cached_principal(session_id):
+    cached = _principals.get(session_id)
+    if cached is None:
+        return None
+    if cached[0] < time.monotonic():
+        _principals.pop(session_id, None)
+        return None
+    return cached[1], cached[2]
+
+
+def cache_principal(session, user):
+    _principals[session['sessionId']] = (time.monotonic() + PRINCIPAL_TTL_SECONDS, session, user)
+
+
+def invalidate_principals(user_id):
+    with _lock:
+        for session_id in [sid for sid, cached in _principals.items() if cached[2]['userId'] == user_id]:
+            _principals.pop(session_id, None)
+
+
+def _on_change(op, collection, key, record):
+    # Every user write, including ledger balance updates and replayed changes, drops
+    # the cached principals of that user so a status, role or balance change is seen
+    # on the next request
+    if collection == 'users' and _principals:
+        invalidate_principals(record['userId'])
+
+
+def sweep_expired(now=None):
+    now = now or datetime.now()
+    expired = 0
+    with _lock:
+        while _expiry_heap and _expiry_heap[0][0] <= now:
+            _, session_id = heapq.heappop(_expiry_heap)
+            _principals.pop(session_id, None)
+            if _sessions.pop(session_id, None) is not None:
+                expired += 1
+    return expired
+
+
+def _sweep_loop():
+    while not _stop_sweeper.wait(SWEEP_INTERVAL_SECONDS):
+        sweep_expired()
+
+
+def start_sweeper():
+    global _sweeper
+    if _sweeper is not None and _sweeper.is_alive():
+        return
+    _stop_sweeper.clear()
+    _sweeper = threading.Thread(target=_sweep_loop, name='session-sweeper', daemon=True)
+    _sweeper.start()
+
+
+def stop_sweeper():
+    _stop_sweeper.set()
+    if _sweeper is not None and _sweeper.is_alive():
+        _sweeper.join(timeout=1)
+
+
+add_change_listener(_on_change)
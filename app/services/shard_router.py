@@ -0,0 +1,256 @@
+import heapq
+import itertools
+import multiprocessing
+import os
+import threading
+import zlib
+from multiprocessing.connection import Client
+from operator import itemgetter
+from app.services import shard_server
+from app.utils.ids import DuplicateIdError, highest_id
+
+# STORAGE_BACKEND=sharded keeps the collections below in SHARD_COUNT local shard
+# processes, reached over Unix sockets; everything else stays in this process
+SHARD_COUNT = int(os.environ.get('SHARD_COUNT', '4'))
+SHARD_SOCKET_DIR = os.environ.get('SHARD_SOCKET_DIR', 'shards')
+# collection -> (id field, field hashed to pick the shard)
+SHARDED_COLLECTIONS = {
+    'users': ('userId', 'userId'),
+    'tokenActivities': ('activityId', 'userId'),
+    'posts': ('postId', 'postId'),
+}
+# Records per message when handing the data file to the shards
+LOAD_BATCH_SIZE = 10000
+# Shard holding the id sequences of the sharded collections, so every frontend
+# process draws ids from the same place
+SEQUENCE_SHARD = 0
+
+_authkey = None
+_owner_pid = None
+_processes = []
+_local = threading.local()
+
+
+def shard_index(value):
+    return zlib.crc32(str(value).encode()) % SHARD_COUNT
+
+
+def _address(index):
+    return os.path.join(SHARD_SOCKET_DIR, f'shard-{index}.sock')
+
+
+def _connections():
+    # One connection per shard per thread, and per process so forked workers never share one
+    connections = getattr(_local, 'connections', None)
+    if connections is None or _local.pid != os.getpid():
+        connections = [Client(_address(index), family='AF_UNIX', authkey=_authkey)
+                       for index in range(SHARD_COUNT)]
+        _local.connections, _local.pid = connections, os.getpid()
+    return connections
+
+
+def _close_connections():
+    for connection in getattr(_local, 'connections', None) or []:
+        connection.close()
+    _local.connections = None
+
+
+def _call_each(requests):
+    # requests are (shard index, op, args). Everything is sent before any reply is read
+    # so the shards work in parallel; every reply is read before raising so a failure
+    # cannot leave a stale reply on a connection.
+    connections = _connections()
+    try:
+        for index, op, args in requests:
+            connections[index].send((op, args))
+        replies = [connections[index].recv() for index, _, _ in requests]
+    except (OSError, EOFError):
+        _close_connections()
+        raise
+    for (index, op, _), (status, result) in zip(requests, replies):
+        if status == 'duplicate':
+            raise DuplicateIdError(result)
+        if status != 'ok':
+            raise RuntimeError(f'Shard {index} failed {op}: {result}')
+    return [result for _, result in replies]
+
+
+def _call(indexes, op, *args):
+    return _call_each([(index, op, args) for index in indexes])
+
+
+def _shards_for(collection, field, value):
+    # Lookups on the shard key go to one shard, anything else to all of them
+    if field == SHARDED_COLLECTIONS[collection][1]:
+        return [shard_index(value)]
+    return range(SHARD_COUNT)
+
+
+def start_shards():
+    # Fork the shard processes. Call before parsing the data file so they do not
+    # inherit a copy of it.
+    global _authkey, _owner_pid
+    _authkey = os.urandom(16)
+    _owner_pid = os.getpid()
+    os.makedirs(SHARD_SOCKET_DIR, exist_ok=True)
+    context = multiprocessing.get_context('fork')
+    for index in range(SHARD_COUNT):
+        address = _address(index)
+        if os.path.exists(address):
+            os.unlink(address)
+        ready = context.Event()
+        process = context.Process(target=shard_server.serve, args=(address, _authkey, ready),
+                                  name=f'shard-{index}', daemon=True)
+        process.start()
+        ready.wait()
+        _processes.append(process)
+
+
+def distribute(data):
+    # Move the sharded collections of a parsed data file into the shards. A record's
+    # seq is its 1-based position in the file (as with sqlite's seq column), which is
+    # the order the list endpoints page in.
+    for collection, (id_field, shard_key) in SHARDED_COLLECTIONS.items():
+        records = data.pop(collection, [])
+        partitions = [[] for _ in range(SHARD_COUNT)]
+        for seq, record in enumerate(records, 1):
+            partitions[shard_index(record[shard_key])].append((seq, record[id_field], record))
+        _call([SEQUENCE_SHARD], 'seed_ids', collection, *highest_id(record[id_field] for record in records))
+        for start in range(0, max(len(partition) for partition in partitions), LOAD_BATCH_SIZE):
+            _call_each([(index, 'load', (collection, partition[start:start + LOAD_BATCH_SIZE]))
+                        for index, partition in enumerate(partitions)])
+    # Workers forked from here open their own
+    _close_connections()
+    return ShardedCollections(data)
+
+
+def stop_shards():
+    if os.getpid() != _owner_pid:
+        return
+    for process in _processes:
+        process.terminate()
+    for index, process in enumerate(_processes):
+        process.join()
+        if os.path.exists(_address(index)):
+            os.unlink(_address(index))
+    _processes.clear()
+
+
+def get_by(collection, field, value):
+    id_field = SHARDED_COLLECTIONS[collection][0]
+    found = [hit for hit in _call(_shards_for(collection, field, value), 'get_by', collection, field, value, id_field)
+             if hit is not None]
+    # The earliest match, as a scan of the unsharded collection would find
+    return min(found, key=itemgetter(0))[1] if found else None
+
+
+def get_many(collection, field, values):
+    # value -> record for every value that exists
+    id_field, shard_key = SHARDED_COLLECTIONS[collection]
+    if field == shard_key:
+        by_shard = {}
+        for value in values:
+            by_shard.setdefault(shard_index(value), []).append(value)
+        requests = [(index, 'get_many', (collection, field, shard_values, id_field))
+                    for index, shard_values in by_shard.items()]
+    else:
+        requests = [(index, 'get_many', (collection, field, values, id_field)) for index in range(SHARD_COUNT)]
+    found = {}
+    for result in _call_each(requests):
+        found.update(result)
+    return found
+
+
+def find_page(collection, filters, begin, count):
+    # Same contract as paginate_data: begin is 1-based; returns (page, total matches)
+    offset = (begin - 1) if begin > 0 else 0
+    shard_key = SHARDED_COLLECTIONS[collection][1]
+    if shard_key in filters:
+        total, page = _call([shard_index(filters[shard_key])], 'find_page', collection, filters, offset, count)[0]
+        return [record for _, record in page], total
+    # Each shard returns its first offset + count matches in seq order; the page is
+    # cut from their merge and the total is the sum of the shard totals
+    results = _call(range(SHARD_COUNT), 'find_page', collection, filters, 0, offset + count)
+    merged = heapq.merge(*(page for _, page in results), key=itemgetter(0))
+    return [record for _, record in itertools.islice(merged, offset, offset + count)], sum(total for total, _ in results)
+
+
+def all_records(collection):
+    merged = heapq.merge(*_call(range(SHARD_COUNT), 'all_records', collection), key=itemgetter(0))
+    return [record for _, record in merged]
+
+
+def scan(collection, after, limit):
+    # The next limit records after seq across all shards, merged in seq order
+    merged = heapq.merge(*_call(range(SHARD_COUNT), 'scan', collection, after, limit), key=itemgetter(0))
+    return list(itertools.islice(merged, limit))
+
+
+def insert(collection, record):
+    # Raises DuplicateIdError if the shard already holds the id
+    id_field, shard_key = SHARDED_COLLECTIONS[collection]
+    _call([shard_index(record[shard_key])], 'insert', collection, record[id_field], record)
+
+
+def allocate_ids(collection, count, time_based=False):
+    return _call([SEQUENCE_SHARD], 'allocate_ids', collection, count, time_based)[0]
+
+
+def update(collection, field, value, apply):
+    # Optimistic read-modify-write: the shard swaps the record only if nobody changed
+    # it since it was read, otherwise apply runs again on the newer copy. apply(current)
+    # returns the new record; it must not change the shard key.
+    return _swap(collection, field, value, apply, None, None)
+
+
+def update_and_insert(collection, field, value, apply, insert_collection, record):
+    # update() whose swap also inserts record, in the same shard operation, so both land
+    # or neither does. record must hash to the shard of the record being updated (a
+    # user and their tokenActivities share the userId shard key).
+    return _swap(collection, field, value, apply, insert_collection, record)
+
+
+def _swap(collection, field, value, apply, insert_collection, record):
+    id_field, shard_key = SHARDED_COLLECTIONS[collection]
+    current = get_by(collection, field, value)
+    while current is not None:
+        index = shard_index(current[shard_key])
+        companion = None
+        if insert_collection is not None:
+            insert_id_field, insert_shard_key = SHARDED_COLLECTIONS[insert_collection]
+            if shard_index(record[insert_shard_key]) != index:
+                raise ValueError(f'{insert_collection} record is not on the shard of its {collection} record')
+            companion = (insert_collection, record[insert_id_field], record)
+        updated = apply(current)
+        applied, current = _call([index], 'update', collection, current[id_field], current, updated, companion)[0]
+        if applied:
+            return updated
+    return None
+
+
+def delete(collection, record_id):
+    # False if no shard held the record
+    id_field = SHARDED_COLLECTIONS[collection][0]
+    return any(removed is not None for removed in
+               _call(_shards_for(collection, id_field, record_id), 'delete', collection, record_id))
+
+
+class ShardedCollections(dict):
+    # The collections kept in this process. A sharded collection is gathered from the
+    # shards the first time a handler scans it and kept as a working copy after that.
+    def __missing__(self, collection):
+        if collection not in SHARDED_COLLECTIONS:
+            raise KeyError(collection)
+        records = all_records(collection)
+        self[collection] = records
+        return records
+
+    def get(self, collection, default=None):
+        if collection in self or collection in SHARDED_COLLECTIONS:
+            return self[collection]
+        return default
+
+    def setdefault(self, collection, default=None):
+        if collection in self or collection in SHARDED_COLLECTIONS:
+            return self[collection]
+        return super().setdefault(collection, default)
@@ -0,0 +1,188 @@
+import bisect
+import threading
+import time
+from operator import itemgetter
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Listener
+from app.utils.ids import DuplicateIdError, format_ids, next_time_start, format_time_ids
+
+# Runs inside a shard process started by shard_router.start_shards. Each shard keeps
+# its slice of the sharded collections as {id: record} dicts in seq order, with the
+# seq of every record alongside so the router can merge pages across shards.
+
+_records = {}
+_seqs = {}
+# collection -> [(seq, id)] in seq order for scans; deleted ids stay until compacted
+_order = {}
+_lock = threading.Lock()
+_last_seq = 0
+# name -> [prefix, last id number handed out]; only the router's sequence shard uses it
+_sequences = {}
+
+
+def _next_seq():
+    # Time-based so records inserted through any frontend process sort after the
+    # loaded ones (whose seq is their position in the data file) and roughly in
+    # creation order across shards
+    global _last_seq
+    _last_seq = max(time.time_ns(), _last_seq + 1)
+    return _last_seq
+
+
+def _matches(record, filters):
+    return all(record.get(field) == value for field, value in filters.items())
+
+
+def load(collection, entries):
+    # entries are (seq, id, record) from the data file
+    records = _records.setdefault(collection, {})
+    seqs = _seqs.setdefault(collection, {})
+    order = _order.setdefault(collection, [])
+    for seq, record_id, record in entries:
+        records[record_id] = record
+        seqs[record_id] = seq
+        order.append((seq, record_id))
+    return len(entries)
+
+
+def get_by(collection, field, value, id_field):
+    # (seq, record) for the first match, or None
+    records, seqs = _records.get(collection, {}), _seqs.get(collection, {})
+    if field == id_field:
+        record = records.get(value)
+        return (seqs[value], record) if record is not None else None
+    for record_id, record in records.items():
+        if record.get(field) == value:
+            return seqs[record_id], record
+    return None
+
+
+def get_many(collection, field, values, id_field):
+    records = _records.get(collection, {})
+    if field == id_field:
+        return {value: records[value] for value in values if value in records}
+    wanted = set(values)
+    return {record[field]: record for record in records.values() if record.get(field) in wanted}
+
+
+def find_page(collection, filters, offset, limit):
+    # (total matches, [(seq, record)] for matches offset .. offset + limit)
+    records, seqs = _records.get(collection, {}), _seqs.get(collection, {})
+    page = []
+    total = 0
+    for record_id, record in records.items():
+        if not _matches(record, filters):
+            continue
+        if offset <= total < offset + limit:
+            page.append((seqs[record_id], record))
+        total += 1
+    return total, page
+
+
+def all_records(collection):
+    seqs = _seqs.get(collection, {})
+    return [(seqs[record_id], record) for record_id, record in _records.get(collection, {}).items()]
+
+
+def scan(collection, after, limit):
+    # [(seq, record)] for up to limit records with seq > after, in seq order
+    records, seqs = _records.get(collection, {}), _seqs.get(collection, {})
+    order = _order.get(collection, [])
+    if len(order) > 2 * len(records):
+        # Mostly deleted entries; rebuild from the live records
+        order[:] = sorted((seq, record_id) for record_id, seq in seqs.items())
+    page = []
+    for seq, record_id in order[bisect.bisect_right(order, after, key=itemgetter(0)):]:
+        if seqs.get(record_id) == seq:
+            page.append((seq, records[record_id]))
+            if len(page) == limit:
+                break
+    return page
+
+
+def insert(collection, record_id, record):
+    # Ids are unique per shard; the router allocates them from one sequence, which keeps
+    # them unique across shards for collections not sharded by id
+    records = _records.setdefault(collection, {})
+    if record_id in records:
+        raise DuplicateIdError(f'{collection} already holds {record_id}')
+    seq = _next_seq()
+    records[record_id] = record
+    _seqs.setdefault(collection, {})[record_id] = seq
+    _order.setdefault(collection, []).append((seq, record_id))
+
+
+def update(collection, record_id, expected, updated, companion=None):
+    # Compare-and-swap: applied only if the stored record still equals expected.
+    # Returns (applied, stored record); the record keeps its seq and its slot.
+    # companion is an optional (collection, id, record) inserted with the swap.
+    records = _records.get(collection, {})
+    current = records.get(record_id)
+    if current is None or current != expected:
+        return False, current
+    if companion is not None:
+        insert(*companion)
+    records[record_id] = updated
+    return True, updated
+
+
+def delete(collection, record_id):
+    _seqs.get(collection, {}).pop(record_id, None)
+    return _records.get(collection, {}).pop(record_id, None)
+
+
+def seed_ids(collection, prefix, last):
+    _sequences[collection] = [prefix, last]
+
+
+def allocate_ids(collection, count, time_based):
+    # Same scheme as sqlite_store.allocate_ids; time-based ids keep a sequence of their own
+    name = f'{collection}/time' if time_based else collection
+    prefix, last = _sequences.get(name, ('', 0))
+    start = next_time_start(last) if time_based else last + 1
+    _sequences[name] = [prefix, start + count - 1]
+    return format_time_ids(start, count) if time_based else format_ids(prefix, start, count)
+
+
+OPERATIONS = {
+    'load': load,
+    'get_by': get_by,
+    'get_many': get_many,
+    'find_page': find_page,
+    'all_records': all_records,
+    'scan': scan,
+    'insert': insert,
+    'update': update,
+    'delete': delete,
+    'seed_ids': seed_ids,
+    'allocate_ids': allocate_ids,
+}
+
+
+def _handle(connection):
+    with connection:
+        while True:
+            try:
+                op, args = connection.recv()
+            except (EOFError, OSError):
+                return
+            try:
+                # One operation at a time; the shard is a single process anyway
+                with _lock:
+                    reply = ('ok', OPERATIONS[op](*args))
+            except DuplicateIdError as error:
+                reply = ('duplicate', str(error))
+            except Exception as error:
+                reply = ('error', f'{type(error).__name__}: {error}')
+            connection.send(reply)
+
+
+def serve(address, authkey, ready):
+    with Listener(address, family='AF_UNIX', authkey=authkey) as listener:
+        ready.set()
+        while True:
+            try:
+                connection = listener.accept()
+            except (OSError, AuthenticationError):
+                continue
+            threading.Thread(target=_handle, args=(connection,), daemon=True).start()
@@ -0,0 +1,281 @@
+import json
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from app.utils.ids import DuplicateIdError, highest_id, format_ids, next_time_start, format_time_ids
+
+SQLITE_FILE = os.environ.get('SQLITE_FILE', 'data.sqlite3')
+
+# collection -> (id field, fields stored as indexed columns). The columns cover the
+# foreign keys and the equality filters used by the list endpoints; any other field
+# can still be filtered on through json_extract, just without an index.
+COLLECTION_COLUMNS = {
+    'users': ('userId', ['username', 'role', 'status']),
+    'properties': ('propertyId', ['landlordId', 'status', 'propertyType']),
+    'mediaAssets': ('assetId', ['propertyId', 'assetType']),
+    'posts': ('postId', ['userId', 'status', 'postType']),
+    'comments': ('commentId', ['postId', 'userId', 'status']),
+    'reactions': ('reactionId', ['postId', 'userId']),
+    'applications': ('applicationId', ['userId', 'propertyId', 'status']),
+    'documents': ('documentId', ['applicationId', 'documentType']),
+    'tokenActivities': ('activityId', ['userId', 'activityType']),
+    'profiles': ('profileId', ['userId']),
+    'sessions': ('sessionId', ['userId']),
+    'property_details': ('detailsId', ['propertyId']),
+    'property_media': ('mediaId', ['propertyId']),
+    'property_listings': ('listingId', ['propertyId']),
+    'property_reviews': ('reviewId', ['propertyId']),
+    'property_amenities': ('amenityId', ['propertyId']),
+}
+# collection -> columns that are unique together. Enforced by SQLite rather than a
+# lookup before the insert, so it holds across every process sharing the file.
+UNIQUE_COLUMNS = {
+    'reactions': ('postId', 'userId'),
+}
+
+# SQLite limits bound parameters per statement; batch lookups are chunked below it
+MAX_PARAMETERS = 500
+
+_local = threading.local()
+_schema_lock = threading.Lock()
+_schema_ready = set()
+
+
+def connection():
+    # One connection per thread (and per process, so forked workers never share one).
+    # The sqlite3 module caches prepared statements per connection by SQL text.
+    conn = getattr(_local, 'conn', None)
+    if conn is None or _local.pid != os.getpid() or _local.path != SQLITE_FILE:
+        conn = sqlite3.connect(SQLITE_FILE, isolation_level=None, cached_statements=512)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute('PRAGMA busy_timeout=5000')
+        _local.conn, _local.pid, _local.path = conn, os.getpid(), SQLITE_FILE
+        _ensure_schema(conn)
+    return conn
+
+
+def _ensure_schema(conn):
+    with _schema_lock:
+        if SQLITE_FILE in _schema_ready:
+            return
+        for collection, (_, columns) in COLLECTION_COLUMNS.items():
+            column_sql = ''.join(f', "{column}" TEXT' for column in columns)
+            # seq keeps insertion order, which is the order the list endpoints page in
+            conn.execute(f'CREATE TABLE IF NOT EXISTS "{collection}" '
+                         f'(seq INTEGER PRIMARY KEY AUTOINCREMENT, id TEXT UNIQUE NOT NULL, doc TEXT NOT NULL{column_sql})')
+            for column in columns:
+                conn.execute(f'CREATE INDEX IF NOT EXISTS "ix_{collection}_{column}" '
+                             f'ON "{collection}" ("{column}", seq)')
+        # An index rather than a table constraint, so files created before it get it too
+        for collection, columns in UNIQUE_COLUMNS.items():
+            column_sql = ', '.join(f'"{column}"' for column in columns)
+            conn.execute(f'CREATE UNIQUE INDEX IF NOT EXISTS "ux_{collection}" ON "{collection}" ({column_sql})')
+        # Id allocation state shared by every process using the file; see allocate_ids
+        conn.execute('CREATE TABLE IF NOT EXISTS id_sequences '
+                     '(name TEXT PRIMARY KEY, prefix TEXT NOT NULL, last INTEGER NOT NULL)')
+        _schema_ready.add(SQLITE_FILE)
+
+
+@contextmanager
+def transaction():
+    # BEGIN IMMEDIATE ... COMMIT around the block, which receives the connection.
+    # IMMEDIATE takes the write lock up front, so a read-check-write inside cannot be
+    # interleaved by another process. Nested blocks join the outer transaction.
+    conn = connection()
+    if conn.in_transaction:
+        yield conn
+        return
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        yield conn
+    except BaseException:
+        conn.execute('ROLLBACK')
+        raise
+    conn.execute('COMMIT')
+
+
+def _column(collection, field):
+    id_field, columns = COLLECTION_COLUMNS[collection]
+    if field == id_field:
+        return 'id'
+    if field in columns:
+        return f'"{field}"'
+    return f"json_extract(doc, '$.{field}')"
+
+
+def _row(collection, record):
+    id_field, columns = COLLECTION_COLUMNS[collection]
+    return [record[id_field], json.dumps(record)] + [record.get(column) for column in columns]
+
+
+def _where(collection, filters):
+    # Fields are sorted so the same filter set always yields the same, cached, statement
+    fields = sorted(filters)
+    clause = ' AND '.join(f'{_column(collection, field)} = ?' for field in fields)
+    return (f' WHERE {clause}' if clause else ''), [filters[field] for field in fields]
+
+
+def get_by(collection, field, value):
+    row = connection().execute(f'SELECT doc FROM "{collection}" WHERE {_column(collection, field)} = ? '
+                               f'ORDER BY seq LIMIT 1', (value,)).fetchone()
+    return json.loads(row[0]) if row else None
+
+
+def get_many(collection, field, values):
+    # value -> record for every value that exists
+    found = {}
+    column = _column(collection, field)
+    for start in range(0, len(values), MAX_PARAMETERS):
+        chunk = values[start:start + MAX_PARAMETERS]
+        placeholders = ','.join('?' * len(chunk))
+        for (doc,) in connection().execute(f'SELECT doc FROM "{collection}" WHERE {column} IN ({placeholders})', chunk):
+            record = json.loads(doc)
+            found[record[field]] = record
+    return found
+
+
+def find_page(collection, filters, begin, count):
+    # Same contract as paginate_data: begin is 1-based; returns (page, total matches)
+    where, params = _where(collection, filters)
+    conn = connection()
+    total = conn.execute(f'SELECT COUNT(*) FROM "{collection}"{where}', params).fetchone()[0]
+    offset = (begin - 1) if begin > 0 else 0
+    rows = conn.execute(f'SELECT doc FROM "{collection}"{where} ORDER BY seq LIMIT ? OFFSET ?',
+                        params + [count, offset]).fetchall()
+    return [json.loads(doc) for (doc,) in rows], total
+
+
+def all_records(collection):
+    return [json.loads(doc) for (doc,) in
+            connection().execute(f'SELECT doc FROM "{collection}" ORDER BY seq')]
+
+
+def scan(collection, after, limit):
+    # [(seq, record)] for up to limit records with seq > after, in seq order
+    return [(seq, json.loads(doc)) for seq, doc in
+            connection().execute(f'SELECT seq, doc FROM "{collection}" WHERE seq > ? ORDER BY seq LIMIT ?',
+                                 (after, limit))]
+
+
+def _insert_sql(collection):
+    _, columns = COLLECTION_COLUMNS[collection]
+    column_sql = ''.join(f', "{column}"' for column in columns)
+    placeholders = ', ?' * len(columns)
+    return f'INSERT INTO "{collection}" (id, doc{column_sql}) VALUES (?, ?{placeholders})'
+
+
+def insert(collection, record):
+    _insert(connection(), collection, record)
+
+
+def _insert(conn, collection, record):
+    try:
+        conn.execute(_insert_sql(collection), _row(collection, record))
+    except sqlite3.IntegrityError as error:
+        unique = UNIQUE_COLUMNS.get(collection)
+        if unique and f'{collection}.{unique[0]}' in str(error):
+            values = '/'.join(str(record.get(column)) for column in unique)
+            raise DuplicateIdError(f'{collection} already holds {"/".join(unique)} {values}') from error
+        id_field = COLLECTION_COLUMNS[collection][0]
+        raise DuplicateIdError(f'{collection} already holds {id_field} {record[id_field]}') from error
+
+
+def insert_many(collection, records):
+    with transaction() as conn:
+        conn.executemany(_insert_sql(collection), (_row(collection, record) for record in records))
+
+
+def update(collection, field, value, apply):
+    # Read-modify-write in one IMMEDIATE transaction so concurrent writers, including
+    # other processes, cannot interleave. apply(current) returns the new record; if it
+    # raises, nothing is written.
+    with transaction() as conn:
+        return _update(conn, collection, field, value, apply)
+
+
+def update_and_insert(collection, field, value, apply, insert_collection, record):
+    # update() and insert() in one transaction: both are written or neither is
+    with transaction() as conn:
+        updated = _update(conn, collection, field, value, apply)
+        if updated is not None:
+            _insert(conn, insert_collection, record)
+    return updated
+
+
+def _update(conn, collection, field, value, apply):
+    _, columns = COLLECTION_COLUMNS[collection]
+    row = conn.execute(f'SELECT seq, doc FROM "{collection}" WHERE {_column(collection, field)} = ? '
+                       f'ORDER BY seq LIMIT 1', (value,)).fetchone()
+    if row is None:
+        return None
+    updated = apply(json.loads(row[1]))
+    assignments = ''.join(f', "{column}" = ?' for column in columns)
+    conn.execute(f'UPDATE "{collection}" SET id = ?, doc = ?{assignments} WHERE seq = ?',
+                 _row(collection, updated) + [row[0]])
+    return updated
+
+
+def allocate_ids(collection, count, time_based=False):
+    # The next count ids for a collection from a sequence row in id_sequences, so
+    # processes sharing the file never hand out the same id. A collection's sequence
+    # starts from its highest existing id the first time it is used; time-based ids
+    # keep a sequence of their own.
+    name = f'{collection}/time' if time_based else collection
+    with transaction() as conn:
+        row = conn.execute('SELECT prefix, last FROM id_sequences WHERE name = ?', (name,)).fetchone()
+        if row is not None:
+            prefix, last = row
+        elif time_based:
+            prefix, last = '', 0
+        else:
+            prefix, last = highest_id(record_id for (record_id,) in conn.execute(f'SELECT id FROM "{collection}"'))
+        start = next_time_start(last) if time_based else last + 1
+        conn.execute('INSERT OR REPLACE INTO id_sequences (name, prefix, last) VALUES (?, ?, ?)',
+                     (name, prefix, start + count - 1))
+    return format_time_ids(start, count) if time_based else format_ids(prefix, start, count)
+
+
+def delete(collection, record_id):
+    # False if there was no such row, e.g. another process deleted it first
+    return connection().execute(f'DELETE FROM "{collection}" WHERE id = ?', (record_id,)).rowcount > 0
+
+
+def migrate(json_path):
+    # One-shot import of a JSON data file; collections are replaced, not merged
+    with open(json_path, 'r') as file:
+        data = json.load(file)
+    conn = connection()
+    counts = {}
+    for collection, records in data.items():
+        if collection not in COLLECTION_COLUMNS:
+            continue
+        conn.execute(f'DELETE FROM "{collection}"')
+        # Restart the collection's id sequence from the imported ids
+        conn.execute('DELETE FROM id_sequences WHERE name IN (?, ?)', (collection, f'{collection}/time'))
+        insert_many(collection, records)
+        counts[collection] = len(records)
+    conn.execute('ANALYZE')
+    return counts
+
+
+class SqliteCollections(dict):
+    # Stands in for the parsed JSON document. Collections with a table are never copied
+    # into it: a process-local copy goes stale the moment another process writes, so
+    # they are read through data_service (get_record, find_page, iter_records) and
+    # touching one here raises. Collections without a table are plain lists.
+    def __missing__(self, collection):
+        if collection in COLLECTION_COLUMNS:
+            raise KeyError(f'{collection} is stored in SQLite; query it through data_service')
+        return super().setdefault(collection, [])
+
+    def get(self, collection, default=None):
+        if collection in COLLECTION_COLUMNS:
+            return self[collection]
+        return super().get(collection, default)
+
+    def setdefault(self, collection, default=None):
+        if collection in COLLECTION_COLUMNS:
+            return self[collection]
+        return super().setdefault(collection, default)
@@ -0,0 +1,97 @@
+import threading
+import zlib
+from app.services.data_service import fold_counts
+
+VIEW_COUNTER_SHARDS = 16
+# How often pending views are folded into posts and journaled
+VIEW_FLUSH_INTERVAL_SECONDS = 5
+
+# Each shard is [lock, {postId: pending views}, {postId: views being flushed}]. A flush
+# swaps the pending dict out under the lock and folds it with the lock released.
+_shards = [[threading.Lock(), {}, {}] for _ in range(VIEW_COUNTER_SHARDS)]
+# One flush at a time, the flusher thread's or stop_flusher's
+_flush_lock = threading.Lock()
+_flusher = None
+_flusher_lock = threading.Lock()
+_stop_flusher = threading.Event()
+# When set, flushed counts are passed to forward_views({postId: views}) instead of being
+# folded into posts here; replicas hand them to the replication primary
+forward_views = None
+
+
+def _shard(post_id):
+    return _shards[zlib.crc32(str(post_id).encode()) % VIEW_COUNTER_SHARDS]
+
+
+def record_view(post_id, views=1):
+    shard = _shard(post_id)
+    with shard[0]:
+        shard[1][post_id] = shard[1].get(post_id, 0) + views
+    start_flusher()
+
+
+def pending_views(post_id):
+    # Views recorded but not yet folded into the post, including a flush in progress
+    lock, pending, flushing = _shard(post_id)
+    with lock:
+        return pending.get(post_id, 0) + flushing.get(post_id, 0)
+
+
+def live_view_count(post):
+    # Persisted count plus views not yet flushed
+    return post.get('viewCount', 0) + pending_views(post['postId'])
+
+
+def _take_pending(shard):
+    with shard[0]:
+        taken, shard[1] = shard[1], {}
+        shard[2] = taken
+    return taken
+
+
+def flush_views():
+    with _flush_lock:
+        if forward_views is not None:
+            collected = {}
+            for shard in _shards:
+                collected.update(_take_pending(shard))
+                with shard[0]:
+                    shard[2] = {}
+            if collected:
+                forward_views(collected)
+            return len(collected)
+
+        updated = 0
+        for shard in _shards:
+            # Counts leave flushing only once folded into the post, so live_view_count can
+            # briefly over-count a flushing post but never drops its views. record_view
+            # only waits for the swap, never for the writes.
+            for post_id, views in list(_take_pending(shard).items()):
+                if fold_counts('posts', 'postId', post_id, {'viewCount': views}) is not None:
+                    updated += 1
+                with shard[0]:
+                    del shard[2][post_id]
+        return updated
+
+
+def _flush_loop():
+    while not _stop_flusher.wait(VIEW_FLUSH_INTERVAL_SECONDS):
+        flush_views()
+
+
+def start_flusher():
+    global _flusher
+    if _flusher is not None and _flusher.is_alive():
+        return
+    with _flusher_lock:
+        if _flusher is not None and _flusher.is_alive():
+            return
+        _stop_flusher.clear()
+        _flusher = threading.Thread(target=_flush_loop, name='view-counter-flusher', daemon=True)
+        _flusher.start()
+
+
+def stop_flusher():
+    # Flush what is pending so a shutdown does not drop views
+    _stop_flusher.set()
+    flush_views()
@@ -0,0 +1,31 @@
+MAX_BATCH_SIZE = 500
+
+
+def parse_ids(ids_param):
+    # "a,b,c" -> ['a', 'b', 'c'] with blanks and duplicates dropped, in first-seen order.
+    # Returns None when there are more than MAX_BATCH_SIZE ids, before deduplicating them.
+    items = (ids_param or '').split(',')
+    if len(items) > MAX_BATCH_SIZE:
+        return None
+    return list(dict.fromkeys(item_id for item_id in map(str.strip, items) if item_id))
+
+
+def get_bulk_items(payload):
+    # Returns (items, error) for a bulk request body of the form {"items": [...]}
+    if not isinstance(payload, dict) or not isinstance(payload.get('items'), list):
+        return None, 'Request body must include an items list'
+    items = payload['items']
+    if not items:
+        return None, 'items must not be empty'
+    if len(items) > MAX_BATCH_SIZE:
+        return None, f'Batch size cannot exceed {MAX_BATCH_SIZE} items'
+    return items, None
+
+
+def bulk_summary(results):
+    succeeded = sum(1 for result in results if result['status'] == 201)
+    return {
+        'results': results,
+        'successCount': succeeded,
+        'failureCount': len(results) - succeeded
+    }
@@ -0,0 +1,42 @@
+import re
+import time
+
+_trailing_digits = re.compile(r'^(.*?)(\d+)$')
+
+
+class DuplicateIdError(ValueError):
+    # An insert carried an id (or unique key) its collection already holds
+    pass
+
+
+def split_id(value):
+    # 'post1600' -> ('post', 1600); ids without a numeric suffix -> None
+    match = _trailing_digits.match(str(value))
+    if not match:
+        return None
+    return match.group(1), int(match.group(2))
+
+
+def highest_id(values):
+    # (prefix, number) of the id with the largest numeric suffix, ('', 0) if there is none,
+    # so new ids continue the dataset's own scheme ('post1600' -> 'post1601')
+    prefix, highest = '', 0
+    for value in values:
+        parts = split_id(value)
+        if parts and parts[1] > highest:
+            prefix, highest = parts
+    return prefix, highest
+
+
+def format_ids(prefix, start, count):
+    return [f'{prefix}{n}' for n in range(start, start + count)]
+
+
+def next_time_start(last):
+    # 13-digit milliseconds followed by a 4-digit sequence; bumps forward past last if
+    # the clock has not advanced since the previous allocation
+    return max(int(time.time() * 1000) * 10000, last + 1)
+
+
+def format_time_ids(start, count):
+    return [f'{n:017d}' for n in range(start, start + count)]
@@ -0,0 +1,9 @@
+from app.services.metrics import timed_phase, record_returned
+
+def paginate_data(data_list, begin, count):
+    with timed_phase('pagination'):
+        start_idx = (begin - 1) if begin > 0 else 0
+        end_idx = start_idx + count
+        page = data_list[start_idx:end_idx]
+    record_returned(len(page))
+    return page, len(data_list) 
\ No newline at end of file
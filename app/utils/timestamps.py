@@ -0,0 +1,9 @@
+from datetime import datetime
+
+
+def parse_timestamp(value):
+    # Accepts both '2024-03-15T09:00:00Z' and naive isoformat() values; compared as naive
+    try:
+        return datetime.fromisoformat(value.replace('Z', '+00:00')).replace(tzinfo=None)
+    except (AttributeError, ValueError):
+        return None
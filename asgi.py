@@ -0,0 +1,229 @@
+# pip install uvicorn
+#
+# ASGI serving mode: the same Flask routes behind an asyncio event loop.
+#   python asgi.py --port 8080
+#   uvicorn asgi:application --port 8080 --loop uvloop --http httptools
+
+import argparse
+import asyncio
+import io
+import json
+import os
+import re
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from app import app
+from app.routes.event_routes import STREAMING_ENVIRON_KEY
+from app.services.data_service import load_data
+from app.services.view_counter import stop_flusher
+from app.services.session_store import stop_sweeper
+from app.services.scoring_service import shutdown_pool
+from app.services.request_log import stop_writer
+from app.services.hot_reload import record_file_state, start_watcher, stop_watcher
+from app.services.shard_router import stop_shards
+
+# No handler runs on the event loop: handlers take data_lock and the ledger, reaction
+# and session locks, append to the journal, query SQLite, round-trip to the shards
+# and, on replicas, forward writes to the primary, and any of those would stall every
+# connection. They run on this pool, and so do the pulls of their response bodies.
+EXECUTOR_WORKERS = int(os.environ.get('ASGI_EXECUTOR_WORKERS', '32'))
+
+# Routes whose handlers are CPU bound get a pool of their own, so a burst of them
+# cannot take every thread from the other routes
+OFFLOADED_ROUTES = [
+    re.compile(r'^/api/students/[^/]+/property-match-scores$'),
+    re.compile(r'^/api/students/[^/]+/roommate-compatibility$'),
+]
+
+OFFLOAD_WORKERS = 4
+
+# Streams whose chunks block until there is something to send (the change feed).
+# Each chunk is pulled on a thread of its own pool so idle clients never hold up
+# the event loop or the CPU-bound executor.
+STREAMED_ROUTES = [
+    re.compile(r'^/api/events$'),
+]
+
+# Open streams at most; one more gets a 503 rather than queueing for a thread
+STREAM_WORKERS = 64
+
+_executor = ThreadPoolExecutor(max_workers=EXECUTOR_WORKERS, thread_name_prefix='asgi-handler')
+_offload_executor = ThreadPoolExecutor(max_workers=OFFLOAD_WORKERS, thread_name_prefix='asgi-offload')
+_stream_executor = ThreadPoolExecutor(max_workers=STREAM_WORKERS, thread_name_prefix='asgi-stream')
+# A stream holds a slot from before its handler runs until its last pull returns
+_stream_slots = threading.BoundedSemaphore(STREAM_WORKERS)
+
+
+def build_environ(scope, body):
+    server_name, server_port = scope.get('server') or ('localhost', 80)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', '').encode('utf-8').decode('latin-1'),
+        'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': scope['query_string'].decode('latin-1'),
+        'SERVER_NAME': server_name,
+        'SERVER_PORT': str(server_port),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'REMOTE_ADDR': (scope.get('client') or ('', 0))[0],
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False,
+        'CONTENT_LENGTH': str(len(body)),
+    }
+    for name, value in scope['headers']:
+        name = name.decode('latin-1').upper().replace('-', '_')
+        value = value.decode('latin-1')
+        if name == 'CONTENT_TYPE':
+            environ['CONTENT_TYPE'] = value
+        elif name != 'CONTENT_LENGTH':
+            key = f'HTTP_{name}'
+            environ[key] = f'{environ[key]},{value}' if key in environ else value
+    return environ
+
+
+def call_wsgi(environ):
+    # Run the Flask app and return (status, headers, body iterable)
+    response = {}
+
+    def start_response(status, headers, exc_info=None):
+        response['status'] = int(status.split(' ', 1)[0])
+        response['headers'] = [(name.lower().encode('latin-1'), value.encode('latin-1'))
+                               for name, value in headers]
+
+    body = app.wsgi_app(environ, start_response)
+    return response['status'], response['headers'], body
+
+
+def next_chunk(chunks):
+    # The next non-empty chunk of a response body, or None once it is exhausted
+    for chunk in chunks:
+        if chunk:
+            return chunk
+    return None
+
+
+async def read_body(receive):
+    chunks = []
+    while True:
+        message = await receive()
+        chunks.append(message.get('body', b''))
+        if not message.get('more_body'):
+            return b''.join(chunks)
+
+
+async def handle_stream(scope, receive, send):
+    if not _stream_slots.acquire(blocking=False):
+        payload = json.dumps({'error': 'Too many open event streams'}).encode()
+        await send({'type': 'http.response.start', 'status': 503,
+                    'headers': [(b'content-type', b'application/json'), (b'retry-after', b'5')]})
+        await send({'type': 'http.response.body', 'body': payload, 'more_body': False})
+        return
+
+    body = None
+    pull = None
+
+    def finish(_=None):
+        if hasattr(body, 'close'):
+            body.close()
+        _stream_slots.release()
+
+    try:
+        environ = build_environ(scope, await read_body(receive))
+        # Tells the route it is on a server that can hold the stream open
+        environ[STREAMING_ENVIRON_KEY] = True
+        status, headers, body = call_wsgi(environ)
+        await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+        chunks = iter(body)
+        while True:
+            pull = _stream_executor.submit(next, chunks, None)
+            chunk = await asyncio.wrap_future(pull)
+            if chunk is None:
+                break
+            if chunk:
+                await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+        await send({'type': 'http.response.body', 'body': b'', 'more_body': False})
+    finally:
+        # A generator cannot be closed while a pull is still running on its thread,
+        # e.g. when the client went away mid-wait; close it and give back the slot
+        # once that pull returns
+        if pull is None or pull.done():
+            finish()
+        else:
+            pull.add_done_callback(finish)
+
+
+async def handle_lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            load_data()
+            record_file_state()
+            start_watcher()
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            stop_watcher()
+            stop_flusher()
+            stop_sweeper()
+            shutdown_pool()
+            stop_writer()
+            _executor.shutdown(wait=False)
+            _offload_executor.shutdown(wait=False)
+            _stream_executor.shutdown(wait=False)
+            stop_shards()
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def application(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        await handle_lifespan(receive, send)
+        return
+    if scope['type'] != 'http':
+        return
+    if any(pattern.match(scope['path']) for pattern in STREAMED_ROUTES):
+        await handle_stream(scope, receive, send)
+        return
+
+    environ = build_environ(scope, await read_body(receive))
+    executor = _executor
+    if any(pattern.match(scope['path']) for pattern in OFFLOADED_ROUTES):
+        executor = _offload_executor
+    loop = asyncio.get_running_loop()
+    status, headers, body = await loop.run_in_executor(executor, call_wsgi, environ)
+
+    await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+    try:
+        # Streamed responses (e.g. exports) read the store between chunks, so each
+        # chunk is pulled on the executor too
+        chunks = iter(body)
+        while True:
+            chunk = await loop.run_in_executor(executor, next_chunk, chunks)
+            if chunk is None:
+                break
+            await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+    finally:
+        if hasattr(body, 'close'):
+            await loop.run_in_executor(executor, body.close)
+    await send({'type': 'http.response.body', 'body': b'', 'more_body': False})
+
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description='Run the API on an ASGI server')
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--backlog', type=int, default=4096)
+    args = parser.parse_args()
+
+    uvicorn.run(application, host=args.host, port=args.port, backlog=args.backlog,
+                lifespan='on', timeout_keep_alive=75)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,362 @@
+# Synthetic dataset generator with the same schema as sample_data.json.
+#   python generate_data.py --records 100000 --output data_100k.json
+#   python generate_data.py --records 10000000 --output data_10m.json --seed 7
+# Point data_service.DATA_FILE at the output to serve it.
+
+import argparse
+import json
+import random
+import time
+from datetime import datetime, timedelta
+from itertools import accumulate
+
+# Share of --records given to each collection; profiles follow the student count
+# and property_listings the property count
+COLLECTION_SHARES = {
+    'users': 0.05,
+    'properties': 0.01,
+    'mediaAssets': 0.02,
+    'posts': 0.08,
+    'comments': 0.22,
+    'reactions': 0.30,
+    'applications': 0.05,
+    'documents': 0.07,
+    'tokenActivities': 0.10,
+    'sessions': 0.03,
+}
+
+# Zipf exponent for popularity: a handful of power users and hot posts take most traffic
+SKEW = 1.1
+
+LOCATIONS = ['Mountain View', 'Sunnyvale', 'San Jose', 'Palo Alto', 'Santa Clara', 'Cupertino']
+ROOM_TYPES = ['PRIVATE', 'SHARED', 'STUDIO']
+PROPERTY_TYPES = ['APARTMENT', 'HOUSE', 'CONDO', 'TOWNHOUSE']
+AMENITIES = ['Gym', 'Swimming Pool', 'Laundry', 'Parking', 'Study Room', 'Wifi', 'Dishwasher', 'Balcony']
+INTERESTS = ['hiking', 'gaming', 'cooking', 'music', 'basketball', 'reading', 'movies', 'travel']
+LIFESTYLES = ['QUIET', 'SOCIAL', 'ACTIVE']
+STUDY_HABITS = ['EARLY', 'LATE', 'FLEXIBLE']
+SLEEP_SCHEDULES = ['EARLY_BIRD', 'NIGHT_OWL', 'REGULAR']
+POST_TYPES = ['QUESTION', 'DISCUSSION', 'ANNOUNCEMENT', 'REVIEW']
+REACTION_TYPES = ['LIKE', 'LOVE', 'HELPFUL', 'INSIGHTFUL']
+DOCUMENT_TYPES = ['IDENTIFICATION', 'PROOF_OF_INCOME', 'REFERENCE_LETTER', 'OTHER']
+APPLICATION_STATUSES = ['PENDING', 'APPROVED', 'REJECTED', 'WITHDRAWN']
+
+START_DATE = datetime(2024, 1, 1)
+
+
+def collection_counts(records):
+    counts = {collection: max(1, int(records * share)) for collection, share in COLLECTION_SHARES.items()}
+    counts['users'] = max(counts['users'], 10)
+    counts['properties'] = max(counts['properties'], 2)
+    return counts
+
+
+def zipf_weights(n):
+    # Cumulative weights for random.choices; index 0 is the most popular
+    return list(accumulate(1 / (rank + 1) ** SKEW for rank in range(n)))
+
+
+def user_id(index):
+    return f'user{index + 1}'
+
+
+def role_of(index):
+    # One landlord in ten, a couple of admins, everyone else a student
+    if index < 2:
+        return 'ADMIN'
+    return 'LANDLORD' if index % 10 == 0 else 'STUDENT'
+
+
+def timestamp(rng, days=365):
+    return (START_DATE + timedelta(seconds=rng.randrange(days * 86400))).isoformat() + 'Z'
+
+
+class Generator:
+    def __init__(self, records, seed):
+        self.rng = random.Random(seed)
+        self.counts = collection_counts(records)
+        self.landlords = [i for i in range(self.counts['users']) if role_of(i) == 'LANDLORD']
+        self.students = [i for i in range(self.counts['users']) if role_of(i) == 'STUDENT']
+        self.counts['profiles'] = len(self.students)
+        self.counts['property_listings'] = self.counts['properties']
+        self.user_weights = zipf_weights(self.counts['users'])
+        self.post_weights = zipf_weights(self.counts['posts'])
+        # Users are shuffled so power users are not simply the lowest IDs
+        self.user_rank = list(range(self.counts['users']))
+        self.rng.shuffle(self.user_rank)
+        # Filled in while generating children, then written onto the parents
+        self.comment_counts = [0] * self.counts['posts']
+        self.reaction_counts = [0] * self.counts['posts']
+        self.balances = [0] * self.counts['users']
+
+    def active_user(self):
+        # Skewed pick: power users post, comment and transact far more than others
+        return self.user_rank[self.rng.choices(range(len(self.user_rank)), cum_weights=self.user_weights)[0]]
+
+    def hot_post(self):
+        return self.rng.choices(range(self.counts['posts']), cum_weights=self.post_weights)[0]
+
+    def token_activities(self):
+        rng = self.rng
+        for i in range(self.counts['tokenActivities']):
+            owner = self.active_user()
+            # Never spend more than has been earned so balances stay valid
+            if self.balances[owner] >= 20 and rng.random() < 0.4:
+                activity_type, amount = 'SPEND', rng.randint(1, self.balances[owner] // 2)
+                self.balances[owner] -= amount
+            else:
+                activity_type, amount = rng.choice([('EARN', 10), ('EARN', 25), ('REFUND', 5)])
+                self.balances[owner] += amount
+            yield {
+                'activityId': f'act{i + 1}',
+                'userId': user_id(owner),
+                'activityType': activity_type,
+                'amount': amount,
+                'description': f'{activity_type.title()} activity',
+                'date': timestamp(rng),
+                'status': 'COMPLETED'
+            }
+
+    def comments(self):
+        rng = self.rng
+        for i in range(self.counts['comments']):
+            post = self.hot_post()
+            self.comment_counts[post] += 1
+            yield {
+                'commentId': f'comment{i + 1}',
+                'postId': f'post{post + 1}',
+                'userId': user_id(self.active_user()),
+                'content': f'Comment {i + 1} on post {post + 1}',
+                'creationDate': timestamp(rng),
+                'lastEdited': timestamp(rng),
+                'status': 'ACTIVE',
+                'parentCommentId': f'comment{rng.randrange(i) + 1}' if i and rng.random() < 0.2 else None
+            }
+
+    def reactions(self):
+        rng = self.rng
+        users = self.counts['users']
+        per_post = [0] * self.counts['posts']
+        for _ in range(self.counts['reactions']):
+            per_post[self.hot_post()] += 1
+        reaction_id = 0
+        for post, count in enumerate(per_post):
+            # One reaction per user per post, as the reaction index expects
+            count = min(count, users)
+            self.reaction_counts[post] = count
+            for reactor in rng.sample(range(users), count):
+                reaction_id += 1
+                yield {
+                    'reactionId': f'reaction{reaction_id}',
+                    'postId': f'post{post + 1}',
+                    'userId': user_id(reactor),
+                    'reactionType': rng.choice(REACTION_TYPES),
+                    'createdAt': timestamp(rng)
+                }
+
+    def posts(self):
+        rng = self.rng
+        for i in range(self.counts['posts']):
+            created = timestamp(rng)
+            yield {
+                'postId': f'post{i + 1}',
+                'userId': user_id(self.active_user()),
+                'postType': rng.choice(POST_TYPES),
+                'title': f'Post {i + 1}',
+                'content': f'Looking for roommates near {rng.choice(LOCATIONS)}',
+                'tags': rng.sample(INTERESTS, 2),
+                'creationDate': created,
+                'lastEdited': created,
+                'status': 'ACTIVE' if rng.random() < 0.95 else 'ARCHIVED',
+                'commentCount': self.comment_counts[i],
+                'reactionCount': self.reaction_counts[i]
+            }
+
+    def users(self):
+        rng = self.rng
+        for i in range(self.counts['users']):
+            yield {
+                'userId': user_id(i),
+                'username': f'user{i + 1}',
+                'email': f'user{i + 1}@andrew.cmu.edu',
+                'role': role_of(i),
+                'isVerified': rng.random() < 0.9,
+                'firstName': f'First{i + 1}',
+                'lastName': f'Last{i + 1}',
+                'phoneNumber': f'+1-412-555-{i % 10000:04d}',
+                'campusAffiliation': 'Silicon Valley',
+                'profilePictureUrl': f'https://example.com/profile/user{i + 1}.jpg',
+                'createdAt': timestamp(rng),
+                'lastLogin': timestamp(rng),
+                'status': 'ACTIVE' if rng.random() < 0.97 else 'SUSPENDED',
+                'tokenBalance': self.balances[i]
+            }
+
+    def profiles(self):
+        rng = self.rng
+        for i, student in enumerate(self.students):
+            yield {
+                'profileId': f'profile{i + 1}',
+                'userId': user_id(student),
+                'bio': f'Student {student + 1}',
+                'preferences': {'smoking': False, 'pets': rng.random() < 0.3},
+                'preferredLocation': rng.choice(LOCATIONS),
+                'maxBudget': rng.randrange(800, 3000, 50),
+                'desiredAmenities': rng.sample(AMENITIES, 3),
+                'preferredRoomType': rng.choice(ROOM_TYPES),
+                'lifestyle': rng.choice(LIFESTYLES),
+                'studyHabits': rng.choice(STUDY_HABITS),
+                'sleepSchedule': rng.choice(SLEEP_SCHEDULES),
+                'interests': rng.sample(INTERESTS, 3),
+                'cleanlinessLevel': rng.randint(1, 5),
+                'createdAt': timestamp(rng),
+                'updatedAt': timestamp(rng)
+            }
+
+    def properties(self):
+        rng = self.rng
+        for i in range(self.counts['properties']):
+            location = rng.choice(LOCATIONS)
+            yield {
+                'propertyId': f'prop{i + 1}',
+                'landlordId': user_id(rng.choice(self.landlords)),
+                'propertyName': f'{location} Residence {i + 1}',
+                'address': {'street': f'{i + 1} Main Street', 'city': location, 'state': 'CA',
+                            'zipCode': f'94{i % 1000:03d}', 'country': 'USA'},
+                'geolocation': {'latitude': round(37.3 + rng.random() * 0.2, 4),
+                                'longitude': round(-122.1 + rng.random() * 0.2, 4)},
+                'propertyType': rng.choice(PROPERTY_TYPES),
+                'description': f'Housing near campus in {location}',
+                'status': 'AVAILABLE' if rng.random() < 0.7 else 'UNAVAILABLE',
+                'location': location,
+                'monthlyRent': rng.randrange(900, 3500, 50),
+                'roomType': rng.choice(ROOM_TYPES),
+                'amenities': rng.sample(AMENITIES, 4)
+            }
+
+    def property_listings(self):
+        rng = self.rng
+        for i in range(self.counts['property_listings']):
+            yield {
+                'listingId': f'listing{i + 1}',
+                'propertyId': f'prop{i + 1}',
+                'title': f'Room at property {i + 1}',
+                'description': 'Furnished room, utilities included',
+                'price': rng.randrange(900, 3500, 50),
+                'availableFrom': timestamp(rng),
+                'status': 'ACTIVE',
+                'createdAt': timestamp(rng)
+            }
+
+    def media_assets(self):
+        rng = self.rng
+        for i in range(self.counts['mediaAssets']):
+            prop = rng.randrange(self.counts['properties'])
+            yield {
+                'assetId': f'asset{i + 1}',
+                'propertyId': f'prop{prop + 1}',
+                'assetType': 'IMAGE' if rng.random() < 0.85 else 'VIDEO',
+                'url': f'https://example.com/properties/prop{prop + 1}/media/{i + 1}',
+                'description': rng.choice(['Living Room', 'Bedroom', 'Kitchen', 'Exterior']),
+                'uploadDate': timestamp(rng),
+                'status': 'ACTIVE'
+            }
+
+    def applications(self):
+        rng = self.rng
+        for i in range(self.counts['applications']):
+            prop = rng.randrange(self.counts['properties'])
+            yield {
+                'applicationId': f'app{i + 1}',
+                'userId': user_id(rng.choice(self.students)),
+                'propertyId': f'prop{prop + 1}',
+                'listingId': f'listing{prop + 1}',
+                'moveInDate': timestamp(rng),
+                'leaseDuration': rng.choice([6, 12]),
+                'submissionDate': timestamp(rng),
+                'status': rng.choice(APPLICATION_STATUSES),
+                'documentUrls': []
+            }
+
+    def documents(self):
+        rng = self.rng
+        for i in range(self.counts['documents']):
+            application = rng.randrange(self.counts['applications'])
+            yield {
+                'documentId': f'doc{i + 1}',
+                'applicationId': f'app{application + 1}',
+                'description': 'Supporting document',
+                'documentName': f'document_{i + 1}.pdf',
+                'documentType': rng.choice(DOCUMENT_TYPES),
+                'uploadedBy': user_id(rng.choice(self.students)),
+                'dateUploaded': timestamp(rng),
+                'dateModified': timestamp(rng),
+                'isDeleted': False,
+                'fileType': 'PDF',
+                'filePath': f'/documents/app{application + 1}/document_{i + 1}.pdf',
+                'fileSize': rng.randrange(1024, 5 * 1024 * 1024)
+            }
+
+    def sessions(self):
+        rng = self.rng
+        now = datetime.now()
+        for i in range(self.counts['sessions']):
+            created = now - timedelta(seconds=rng.randrange(2 * 86400))
+            yield {
+                'sessionId': f'session{i + 1}',
+                'userId': user_id(self.active_user()),
+                'createdAt': created.isoformat(),
+                # About half are still live; the rest exercise expiry
+                'expiresAt': (created + timedelta(hours=24)).isoformat(),
+                'status': 'ACTIVE'
+            }
+
+    def collections(self):
+        # Children come before parents so counts and balances are known when
+        # the parent records are written; key order in the JSON file is irrelevant
+        return [
+            ('tokenActivities', self.token_activities),
+            ('comments', self.comments),
+            ('reactions', self.reactions),
+            ('posts', self.posts),
+            ('users', self.users),
+            ('profiles', self.profiles),
+            ('properties', self.properties),
+            ('property_listings', self.property_listings),
+            ('mediaAssets', self.media_assets),
+            ('applications', self.applications),
+            ('documents', self.documents),
+            ('sessions', self.sessions),
+        ]
+
+
+def write_json(generator, path):
+    # Records are streamed one at a time so 10M-record datasets fit in memory
+    with open(path, 'w') as file:
+        file.write('{')
+        for position, (collection, records) in enumerate(generator.collections()):
+            started = time.perf_counter()
+            file.write(f'{"," if position else ""}\n"{collection}": [')
+            written = 0
+            for record in records():
+                file.write(',\n' if written else '\n')
+                file.write(json.dumps(record, separators=(',', ':')))
+                written += 1
+            file.write('\n]')
+            print(f'{collection}: {written} records in {time.perf_counter() - started:.1f}s')
+        file.write('\n}\n')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate a synthetic dataset')
+    parser.add_argument('--records', type=int, default=10000,
+                        help='Approximate total number of records across all collections')
+    parser.add_argument('--output', default='generated_data.json')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    write_json(Generator(args.records, args.seed), args.output)
+
+
+if __name__ == '__main__':
+    main()
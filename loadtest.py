@@ -0,0 +1,307 @@
+# HTTP load test over a weighted mix of the documented routes.
+#   python loadtest.py --sizes 10000,100000 --output results.json
+#   python loadtest.py --target server --workers 4 --sizes 100000
+#   python loadtest.py --sizes 10000 --baseline results.json
+# Datasets come from generate_data.py and are cached under bench_data/.
+# Each size runs in a fresh process so caches and indexes start cold.
+
+import argparse
+import http.client
+import json
+import math
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime
+
+DATA_DIR = 'bench_data'
+# Requests per thread discarded before measuring, to load data and build indexes
+WARMUP_REQUESTS = 20
+# A route regresses when p95 rises, or throughput drops, by more than this fraction
+REGRESSION_THRESHOLD = 0.10
+
+
+def _pick(ids, collection, rng):
+    return rng.choice(ids[collection])
+
+
+# (weight, name, method, path(ids, rng), body(ids, rng) or None); mostly reads, as in production
+ROUTE_MIX = [
+    (10, 'list_users', 'GET', lambda ids, rng: '/api/users?role=STUDENT&begin=1&count=10', None),
+    (15, 'get_user', 'GET', lambda ids, rng: f"/api/users/{_pick(ids, 'users', rng)}", None),
+    (10, 'list_properties', 'GET', lambda ids, rng: '/api/properties?status=AVAILABLE&count=10', None),
+    (10, 'get_property', 'GET', lambda ids, rng: f"/api/properties/{_pick(ids, 'properties', rng)}", None),
+    (5, 'landlord_properties', 'GET',
+     lambda ids, rng: f"/api/users/{_pick(ids, 'landlords', rng)}/properties", None),
+    (10, 'list_posts', 'GET', lambda ids, rng: '/api/posts?status=ACTIVE&count=10', None),
+    (15, 'get_post', 'GET', lambda ids, rng: f"/api/posts/{_pick(ids, 'posts', rng)}", None),
+    (8, 'post_comments', 'GET', lambda ids, rng: f"/api/posts/{_pick(ids, 'posts', rng)}/comments", None),
+    (5, 'reaction_summary', 'GET',
+     lambda ids, rng: f"/api/posts/{_pick(ids, 'posts', rng)}/reactions?summary=true", None),
+    (4, 'user_applications', 'GET', lambda ids, rng: f"/api/applications?userId={_pick(ids, 'students', rng)}", None),
+    (2, 'property_match', 'GET',
+     lambda ids, rng: f"/api/students/{_pick(ids, 'students', rng)}/property-match-scores", None),
+    (2, 'create_post', 'POST', lambda ids, rng: '/api/posts',
+     lambda ids, rng: {'userId': _pick(ids, 'students', rng), 'title': 'Load test',
+                       'content': 'Looking for roommates', 'postType': 'DISCUSSION'}),
+    (2, 'update_user', 'PATCH', lambda ids, rng: f"/api/users/{_pick(ids, 'users', rng)}",
+     lambda ids, rng: {'firstName': f'Name{rng.randrange(1000)}'}),
+    (2, 'add_reaction', 'POST', lambda ids, rng: f"/api/posts/{_pick(ids, 'posts', rng)}/reactions",
+     lambda ids, rng: {'userId': _pick(ids, 'users', rng), 'reactionType': 'LIKE'}),
+]
+
+
+def dataset_ids(path):
+    with open(path, 'r') as file:
+        data = json.load(file)
+    users = data.get('users', [])
+    return {
+        'users': [user['userId'] for user in users],
+        'students': [user['userId'] for user in users if user['role'] == 'STUDENT'],
+        'landlords': [user['userId'] for user in users if user['role'] == 'LANDLORD'],
+        'properties': [prop['propertyId'] for prop in data.get('properties', [])],
+        'posts': [post['postId'] for post in data.get('posts', [])],
+    }
+
+
+def ensure_dataset(size):
+    path = os.path.join(DATA_DIR, f'data_{size}.json')
+    if not os.path.exists(path):
+        from generate_data import Generator, write_json
+        os.makedirs(DATA_DIR, exist_ok=True)
+        write_json(Generator(size, seed=42), path)
+    return path
+
+
+def percentile(sorted_values, fraction):
+    # Nearest-rank percentile of an already sorted list
+    if not sorted_values:
+        return None
+    rank = max(0, min(len(sorted_values), math.ceil(fraction * len(sorted_values))) - 1)
+    return sorted_values[rank]
+
+
+class ClientTarget:
+    # In-process Flask test client: measures the app without network or server overhead
+    def __init__(self, data_file):
+        from app import app
+        from app.services import data_service
+        data_service.DATA_FILE = data_file
+        data_service.JOURNAL_FILE = os.devnull
+        self.app = app
+
+    def connect(self):
+        client = self.app.test_client()
+
+        def send(method, path, body):
+            return client.open(path, method=method, json=body).status_code
+        return send
+
+    def close(self):
+        pass
+
+
+class ServerTarget:
+    # serve.py started on a free local port with the dataset under test
+    def __init__(self, data_file, workers):
+        with socket.socket() as probe:
+            probe.bind(('127.0.0.1', 0))
+            self.port = probe.getsockname()[1]
+        self.process = subprocess.Popen(
+            [sys.executable, 'serve.py', '--host', '127.0.0.1', '--port', str(self.port),
+             '--workers', str(workers), '--data-file', data_file],
+            stdout=subprocess.DEVNULL)
+        deadline = time.monotonic() + 120
+        while time.monotonic() < deadline:
+            try:
+                socket.create_connection(('127.0.0.1', self.port), timeout=1).close()
+                return
+            except OSError:
+                time.sleep(0.2)
+        self.close()
+        raise RuntimeError('serve.py did not start listening')
+
+    def connect(self):
+        # One connection per thread; http.client reopens it if the server closes it
+        connection = http.client.HTTPConnection('127.0.0.1', self.port, timeout=60)
+
+        def send(method, path, body):
+            payload = json.dumps(body) if body is not None else None
+            headers = {'Content-Type': 'application/json'} if body is not None else {}
+            connection.request(method, path, body=payload, headers=headers)
+            response = connection.getresponse()
+            response.read()
+            return response.status
+        return send
+
+    def close(self):
+        self.process.terminate()
+        self.process.wait()
+
+
+def run_load(target, ids, requests, concurrency, seed):
+    weights = [route[0] for route in ROUTE_MIX]
+    samples = {route[1]: [] for route in ROUTE_MIX}
+    statuses = {route[1]: {} for route in ROUTE_MIX}
+    lock = threading.Lock()
+    per_thread = requests // concurrency
+    ready = threading.Barrier(concurrency + 1)
+
+    def worker(thread_index):
+        try:
+            rng = random.Random(seed + thread_index)
+            send = target.connect()
+            local_samples = {name: [] for name in samples}
+            local_statuses = {name: {} for name in statuses}
+            for iteration in range(WARMUP_REQUESTS + per_thread):
+                if iteration == WARMUP_REQUESTS:
+                    ready.wait()
+                _, name, method, path, body = rng.choices(ROUTE_MIX, weights=weights)[0]
+                request_path, request_body = path(ids, rng), body(ids, rng) if body else None
+                started = time.perf_counter()
+                try:
+                    status = send(method, request_path, request_body)
+                except (OSError, http.client.HTTPException):
+                    status = 'error'
+                elapsed = time.perf_counter() - started
+                if iteration >= WARMUP_REQUESTS:
+                    local_samples[name].append(elapsed)
+                    local_statuses[name][str(status)] = local_statuses[name].get(str(status), 0) + 1
+            with lock:
+                for name in samples:
+                    samples[name].extend(local_samples[name])
+                    for status, count in local_statuses[name].items():
+                        statuses[name][status] = statuses[name].get(status, 0) + count
+        except threading.BrokenBarrierError:
+            # Another thread failed before the barrier; the caller reports it
+            return
+        finally:
+            # A thread that fails before the barrier would otherwise leave the others,
+            # and the caller, waiting on it forever. Harmless once the barrier is passed.
+            ready.abort()
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    # Timing starts once every thread has finished its warmup
+    try:
+        ready.wait()
+    except threading.BrokenBarrierError:
+        for thread in threads:
+            thread.join()
+        raise RuntimeError('A load thread failed during warmup') from None
+    started = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    routes = {}
+    for name, latencies in samples.items():
+        if not latencies:
+            continue
+        latencies.sort()
+        errors = sum(count for status, count in statuses[name].items()
+                     if status == 'error' or int(status) >= 500)
+        routes[name] = {
+            'count': len(latencies),
+            'errors': errors,
+            'statusCodes': statuses[name],
+            'throughput': len(latencies) / elapsed,
+            'mean': sum(latencies) / len(latencies),
+            'p50': percentile(latencies, 0.50),
+            'p95': percentile(latencies, 0.95),
+            'p99': percentile(latencies, 0.99),
+        }
+    total = sum(route['count'] for route in routes.values())
+    return {'elapsed': elapsed, 'requests': total, 'throughput': total / elapsed, 'routes': routes}
+
+
+def run_size(args, size, data_file):
+    # Runs in a child process, one per dataset size
+    ids = dataset_ids(data_file)
+    target = ClientTarget(data_file) if args.target == 'client' else ServerTarget(data_file, args.workers)
+    try:
+        result = run_load(target, ids, args.requests, args.concurrency, args.seed)
+    finally:
+        target.close()
+    return {'size': size, 'dataFile': data_file, 'target': args.target, **result}
+
+
+def compare(results, baseline, threshold):
+    # Returns human readable regressions of results relative to baseline
+    regressions = []
+    baseline_runs = {(run['size'], run['target']): run for run in baseline['runs']}
+    for run in results['runs']:
+        base = baseline_runs.get((run['size'], run['target']))
+        if base is None:
+            continue
+        if run['throughput'] < base['throughput'] * (1 - threshold):
+            regressions.append(f"size {run['size']}: throughput {base['throughput']:.0f} -> {run['throughput']:.0f} req/s")
+        for name, route in run['routes'].items():
+            base_route = base['routes'].get(name)
+            if base_route and route['p95'] > base_route['p95'] * (1 + threshold):
+                regressions.append(f"size {run['size']} {name}: p95 {base_route['p95'] * 1000:.2f} -> "
+                                   f"{route['p95'] * 1000:.2f} ms")
+    return regressions
+
+
+def print_run(run):
+    print(f"\n{run['target']} / {run['size']} records: {run['throughput']:.0f} req/s over {run['requests']} requests")
+    print(f"{'route':<22}{'count':>8}{'errors':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for name, route in sorted(run['routes'].items()):
+        print(f"{name:<22}{route['count']:>8}{route['errors']:>8}{route['p50'] * 1000:>10.2f}"
+              f"{route['p95'] * 1000:>10.2f}{route['p99'] * 1000:>10.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test the API with a weighted route mix')
+    parser.add_argument('--target', choices=['client', 'server'], default='client')
+    parser.add_argument('--sizes', default='10000', help='Comma-separated dataset sizes in records')
+    parser.add_argument('--requests', type=int, default=5000, help='Measured requests per size')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--workers', type=int, default=4, help='serve.py workers for --target server')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', help='Write results as JSON to this file')
+    parser.add_argument('--baseline', help='Compare against a previous --output file')
+    parser.add_argument('--threshold', type=float, default=REGRESSION_THRESHOLD)
+    parser.add_argument('--data-file', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.concurrency < 1 or args.requests < args.concurrency:
+        # Every thread must measure at least one request, or it never reaches the barrier
+        parser.error('--requests must be at least --concurrency, which must be at least 1')
+
+    if args.data_file:
+        # Child mode: measure one dataset and report on stdout
+        print(json.dumps(run_size(args, int(args.sizes), args.data_file)))
+        return
+
+    results = {'startedAt': datetime.now().isoformat(), 'requests': args.requests,
+               'concurrency': args.concurrency, 'runs': []}
+    for size in [int(size) for size in args.sizes.split(',')]:
+        data_file = ensure_dataset(size)
+        child = subprocess.run([sys.executable, __file__, *sys.argv[1:], '--sizes', str(size), '--data-file', data_file],
+                               stdout=subprocess.PIPE, check=True)
+        run = json.loads(child.stdout.decode().strip().splitlines()[-1])
+        print_run(run)
+        results['runs'].append(run)
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(results, file, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, 'r') as file:
+            regressions = compare(results, json.load(file), args.threshold)
+        for regression in regressions:
+            print(f'REGRESSION {regression}')
+        if regressions:
+            sys.exit(1)
+        print('\nNo regressions against baseline')
+
+
+if __name__ == '__main__':
+    main()
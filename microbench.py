@@ -0,0 +1,194 @@
+# Micro-benchmarks for the data layer and scoring hot paths, swept over dataset sizes.
+#   python microbench.py --sizes 10000,100000,1000000
+#   python microbench.py --sizes 10000,100000 --only filter_comments_by_post,score_properties
+#   python microbench.py --sizes 10000,100000 --backends memory,sqlite
+# Each benchmark is timed at every size and a log-log slope is fitted: ~1 is linear,
+# ~0 constant, and anything near 2 is a quadratic regression worth investigating.
+
+import argparse
+import json
+import math
+import os
+import random
+import time
+import timeit
+from app import app
+from app.services import data_service, sqlite_store
+from app.services.scoring_service import score_properties, score_roommates
+from app.utils.pagination import paginate_data
+from loadtest import ensure_dataset
+
+# Timing repeats per benchmark; the fastest is reported
+REPEATS = 5
+# Lower bound on the duration of one timing repeat
+MIN_REPEAT_SECONDS = 0.2
+
+
+def reset_store(data_file, backend='memory'):
+    # Point the data service at another dataset and drop everything derived from the old one
+    data_service.DATA_FILE = data_file
+    data_service.STORAGE_BACKEND = backend
+    sqlite_store.SQLITE_FILE = data_file.replace('.json', '.sqlite3')
+    data_service._data = None
+    data_service._indexes.clear()
+    data_service._positions.clear()
+
+
+def measure(fn):
+    # Seconds per call: calibrate the loop count, then keep the best of REPEATS
+    timer = timeit.Timer(fn)
+    number = 1
+    while timer.timeit(number) < MIN_REPEAT_SECONDS and number < 1_000_000:
+        number *= 10
+    return min(timer.repeat(repeat=REPEATS, number=number)) / number
+
+
+def bench_load_data(data_file):
+    def run():
+        reset_store(data_file)
+        data_service.load_data()
+    # One parse is expensive enough to time directly
+    return min(timeit.repeat(run, repeat=3, number=1))
+
+
+def setup_benchmarks(data, rng):
+    # Each benchmark mirrors what a route handler does with the same collections
+    users, posts, properties = data['users'], data['posts'], data['properties']
+    user_ids = [user['userId'] for user in users]
+    post_ids = [post['postId'] for post in posts]
+    landlord_ids = [user['userId'] for user in users if user['role'] == 'LANDLORD']
+    students = {user['userId'] for user in users if user['role'] == 'STUDENT'}
+    profiles = data.get('profiles', [])
+    student_profiles = [(profile['userId'], profile) for profile in profiles if profile['userId'] in students]
+    available = [prop for prop in properties if prop['status'] == 'AVAILABLE']
+    profile = rng.choice(profiles) if profiles else {}
+    user_index = data_service.get_index('users', 'userId')
+    page = paginate_data(users, 1, 10)[0]
+
+    def filter_properties_by_landlord():
+        landlord_id = rng.choice(landlord_ids)
+        return [prop for prop in properties if prop['landlordId'] == landlord_id and prop['status'] == 'AVAILABLE']
+
+    def filter_comments_by_post():
+        post_id = rng.choice(post_ids)
+        return [comment for comment in data['comments'] if comment['postId'] == post_id]
+
+    def lookup_user_scan():
+        user_id = rng.choice(user_ids)
+        return next((user for user in users if user['userId'] == user_id), None)
+
+    return {
+        'paginate_first_page': lambda: paginate_data(users, 1, 10),
+        'paginate_last_page': lambda: paginate_data(users, max(1, len(users) - 9), 10),
+        'filter_users_by_role': lambda: [user for user in users if user['role'] == 'STUDENT'],
+        'filter_properties_by_landlord': filter_properties_by_landlord,
+        'filter_comments_by_post': filter_comments_by_post,
+        'lookup_user_scan': lookup_user_scan,
+        'lookup_user_index': lambda: user_index.get(rng.choice(user_ids)),
+        'lookup_many_users': lambda: data_service.get_many('users', 'userId', rng.sample(user_ids, 50)),
+        'score_properties': lambda: score_properties(profile, available),
+        'score_roommates': lambda: score_roommates(profile.get('userId'), profile, student_profiles),
+        'json_encode_page': lambda: app.json.dumps({'users': page, 'totalCount': len(users),
+                                                    'currentPage': 1, 'pageSize': 10}),
+        'json_encode_collection': lambda: json.dumps(posts),
+    }
+
+
+def ensure_sqlite(data_file):
+    database = data_file.replace('.json', '.sqlite3')
+    if not os.path.exists(database):
+        sqlite_store.SQLITE_FILE = database
+        sqlite_store.migrate(data_file)
+    return database
+
+
+def setup_storage_benchmarks(data, rng):
+    # Data-service reads that either backend can serve; data is the in-memory copy,
+    # used only to pick ids
+    user_ids = [user['userId'] for user in data['users']]
+    post_ids = [post['postId'] for post in data['posts']]
+    return {
+        'get_record_user': lambda: data_service.get_record('users', 'userId', rng.choice(user_ids)),
+        'get_many_users': lambda: data_service.get_many('users', 'userId', rng.sample(user_ids, 50)),
+        'find_page_users_by_role': lambda: data_service.find_page('users', {'role': 'STUDENT'}, 1, 10),
+        'find_page_users_last_page': lambda: data_service.find_page('users', {'role': 'STUDENT'},
+                                                                    len(user_ids) // 2, 10),
+        'find_page_comments_by_post': lambda: data_service.find_page(
+            'comments', {'postId': rng.choice(post_ids), 'status': 'ACTIVE'}, 1, 10),
+    }
+
+
+def slope(sizes, timings):
+    # Least-squares slope of log(time) against log(size)
+    points = [(math.log(size), math.log(seconds)) for size, seconds in zip(sizes, timings) if seconds > 0]
+    if len(points) < 2:
+        return None
+    mean_x = sum(x for x, _ in points) / len(points)
+    mean_y = sum(y for _, y in points) / len(points)
+    denominator = sum((x - mean_x) ** 2 for x, _ in points)
+    return sum((x - mean_x) * (y - mean_y) for x, y in points) / denominator if denominator else None
+
+
+def format_seconds(seconds):
+    if seconds >= 1:
+        return f'{seconds:.2f}s'
+    if seconds >= 1e-3:
+        return f'{seconds * 1e3:.2f}ms'
+    return f'{seconds * 1e6:.2f}us'
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Micro-benchmark data-layer and scoring hot paths')
+    parser.add_argument('--sizes', default='10000,100000', help='Comma-separated dataset sizes in records')
+    parser.add_argument('--only', help='Comma-separated benchmark names to run')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--backends', default='memory',
+                        help='Storage backends for the data-service benchmarks, e.g. memory,sqlite')
+    parser.add_argument('--output', help='Write timings as JSON to this file')
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(',')]
+    only = set(args.only.split(',')) if args.only else None
+    results = {}
+    data_service.JOURNAL_FILE = os.devnull
+
+    for size in sizes:
+        data_file = ensure_dataset(size)
+        if not only or 'load_data' in only:
+            results.setdefault('load_data', {})[size] = bench_load_data(data_file)
+        reset_store(data_file)
+        benchmarks = setup_benchmarks(data_service.load_data(), random.Random(args.seed))
+        for name, fn in benchmarks.items():
+            if only and name not in only:
+                continue
+            results.setdefault(name, {})[size] = measure(fn)
+
+        # The same data-service calls against each backend, named e.g. get_record_user[sqlite]
+        data = data_service.load_data()
+        for backend in args.backends.split(','):
+            if backend == 'sqlite':
+                ensure_sqlite(data_file)
+            reset_store(data_file, backend)
+            for name, fn in setup_storage_benchmarks(data, random.Random(args.seed)).items():
+                if only and name not in only:
+                    continue
+                fn()
+                results.setdefault(f'{name}[{backend}]', {})[size] = measure(fn)
+        reset_store(data_file)
+        print(f'{size} records done at {time.strftime("%H:%M:%S")}')
+
+    print(f"\n{'benchmark':<32}" + ''.join(f'{size:>14}' for size in sizes) + f"{'slope':>8}")
+    for name, timings in results.items():
+        fitted = slope(sizes, [timings[size] for size in sizes])
+        print(f'{name:<32}' + ''.join(f'{format_seconds(timings[size]):>14}' for size in sizes)
+              + (f'{fitted:>8.2f}' if fitted is not None else f"{'-':>8}"))
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump({'sizes': sizes, 'seconds': results,
+                       'slopes': {name: slope(sizes, [timings[size] for size in sizes])
+                                  for name, timings in results.items()}}, file, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,25 @@
+# One-shot import of a JSON data file into the SQLite backend.
+#   python migrate_sqlite.py --source sample_data.json --database data.sqlite3
+# Then serve it with STORAGE_BACKEND=sqlite SQLITE_FILE=data.sqlite3.
+
+import argparse
+import time
+from app.services import sqlite_store
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Migrate a JSON data file into SQLite')
+    parser.add_argument('--source', default='sample_data.json')
+    parser.add_argument('--database', default=sqlite_store.SQLITE_FILE)
+    args = parser.parse_args()
+
+    sqlite_store.SQLITE_FILE = args.database
+    started = time.perf_counter()
+    counts = sqlite_store.migrate(args.source)
+    for collection, count in counts.items():
+        print(f'{collection}: {count} records')
+    print(f'Migrated {sum(counts.values())} records into {args.database} in {time.perf_counter() - started:.1f}s')
+
+
+if __name__ == '__main__':
+    main()
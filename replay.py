@@ -0,0 +1,110 @@
+# Replay a trace captured with RECORD_REQUESTS=1 against a running build.
+#   python replay.py requests.jsonl --target http://127.0.0.1:8080
+#   python replay.py requests.jsonl.2 requests.jsonl.1 requests.jsonl --speed 10
+# --speed 1 keeps the original pacing, 10 replays ten times faster and 0 sends as fast
+# as possible. Requests recorded with only a body hash cannot be re-sent faithfully
+# and are skipped unless --send-empty-bodies is given.
+
+import argparse
+import http.client
+import json
+import queue
+import threading
+import time
+from urllib.parse import urlsplit
+from loadtest import percentile
+
+
+def read_trace(paths):
+    entries = []
+    for path in paths:
+        with open(path, 'r') as file:
+            entries.extend(json.loads(line) for line in file if line.strip())
+    entries.sort(key=lambda entry: entry['timestamp'])
+    return entries
+
+
+def replay(entries, target, speed, concurrency, send_empty_bodies):
+    parts = urlsplit(target)
+    pending = queue.Queue()
+    lock = threading.Lock()
+    stats = {'sent': 0, 'skipped': 0, 'errors': 0, 'statusMismatches': 0, 'latencies': [], 'lag': []}
+
+    def worker():
+        connection = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=60)
+        while True:
+            item = pending.get()
+            if item is None:
+                return
+            due, entry = item
+            delay = due - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            path = entry['path'] + (f"?{entry['query']}" if entry.get('query') else '')
+            headers = {'Content-Type': entry['contentType']} if entry.get('contentType') else {}
+            started = time.monotonic()
+            try:
+                connection.request(entry['method'], path, body=entry.get('body'), headers=headers)
+                response = connection.getresponse()
+                response.read()
+                status = response.status
+            except (OSError, http.client.HTTPException):
+                connection.close()
+                status = None
+            finished = time.monotonic()
+            with lock:
+                stats['sent'] += 1
+                stats['lag'].append(max(0.0, started - due))
+                if status is None:
+                    stats['errors'] += 1
+                    continue
+                stats['latencies'].append(finished - started)
+                if status != entry['status']:
+                    stats['statusMismatches'] += 1
+
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+
+    started = time.monotonic()
+    first = entries[0]['timestamp'] if entries else 0
+    for entry in entries:
+        if 'bodySha256' in entry and not send_empty_bodies:
+            stats['skipped'] += 1
+            continue
+        offset = (entry['timestamp'] - first) / speed if speed else 0
+        pending.put((started + offset, entry))
+    for _ in threads:
+        pending.put(None)
+    for thread in threads:
+        thread.join()
+    stats['elapsed'] = time.monotonic() - started
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Replay recorded requests against a server')
+    parser.add_argument('traces', nargs='+', help='Recorded JSONL files, oldest first')
+    parser.add_argument('--target', default='http://127.0.0.1:8080')
+    parser.add_argument('--speed', type=float, default=1.0, help='Replay speed multiplier; 0 for unpaced')
+    parser.add_argument('--concurrency', type=int, default=32,
+                        help='Connections used to keep up with the recorded request rate')
+    parser.add_argument('--send-empty-bodies', action='store_true',
+                        help='Replay requests whose body was only hashed, without a body')
+    args = parser.parse_args()
+
+    entries = read_trace(args.traces)
+    stats = replay(entries, args.target, args.speed, args.concurrency, args.send_empty_bodies)
+    latencies, lag = sorted(stats['latencies']), sorted(stats['lag'])
+    print(f"Replayed {stats['sent']} of {len(entries)} requests in {stats['elapsed']:.1f}s "
+          f"({stats['sent'] / stats['elapsed'] if stats['elapsed'] else 0:.0f} req/s)")
+    print(f"skipped {stats['skipped']}, errors {stats['errors']}, status mismatches {stats['statusMismatches']}")
+    if latencies:
+        print(f'latency p50 {percentile(latencies, 0.5) * 1000:.2f} ms, p95 {percentile(latencies, 0.95) * 1000:.2f} ms, '
+              f'p99 {percentile(latencies, 0.99) * 1000:.2f} ms')
+        # Lag shows whether the replayer kept up with the recorded schedule
+        print(f'schedule lag p50 {percentile(lag, 0.5) * 1000:.2f} ms, p99 {percentile(lag, 0.99) * 1000:.2f} ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,284 @@
+# Production entry point: pre-forking server for POSIX systems. Run from the
+# repository root, which holds the app package:
+#   python serve.py --port 8080 --workers 8
+# run.py remains the single-process development server. Workers each hold a private
+# copy of the dataset and the session store, so with more than one every write goes
+# to a single primary process and the workers serve reads as its replicas; see
+# app/services/replication.py.
+
+import argparse
+import gc
+import json
+import os
+import random
+import signal
+import socket
+import time
+import traceback
+from werkzeug.serving import make_server
+from app import app
+from app.services import data_service, replication
+from app.services.data_service import load_data, get_index
+from app.services.id_allocator import ID_FIELDS
+from app.services.view_counter import stop_flusher
+from app.services.session_store import stop_sweeper
+from app.services.scoring_service import shutdown_pool
+from app.services.request_log import stop_writer
+from app.services.hot_reload import RELOAD_KEYS, record_file_state, start_watcher, stop_watcher
+from app.services.shard_router import stop_shards
+
+# Seconds a worker gets to finish in-flight requests before it is killed
+GRACEFUL_TIMEOUT = 30
+
+# Size of the journal when preload() ran; what follows was written by this run
+_journal_start = 0
+
+
+def preload():
+    # Load and index everything once in the parent so workers inherit it copy-on-write.
+    # No background threads may be started here; they do not survive fork(). With
+    # STORAGE_BACKEND=sharded this also starts the shard processes, which the workers share.
+    global _journal_start
+    data = load_data()
+    record_file_state()
+    try:
+        _journal_start = os.path.getsize(data_service.JOURNAL_FILE)
+    except OSError:
+        _journal_start = 0
+    for collection, id_field in ID_FIELDS.items():
+        if collection in data:
+            get_index(collection, id_field)
+    if 'users' in data:
+        get_index('users', 'username')
+
+    # Move everything allocated so far out of the collector's view; otherwise the
+    # first collection in each worker touches every object and un-shares the pages
+    gc.collect()
+    gc.freeze()
+
+
+def replay_journal():
+    # The writing process is forked from the preloaded image, so one that replaces a
+    # crashed or recycled predecessor would start without the writes made since. Apply
+    # this run's journal entries on top; collections in sqlite or the shards already
+    # hold theirs. Returns the number of entries applied.
+    applied = 0
+    try:
+        file = open(data_service.JOURNAL_FILE, 'r')
+    except FileNotFoundError:
+        return 0
+    with file:
+        file.seek(_journal_start)
+        for line in file:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                # The tail of a write cut short by the crash
+                break
+            collection = entry['collection']
+            if data_service.is_shared(collection):
+                continue
+            data_service.apply_change(entry['op'], collection, RELOAD_KEYS.get(collection), entry['record'])
+            applied += 1
+    return applied
+
+
+def run_worker(listener, max_requests, replicated):
+    stopping = False
+    served = 0
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGHUP, signal.SIG_IGN)
+
+    wsgi_app = replication.replica_app(app) if replicated else app
+
+    def counted_app(environ, start_response):
+        nonlocal served
+        served += 1
+        return wsgi_app(environ, start_response)
+
+    host, port = listener.getsockname()[:2]
+    server = make_server(host, port, counted_app, fd=listener.fileno())
+    # Wake up periodically to notice stop signals and the recycle limit
+    server.timeout = 1.0
+    if replicated:
+        replication.start_replica()
+    else:
+        # A lone worker is the writer; it merges a replaced data file into its own copy
+        replay_journal()
+        start_watcher()
+    while not stopping and served < max_requests:
+        server.handle_request()
+
+    replication.stop_replica()
+    stop_watcher()
+    stop_flusher()
+    stop_sweeper()
+    shutdown_pool(wait=True)
+    stop_writer()
+    server.server_close()
+
+
+def spawn_worker(listener, args):
+    # Jitter the recycle point so workers do not all restart at once
+    max_requests = args.max_requests + random.randint(0, args.max_requests_jitter)
+    pid = os.fork()
+    if pid == 0:
+        random.seed()
+        exit_code = 0
+        try:
+            run_worker(listener, max_requests, args.replication)
+        except Exception:
+            traceback.print_exc()
+            exit_code = 1
+        finally:
+            os._exit(exit_code)
+    return pid
+
+
+def run_primary():
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGHUP, signal.SIG_IGN)
+
+    replication.start_primary()
+    # After start_primary, so the replayed writes are published to the replicas: those
+    # forked after this primary start from the preloaded data and catch up on them
+    replay_journal()
+    # Threaded: replicas forward concurrently and the data lock serializes the writes
+    server = make_server(f'unix://{replication.PRIMARY_SOCKET}', 0, replication.primary_app(app), threaded=True)
+    server.timeout = 1.0
+    start_watcher()
+    while not stopping:
+        server.handle_request()
+
+    stop_watcher()
+    stop_flusher()
+    stop_sweeper()
+    shutdown_pool(wait=True)
+    stop_writer()
+    server.server_close()
+
+
+def spawn_primary():
+    replication.begin_epoch()
+    pid = os.fork()
+    if pid == 0:
+        exit_code = 0
+        try:
+            run_primary()
+        except Exception:
+            traceback.print_exc()
+            exit_code = 1
+        finally:
+            os._exit(exit_code)
+    # Replicas forward writes as soon as they start, so wait for the primary to listen
+    deadline = time.monotonic() + GRACEFUL_TIMEOUT
+    while not os.path.exists(replication.PRIMARY_SOCKET) and time.monotonic() < deadline:
+        time.sleep(0.05)
+    return pid
+
+
+def stop_workers(pids):
+    for pid in pids:
+        try:
+            os.kill(pid, signal.SIGTERM)
+        except ProcessLookupError:
+            pass
+    deadline = time.monotonic() + GRACEFUL_TIMEOUT
+    remaining = set(pids)
+    while remaining and time.monotonic() < deadline:
+        for pid in list(remaining):
+            try:
+                if os.waitpid(pid, os.WNOHANG)[0] == pid:
+                    remaining.discard(pid)
+            except ChildProcessError:
+                remaining.discard(pid)
+        time.sleep(0.1)
+    for pid in remaining:
+        os.kill(pid, signal.SIGKILL)
+        os.waitpid(pid, 0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run the API with pre-forked workers')
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--max-requests', type=int, default=10000,
+                        help='Recycle a worker after it has served this many requests')
+    parser.add_argument('--max-requests-jitter', type=int, default=1000)
+    parser.add_argument('--data-file', default=data_service.DATA_FILE)
+    args = parser.parse_args()
+    data_service.DATA_FILE = args.data_file
+    # Even with sqlite or shards, sessions and the remaining collections live in the process
+    args.replication = args.workers > 1
+
+    listener = socket.create_server((args.host, args.port), backlog=2048)
+    listener.set_inheritable(True)
+    preload()
+
+    state = {'shutdown': False, 'restart': False}
+
+    def request_shutdown(signum, frame):
+        state['shutdown'] = True
+
+    def request_restart(signum, frame):
+        state['restart'] = True
+
+    signal.signal(signal.SIGTERM, request_shutdown)
+    signal.signal(signal.SIGINT, request_shutdown)
+    # SIGHUP replaces every worker: new ones start before old ones are drained
+    signal.signal(signal.SIGHUP, request_restart)
+
+    primary = None
+    if args.replication:
+        replication.configure()
+        primary = spawn_primary()
+    workers = {spawn_worker(listener, args) for _ in range(args.workers)}
+    print(f'Serving on {args.host}:{args.port} with {args.workers} workers (pid {os.getpid()})')
+
+    while not state['shutdown']:
+        if state['restart']:
+            state['restart'] = False
+            old_workers = workers
+            workers = {spawn_worker(listener, args) for _ in range(args.workers)}
+            stop_workers(old_workers)
+
+        # Reap exited workers (recycled or crashed) and replace them
+        try:
+            pid, _ = os.waitpid(-1, os.WNOHANG)
+        except ChildProcessError:
+            pid = 0
+        if pid and pid in workers:
+            workers.discard(pid)
+            if not state['shutdown']:
+                workers.add(spawn_worker(listener, args))
+        elif pid and pid == primary:
+            # A new primary starts from the preloaded data and replays the journal;
+            # replicas resync from it
+            primary = spawn_primary() if not state['shutdown'] else None
+        elif not pid:
+            time.sleep(0.2)
+
+    stop_workers(workers)
+    if primary:
+        stop_workers({primary})
+        replication.remove_sockets()
+    stop_shards()
+    listener.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,5 +0,0 @@
-import json
-
-def load_data():
-    with open('sample_data.json', 'r') as file:
-        return json.load(file) 
\ No newline at end of file
@@ -0,0 +1,59 @@
+import json
+import os
+import shutil
+import pytest
+from app.services import data_service, sqlite_store, id_allocator, reaction_index, session_store
+
+SAMPLE_DATA = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'sample_data.json')
+
+
+def _reset():
+    # Drop everything built from the previous test's dataset
+    data_service._data = None
+    data_service._indexes.clear()
+    data_service._positions.clear()
+    id_allocator._counters.clear()
+    reaction_index._by_post.clear()
+    reaction_index._counts.clear()
+    reaction_index._positions.clear()
+    reaction_index._loaded = False
+    session_store.stop_sweeper()
+    session_store._sessions.clear()
+    session_store._expiry_heap.clear()
+    session_store._principals.clear()
+    session_store._loaded = False
+
+
+@pytest.fixture
+def data_file(tmp_path, monkeypatch):
+    # A private copy of sample_data.json, with the journal next to it
+    path = tmp_path / 'data.json'
+    shutil.copy(SAMPLE_DATA, path)
+    monkeypatch.setattr(data_service, 'DATA_FILE', str(path))
+    monkeypatch.setattr(data_service, 'JOURNAL_FILE', str(tmp_path / 'journal.jsonl'))
+    monkeypatch.setattr(data_service, 'STORAGE_BACKEND', 'memory')
+    _reset()
+    yield path
+    _reset()
+
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def backend(request, data_file, tmp_path, monkeypatch):
+    # Runs a test once against each single-process backend, over the same data
+    if request.param == 'sqlite':
+        monkeypatch.setattr(sqlite_store, 'SQLITE_FILE', str(tmp_path / 'data.sqlite3'))
+        sqlite_store.migrate(str(data_file))
+        monkeypatch.setattr(data_service, 'STORAGE_BACKEND', 'sqlite')
+    return request.param
+
+
+@pytest.fixture
+def journal(data_file):
+    # The journal entries written so far
+    def read():
+        path = data_service.JOURNAL_FILE
+        if not os.path.exists(path):
+            return []
+        with open(path) as file:
+            return [json.loads(line) for line in file]
+    return read
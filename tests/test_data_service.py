@@ -0,0 +1,93 @@
+import pytest
+from app.services import data_service
+from app.services.data_service import (get_record, get_many, find_page, insert_record, replace_record, delete_record,
+                                       replace_and_insert, fold_counts, journal_batch)
+
+
+@pytest.fixture
+def changes(monkeypatch):
+    # The (op, collection, record id) of every change listeners hear during the test
+    heard = []
+    monkeypatch.setattr(data_service, '_change_listeners', [])
+    data_service.add_change_listener(lambda op, collection, key, record: heard.append((op, collection, record.get('postId'))))
+    return heard
+
+
+def _post(post_id, **fields):
+    return {'postId': post_id, 'userId': '12345', 'title': 't', 'content': 'c', 'postType': 'DISCUSSION',
+            'status': 'ACTIVE', 'viewCount': 0, 'commentCount': 0, 'reactionCount': 0, **fields}
+
+
+def _ops(journal):
+    return [(entry['op'], entry['collection'], entry['record'].get('postId')) for entry in journal()]
+
+
+def test_insert_is_readable_everywhere(backend, journal, changes):
+    insert_record('posts', _post('post200'))
+    assert get_record('posts', 'postId', 'post200')['title'] == 't'
+    assert get_many('posts', 'postId', ['post200', 'post999']) == ([_post('post200')], ['post999'])
+    page, total = find_page('posts', {'userId': '12345'}, 1, 10)
+    assert total == 2 and page[-1]['postId'] == 'post200'
+    assert _ops(journal) == changes == [('create', 'posts', 'post200')]
+
+
+def test_replace_is_copy_on_write(backend, journal, changes):
+    before = get_record('posts', 'postId', 'post123')
+    updated = replace_record('posts', 'postId', 'post123', {'content': 'new'})
+    assert updated['content'] == 'new' and updated['userId'] == before['userId']
+    assert before['content'] != 'new'
+    assert get_record('posts', 'postId', 'post123') == updated
+    updated = replace_record('posts', 'postId', 'post123', lambda current: {'commentCount': current['commentCount'] + 1})
+    assert updated['commentCount'] == before['commentCount'] + 1
+    assert _ops(journal) == changes == [('update', 'posts', 'post123')] * 2
+
+
+def test_failed_or_missing_replace_writes_nothing(backend, journal, changes):
+    def reject(current):
+        raise ValueError('rejected')
+    with pytest.raises(ValueError):
+        replace_record('posts', 'postId', 'post123', reject)
+    assert replace_record('posts', 'postId', 'post999', {'content': 'x'}) is None
+    assert get_record('posts', 'postId', 'post123')['content'] != 'x'
+    assert journal() == changes == []
+
+
+def test_delete(backend, journal, changes):
+    deleted = delete_record('posts', 'postId', 'post124')
+    assert deleted['postId'] == 'post124'
+    assert delete_record('posts', 'postId', 'post124') is None
+    assert get_record('posts', 'postId', 'post124') is None
+    assert find_page('posts', {}, 1, 10)[1] == 1
+    assert _ops(journal) == changes == [('delete', 'posts', 'post124')]
+
+
+def test_fold_counts_is_journaled_as_an_update(backend, journal, changes):
+    fold_counts('posts', 'postId', 'post123', {'viewCount': 3})
+    fold_counts('posts', 'postId', 'post123', {'viewCount': 2})
+    assert get_record('posts', 'postId', 'post123')['viewCount'] == 5
+    assert _ops(journal) == [('update', 'posts', 'post123')] * 2
+    assert changes == [('count', 'posts', 'post123')] * 2
+
+
+def test_replace_and_insert_is_all_or_nothing(backend, journal):
+    activity = {'activityId': 'act900', 'userId': '12345', 'activityType': 'EARN', 'tokenAmount': 5}
+    replace_and_insert('users', 'userId', '12345', lambda current: {'tokenBalance': current['tokenBalance'] + 5},
+                       'tokenActivities', activity)
+    assert get_record('users', 'userId', '12345')['tokenBalance'] == 55
+    assert get_record('tokenActivities', 'activityId', 'act900') == activity
+
+    def overdraw(current):
+        raise ValueError('Insufficient token balance')
+    with pytest.raises(ValueError):
+        replace_and_insert('users', 'userId', '12345', overdraw, 'tokenActivities', {**activity, 'activityId': 'act901'})
+    assert get_record('tokenActivities', 'activityId', 'act901') is None
+    assert [entry['op'] for entry in journal()] == ['update', 'create']
+
+
+def test_journal_batch_appends_once_at_the_end(backend, journal):
+    with journal_batch():
+        insert_record('posts', _post('post200'))
+        with journal_batch():
+            replace_record('posts', 'postId', 'post200', {'title': 'nested'})
+        assert journal() == []
+    assert _ops(journal) == [('create', 'posts', 'post200'), ('update', 'posts', 'post200')]
@@ -0,0 +1,24 @@
+import pytest
+from app.services import event_bus
+from app.services.data_service import insert_record, replace_record, fold_counts
+
+
+@pytest.fixture
+def events(data_file):
+    start = event_bus.latest_id()
+
+    def newer():
+        return [(event[1], event[2], event[3]) for event in event_bus.wait_for_events(start, 0)]
+    return newer
+
+
+def test_writes_become_events(events):
+    insert_record('comments', {'commentId': 'comment1', 'postId': 'post123', 'content': 'hi'})
+    replace_record('posts', 'postId', 'post123', {'content': 'edited'})
+    assert events() == [('created', 'comments', 'post123'), ('updated', 'posts', 'post123')]
+
+
+def test_view_count_folds_are_not_events(events):
+    fold_counts('posts', 'postId', 'post123', {'viewCount': 4})
+    insert_record('users', {'userId': 'user1'})
+    assert events() == []
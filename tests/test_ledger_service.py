@@ -0,0 +1,149 @@
+import threading
+import pytest
+from app.services import data_service, sqlite_store
+from app.services.data_service import get_record, find_page, record_locks
+from app.services.ledger_service import validate_activity_data, record_activity, record_activities
+
+
+def _user(user_id):
+    return get_record('users', 'userId', user_id)
+
+
+@pytest.mark.parametrize('activity, error', [
+    ({'activityType': 'EARN', 'tokenAmount': 5, 'description': 'bonus'}, None),
+    ({'activityType': 'spend', 'tokenAmount': 1, 'description': ''}, None),
+    (['EARN', 5], 'Activity must be a JSON object'),
+    ({'activityType': 'EARN', 'tokenAmount': 5}, 'Missing required field: description'),
+    ({'activityType': 'STEAL', 'tokenAmount': 5, 'description': 'x'}, 'Invalid activity type'),
+    ({'activityType': 7, 'tokenAmount': 5, 'description': 'x'}, 'Invalid activity type'),
+    ({'activityType': 'EARN', 'tokenAmount': 0, 'description': 'x'}, 'tokenAmount must be a positive integer'),
+    ({'activityType': 'EARN', 'tokenAmount': -3, 'description': 'x'}, 'tokenAmount must be a positive integer'),
+    ({'activityType': 'EARN', 'tokenAmount': 2.5, 'description': 'x'}, 'tokenAmount must be a positive integer'),
+    ({'activityType': 'EARN', 'tokenAmount': True, 'description': 'x'}, 'tokenAmount must be a positive integer'),
+    ({'activityType': 'EARN', 'tokenAmount': 5, 'description': None}, 'description must be a string'),
+])
+def test_validate_activity_data(activity, error):
+    assert validate_activity_data(activity) == error
+
+
+def test_earn_and_spend_update_balance(backend):
+    activity, error = record_activity(_user('12345'), {'activityType': 'EARN', 'tokenAmount': 10, 'description': 'a'})
+    assert error is None and activity['activityType'] == 'EARN'
+    assert _user('12345')['tokenBalance'] == 60
+    _, error = record_activity(_user('12345'), {'activityType': 'SPEND', 'tokenAmount': 60, 'description': 'b'})
+    assert error is None
+    assert _user('12345')['tokenBalance'] == 0
+    stored = get_record('tokenActivities', 'activityId', activity['activityId'])
+    assert stored['tokenAmount'] == 10
+
+
+def test_overdraw_writes_nothing(backend, journal):
+    _, total = find_page('tokenActivities', {'userId': '12345'}, 0, 10)
+    activity, error = record_activity(_user('12345'), {'activityType': 'SPEND', 'tokenAmount': 51, 'description': 'x'})
+    assert activity is None and error == 'Insufficient token balance'
+    assert _user('12345')['tokenBalance'] == 50
+    assert find_page('tokenActivities', {'userId': '12345'}, 0, 10)[1] == total
+    assert journal() == []
+
+
+def test_unknown_user(backend):
+    _, error = record_activity({'userId': 'nobody'}, {'activityType': 'EARN', 'tokenAmount': 1, 'description': 'x'})
+    assert error == 'User not found'
+
+
+def test_batch_applies_in_order(backend, journal):
+    user = _user('12346')
+    results = record_activities([
+        (user, {'activityType': 'EARN', 'tokenAmount': 25, 'description': 'first'}),
+        (user, {'activityType': 'SPEND', 'tokenAmount': 100, 'description': 'uses the earn'}),
+        (user, {'activityType': 'SPEND', 'tokenAmount': 1, 'description': 'overdraws'}),
+        (user, {'activityType': 'EARN', 'tokenAmount': 'lots', 'description': 'invalid'}),
+    ])
+    assert [error for _, error in results] == [None, None, 'Insufficient token balance',
+                                               'tokenAmount must be a positive integer']
+    assert _user('12346')['tokenBalance'] == 0
+    # One append for the whole batch: two user updates and two activities
+    assert [(entry['op'], entry['collection']) for entry in journal()] == [
+        ('update', 'users'), ('create', 'tokenActivities')] * 2
+    ids = [activity['activityId'] for activity, _ in results[:2]]
+    assert len(set(ids)) == 2
+
+
+def test_concurrent_activities_keep_balance(backend):
+    _, before = find_page('tokenActivities', {'userId': '12345'}, 0, 1)
+
+    def earn_then_spend():
+        for _ in range(20):
+            record_activity(_user('12345'), {'activityType': 'EARN', 'tokenAmount': 3, 'description': 'e'})
+            record_activity(_user('12345'), {'activityType': 'SPEND', 'tokenAmount': 2, 'description': 's'})
+    threads = [threading.Thread(target=earn_then_spend) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert _user('12345')['tokenBalance'] == 50 + 8 * 20
+    _, total = find_page('tokenActivities', {'userId': '12345'}, 0, 1)
+    assert total == before + 8 * 40
+
+
+def test_writes_wait_only_for_their_own_user(backend):
+    # While one user's record is locked by a writer, another user's activity completes
+    # and a second activity for the locked user waits
+    locked, release = threading.Event(), threading.Event()
+
+    def writer_in_progress():
+        with record_locks('users', ['12345']):
+            locked.set()
+            release.wait(5)
+    holder = threading.Thread(target=writer_in_progress)
+    holder.start()
+    assert locked.wait(5)
+    earn = {'activityType': 'EARN', 'tokenAmount': 1, 'description': 'x'}
+    blocked = threading.Thread(target=record_activity, args=(_user('12345'), earn))
+    blocked.start()
+    try:
+        other = threading.Thread(target=record_activity, args=(_user('12346'), earn))
+        other.start()
+        other.join(timeout=5)
+        assert not other.is_alive()
+        assert _user('12346')['tokenBalance'] == 76
+        blocked.join(timeout=0.2)
+        assert blocked.is_alive()
+        assert _user('12345')['tokenBalance'] == 50
+    finally:
+        release.set()
+        holder.join(timeout=5)
+        blocked.join(timeout=5)
+    assert _user('12345')['tokenBalance'] == 51
+
+
+def test_slow_store_write_does_not_block_other_users(data_file, tmp_path, monkeypatch):
+    # The store round-trip runs outside data_lock, so a slow one for one user does not
+    # hold up writes for anyone else
+    monkeypatch.setattr(sqlite_store, 'SQLITE_FILE', str(tmp_path / 'data.sqlite3'))
+    sqlite_store.migrate(str(data_file))
+    monkeypatch.setattr(data_service, 'STORAGE_BACKEND', 'sqlite')
+    entered, release = threading.Event(), threading.Event()
+    original = sqlite_store.update_and_insert
+
+    def slow(collection, field, value, apply, insert_collection, record):
+        if value == '12345':
+            entered.set()
+            release.wait(5)
+        return original(collection, field, value, apply, insert_collection, record)
+    monkeypatch.setattr(sqlite_store, 'update_and_insert', slow)
+
+    earn = {'activityType': 'EARN', 'tokenAmount': 1, 'description': 'x'}
+    first = threading.Thread(target=record_activity, args=(_user('12345'), earn))
+    first.start()
+    try:
+        assert entered.wait(5)
+        other = threading.Thread(target=record_activity, args=(_user('12346'), earn))
+        other.start()
+        other.join(timeout=5)
+        assert not other.is_alive()
+        assert _user('12346')['tokenBalance'] == 76
+    finally:
+        release.set()
+        first.join(timeout=5)
+    assert _user('12345')['tokenBalance'] == 51
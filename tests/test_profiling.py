@@ -0,0 +1,27 @@
+import os
+import threading
+from collections import Counter
+from app.middleware import profiling
+
+
+def test_concurrent_writes_publish_whole_files(tmp_path, monkeypatch):
+    monkeypatch.setattr(profiling, 'PROFILE_DIR', str(tmp_path))
+    monkeypatch.setattr(profiling, '_aggregates', {'/api/posts': Counter({'main;handler': 3})})
+    errors = []
+
+    def write():
+        try:
+            for _ in range(50):
+                profiling._write_collapsed('/api/posts')
+        except Exception as error:
+            errors.append(error)
+    threads = [threading.Thread(target=write) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    # One file for this process, no temp files left behind
+    assert os.listdir(tmp_path) == [f'api_posts.{os.getpid()}.collapsed']
+    assert (tmp_path / f'api_posts.{os.getpid()}.collapsed').read_text() == 'main;handler 3\n'
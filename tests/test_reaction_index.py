@@ -0,0 +1,50 @@
+import pytest
+from app.services import data_service, sqlite_store
+from app.services.data_service import get_record
+from app.services.reaction_index import get_reaction, get_post_reactions, get_reaction_summary, add_reaction, remove_reaction
+
+
+def _post():
+    return get_record('posts', 'postId', 'post123')
+
+
+def _reaction(reaction_id, user_id, reaction_type='LIKE'):
+    return {'reactionId': reaction_id, 'postId': 'post123', 'userId': user_id,
+            'reactionType': reaction_type, 'createdAt': '2024-03-20T09:00:00'}
+
+
+def test_one_reaction_per_user(backend):
+    assert add_reaction(_post(), _reaction('reaction1', '12345'))
+    assert not add_reaction(_post(), _reaction('reaction2', '12345', 'LOVE'))
+    assert add_reaction(_post(), _reaction('reaction3', '12346', 'LOVE'))
+    assert _post()['reactionCount'] == 14
+    assert [reaction['reactionId'] for reaction in get_post_reactions('post123')] == ['reaction1', 'reaction3']
+    assert get_reaction('post123', '12345')['reactionType'] == 'LIKE'
+    assert get_reaction_summary('post123') == {'LIKE': 1, 'LOVE': 1, 'HELPFUL': 0, 'INSIGHTFUL': 0}
+
+
+def test_remove_reaction(backend):
+    add_reaction(_post(), _reaction('reaction1', '12345'))
+    assert remove_reaction(_post(), '12345')['reactionId'] == 'reaction1'
+    assert remove_reaction(_post(), '12345') is None
+    assert get_reaction('post123', '12345') is None
+    assert _post()['reactionCount'] == 12
+    # The user may react again once the first reaction is gone
+    assert add_reaction(_post(), _reaction('reaction2', '12345'))
+
+
+@pytest.mark.parametrize('backend', ['sqlite'], indirect=True)
+def test_duplicate_from_another_process_is_rejected(backend):
+    # Written straight to the file, as another worker would, so no index here knows of it
+    sqlite_store.insert('reactions', _reaction('reaction1', '12345'))
+    assert not add_reaction(_post(), _reaction('reaction2', '12345'))
+    assert _post()['reactionCount'] == 12
+    assert [reaction['reactionId'] for reaction in get_post_reactions('post123')] == ['reaction1']
+
+
+@pytest.mark.parametrize('backend', ['sqlite'], indirect=True)
+def test_stored_collections_are_not_materialized(backend):
+    with pytest.raises(KeyError):
+        data_service.load_data()['reactions']
+    with pytest.raises(KeyError):
+        data_service.load_data().get('profiles', [])
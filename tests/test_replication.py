@@ -0,0 +1,40 @@
+import pytest
+from app.services import replication
+
+
+@pytest.fixture
+def replica(monkeypatch):
+    monkeypatch.setattr(replication, 'version', 10)
+    monkeypatch.setattr(replication, '_session_versions', {})
+    monkeypatch.setattr(replication, '_pins', [])
+
+
+def _required(session_id):
+    return replication._required_version({'HTTP_X_SESSION_ID': session_id})
+
+
+def test_pins_are_dropped_once_reached(replica):
+    with replication._changed:
+        replication._pin('s1', 12)
+        replication._pin('s2', 15)
+        # Already reached, or lower than the session's pin: nothing to hold
+        replication._pin('s3', 9)
+        replication._pin('s1', 11)
+    assert (_required('s1'), _required('s2'), _required('s3')) == (12, 15, 0)
+
+    replication._apply(('changes', [(12, ('pin', 's4', 11))]))
+    assert replication._session_versions == {'s2': 15}
+
+    replication._apply(('changes', [(15, ('pin', 's4', 15))]))
+    assert replication._session_versions == {}
+    assert replication._pins == []
+
+
+def test_repinned_session_keeps_the_later_pin(replica):
+    with replication._changed:
+        replication._pin('s1', 12)
+        replication._pin('s1', 14)
+    replication._apply(('changes', [(13, ('pin', 'other', 13))]))
+    assert _required('s1') == 14
+    replication._apply(('changes', [(14, ('pin', 'other', 14))]))
+    assert _required('s1') == 0
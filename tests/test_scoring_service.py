@@ -0,0 +1,56 @@
+import threading
+import time
+import pytest
+from concurrent.futures import TimeoutError
+from app.services import scoring_service
+from app.services.data_service import insert_record
+
+
+@pytest.fixture
+def scoring(data_file, monkeypatch):
+    monkeypatch.setattr(scoring_service, 'SCORING_WORKERS', 1)
+    monkeypatch.setattr(scoring_service, 'SCORING_REBUILD_DELAY_SECONDS', 0.3)
+    monkeypatch.setattr(scoring_service, '_pending', threading.BoundedSemaphore(2))
+    yield scoring_service
+    scoring_service.shutdown_pool(wait=True)
+
+
+def test_feature_writes_rebuild_once_off_the_request_path(scoring, monkeypatch):
+    builds = []
+    original = scoring._new_pool
+    monkeypatch.setattr(scoring, '_new_pool', lambda: builds.append(1) or original())
+    pool = scoring._get_pool()
+    for number in range(5):
+        insert_record('profiles', {'profileId': f'profile{number}', 'userId': '12345'})
+        # Callers keep the current pool while the writes settle
+        assert scoring._get_pool() is pool
+    deadline = time.monotonic() + 10
+    while scoring._pool is pool and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert scoring._pool is not pool
+    time.sleep(0.5)
+    # The first pool and one rebuild for the whole burst
+    assert len(builds) == 2
+    assert {score['propertyId'] for score in scoring.get_property_scores({})} == {'prop789', 'prop790'}
+
+
+def test_pending_calls_are_bounded(scoring):
+    first = scoring._submit(time.sleep, 0.5)
+    second = scoring._submit(time.sleep, 0)
+    with pytest.raises(scoring.ScoringBusy):
+        scoring._submit(time.sleep, 0)
+    first.result(timeout=5)
+    second.result(timeout=5)
+    # Finished calls give their slot back
+    scoring._submit(time.sleep, 0).result(timeout=5)
+
+
+def test_timed_out_call_leaves_the_queue(scoring, monkeypatch):
+    monkeypatch.setattr(scoring, '_pending', threading.BoundedSemaphore(8))
+    monkeypatch.setattr(scoring, 'SCORING_TIMEOUT_SECONDS', 0.1)
+    # One worker: the first call runs, the next are handed to the pool's call queue,
+    # the last waits in the executor and can still be cancelled
+    futures = [scoring._submit(time.sleep, 1) for _ in range(4)]
+    with pytest.raises(TimeoutError):
+        scoring._result(futures[-1])
+    assert futures[-1].cancelled()
@@ -0,0 +1,67 @@
+from datetime import datetime, timedelta
+from app import app
+from app.services import data_service, session_store
+from app.services.data_service import replace_record, get_index
+from app.services.session_store import find_user_by_username, create_session, get_session, end_session, sweep_expired
+from app.routes.auth_routes import validate_session
+
+
+def test_username_lookup_follows_renames(backend):
+    assert find_user_by_username('john.doe')['userId'] == '12345'
+    replace_record('users', 'userId', '12345', {'username': 'johnny'})
+    assert find_user_by_username('johnny')['userId'] == '12345'
+    assert find_user_by_username('john.doe') is None
+
+
+def test_miss_keeps_the_index(data_file):
+    index = get_index('users', 'username')
+    for _ in range(3):
+        assert find_user_by_username('nobody') is None
+    assert data_service._indexes[('users', 'username')][1] is index
+
+
+def test_active_session_validates(data_file):
+    session = create_session('12345')
+    assert validate_session(session['sessionId']) == (session, None)
+
+
+def test_expired_session_is_rejected_then_swept(data_file, monkeypatch):
+    monkeypatch.setattr(session_store, 'SESSION_TTL', timedelta(seconds=-1))
+    session = create_session('12345')
+    assert validate_session(session['sessionId']) == (None, ('Session has expired', 401))
+    assert sweep_expired() == 1
+    assert get_session(session['sessionId']) is None
+    assert validate_session(session['sessionId']) == (None, ('Session not found', 404))
+
+
+def test_sweep_keeps_live_sessions(data_file):
+    session = create_session('12345')
+    assert sweep_expired() == 0
+    assert sweep_expired(datetime.now() + session_store.SESSION_TTL + timedelta(seconds=1)) == 1
+    assert get_session(session['sessionId']) is None
+
+
+def test_ended_session_is_inactive(data_file):
+    session = create_session('12345')
+    end_session(session['sessionId'])
+    assert validate_session(session['sessionId']) == (None, ('Session is not active', 401))
+
+
+def test_rejected_session_reads_public_routes_anonymously(data_file, monkeypatch):
+    monkeypatch.setattr(session_store, 'SESSION_TTL', timedelta(seconds=-1))
+    expired = create_session('12345')['sessionId']
+    client = app.test_client()
+    for session_id in ['no-such-session', expired]:
+        response = client.get('/api/properties/prop789', headers={'X-Session-ID': session_id})
+        assert response.status_code == 200
+
+
+def test_rejected_session_is_reported_where_a_principal_is_needed(data_file, monkeypatch):
+    client = app.test_client()
+    response = client.get('/api/properties/prop789?__profile=json', headers={'X-Session-ID': 'no-such-session'})
+    assert (response.status_code, response.get_json()) == (404, {'error': 'Session not found'})
+    monkeypatch.setattr(session_store, 'SESSION_TTL', timedelta(seconds=-1))
+    expired = create_session('12345')['sessionId']
+    response = client.get('/api/properties/prop789?__profile=json', headers={'X-Session-ID': expired})
+    assert (response.status_code, response.get_json()) == (401, {'error': 'Session has expired'})
+    assert client.get('/api/properties/prop789?__profile=json').status_code == 403
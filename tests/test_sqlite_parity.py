@@ -0,0 +1,37 @@
+import pytest
+from app.services import data_service, sqlite_store
+from app.services.data_service import find_page, get_many
+
+
+QUERIES = [
+    ('find_page', 'properties', {}, 1, 10),
+    ('find_page', 'properties', {}, 2, 1),
+    ('find_page', 'properties', {}, 0, 1),
+    ('find_page', 'properties', {}, 5, 10),
+    ('find_page', 'properties', {'landlordId': 'landlord123', 'status': 'AVAILABLE'}, 1, 10),
+    ('find_page', 'comments', {'postId': 'post123', 'status': ''}, 1, 10),
+    ('find_page', 'tokenActivities', {'userId': '12345'}, 1, 1),
+    ('find_page', 'tokenActivities', {'activityType': 'EARN'}, 1, 10),
+    # Neither field has a column for property_reviews; SQLite filters through json_extract
+    ('find_page', 'property_reviews', {'userId': '12346'}, 1, 10),
+    ('find_page', 'property_reviews', {'rating': 4.5}, 1, 10),
+    ('find_page', 'users', {'role': 'NOBODY'}, 1, 10),
+    ('get_many', 'users', 'userId', ['12346', 'missing', '12345']),
+    ('get_many', 'users', 'username', ['property.owner', 'john.doe', 'nobody']),
+    ('get_many', 'properties', 'propertyId', []),
+    ('get_many', 'property_reviews', 'reviewId', ['review124', 'review124']),
+]
+
+
+def _run(query):
+    kind, *args = query
+    return find_page(*args) if kind == 'find_page' else get_many(*args)
+
+
+@pytest.mark.parametrize('query', QUERIES)
+def test_sqlite_matches_memory(query, data_file, tmp_path, monkeypatch):
+    expected = _run(query)
+    monkeypatch.setattr(sqlite_store, 'SQLITE_FILE', str(tmp_path / 'data.sqlite3'))
+    sqlite_store.migrate(str(data_file))
+    monkeypatch.setattr(data_service, 'STORAGE_BACKEND', 'sqlite')
+    assert _run(query) == expected
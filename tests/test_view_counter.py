@@ -0,0 +1,65 @@
+import threading
+import pytest
+from app.services import data_service, view_counter
+from app.services.data_service import get_record
+from app.services.view_counter import record_view, pending_views, live_view_count, flush_views
+
+
+@pytest.fixture
+def views(backend, monkeypatch):
+    # Flushed by the tests only
+    monkeypatch.setattr(view_counter, 'start_flusher', lambda: None)
+    heard = []
+    monkeypatch.setattr(data_service, '_change_listeners',
+                        data_service._change_listeners + [lambda *change: heard.append(change)])
+    yield heard
+    for shard in view_counter._shards:
+        shard[1].clear()
+        shard[2].clear()
+
+
+def test_flush_folds_views_as_counter_updates(views, journal):
+    for _ in range(3):
+        record_view('post123')
+    record_view('post124', 2)
+    assert live_view_count(get_record('posts', 'postId', 'post123')) == 3
+    assert flush_views() == 2
+    assert get_record('posts', 'postId', 'post123')['viewCount'] == 3
+    assert get_record('posts', 'postId', 'post124')['viewCount'] == 2
+    assert pending_views('post123') == 0
+    assert sorted((op, record['postId']) for op, _, _, record in views) == [('count', 'post123'), ('count', 'post124')]
+    assert [entry['op'] for entry in journal()] == ['update', 'update']
+
+
+def test_unknown_posts_are_dropped(views):
+    record_view('missing')
+    assert flush_views() == 0
+    assert pending_views('missing') == 0
+
+
+def test_views_recorded_during_a_flush_are_not_blocked_or_lost(views, monkeypatch):
+    folding, release = threading.Event(), threading.Event()
+    original = view_counter.fold_counts
+
+    def slow(collection, key, record_id, counts):
+        folding.set()
+        release.wait(5)
+        return original(collection, key, record_id, counts)
+    monkeypatch.setattr(view_counter, 'fold_counts', slow)
+    record_view('post123', 5)
+    flusher = threading.Thread(target=flush_views)
+    flusher.start()
+    try:
+        assert folding.wait(5)
+        # The shard lock is free while the post is written
+        recorder = threading.Thread(target=record_view, args=('post123',))
+        recorder.start()
+        recorder.join(timeout=5)
+        assert not recorder.is_alive()
+        assert pending_views('post123') == 6
+    finally:
+        release.set()
+        flusher.join(timeout=5)
+    assert get_record('posts', 'postId', 'post123')['viewCount'] == 5
+    assert pending_views('post123') == 1
+    assert live_view_count(get_record('posts', 'postId', 'post123')) == 6